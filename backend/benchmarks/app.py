@@ -0,0 +1,76 @@
+"""Run the API against the benchmark data set.
+
+Seeds a fresh database with the data set from dataset.py and serves the app
+with uvicorn. `run.py` starts this for you; run it by hand to benchmark with
+another load generator or to inspect the data:
+
+    python -m benchmarks.app --db mongo --port 8800    # DATABASE_NAME must contain "bench"; it is dropped first
+    python -m benchmarks.app --db memory --port 8800   # mongomock, no MongoDB needed
+
+Point the fakes at the app through the environment (OPENAI_BASE_URL,
+WEATHER_BASE_URL); run.py does this.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+from benchmarks.dataset import DatasetSize, seed
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser):
+    defaults = DatasetSize()
+    parser.add_argument("--farmers", type=int, default=defaults.farmers)
+    parser.add_argument("--lands-per-farmer", type=int, default=defaults.lands_per_farmer)
+    parser.add_argument("--cycles-per-land", type=int, default=defaults.cycles_per_land)
+    parser.add_argument("--products", type=int, default=defaults.products)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def dataset_size(args: argparse.Namespace) -> DatasetSize:
+    return DatasetSize(
+        farmers=args.farmers, lands_per_farmer=args.lands_per_farmer,
+        cycles_per_land=args.cycles_per_land, products=args.products, seed=args.seed,
+    )
+
+
+def use_memory_db(server):
+    """Swap every collection server.py holds for an in-memory one"""
+    from benchmarks.memory_db import MemoryClient
+
+    server.client = MemoryClient()
+    server.db = server.client[server.DATABASE_NAME]
+    for name, value in list(vars(server).items()):
+        if name.endswith("_collection") and hasattr(value, "name"):
+            setattr(server, name, server.db[value.name])
+
+
+async def serve(args: argparse.Namespace):
+    import uvicorn
+    import server
+
+    if args.db == "memory":
+        use_memory_db(server)
+    elif "bench" not in server.DATABASE_NAME:
+        sys.exit(f"Refusing to drop database {server.DATABASE_NAME!r}; set DATABASE_NAME to a name containing 'bench'")
+    else:
+        await server.client.drop_database(server.DATABASE_NAME)
+
+    started = time.perf_counter()
+    counts = await seed(server.db, dataset_size(args))
+    print(f"✅ Seeded {', '.join(f'{count} {name}' for name, count in counts.items())} in {time.perf_counter() - started:.1f}s", flush=True)
+
+    config = uvicorn.Config(server.app, host=args.host, port=args.port, log_config=None, access_log=False)
+    await uvicorn.Server(config).serve()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the API on a freshly seeded benchmark database")
+    parser.add_argument("--db", choices=["mongo", "memory"], default="mongo")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+    os.environ.setdefault("DATABASE_NAME", "agriverse_bench")
+    asyncio.run(serve(args))
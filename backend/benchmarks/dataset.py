@@ -0,0 +1,169 @@
+"""Deterministic benchmark data set.
+
+Every id is derived from its position (farmer 3's second land is
+`bench-land-3-1`), so the load generator can build requests without reading
+the database, and the same sizes and seed always produce the same documents.
+"""
+import json
+import random
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import bcrypt
+
+from geo import geo_point
+
+TEMPLATES_PATH = Path(__file__).resolve().parent.parent / "schedule_templates.json"
+INSERT_BATCH_SIZE = 1000
+
+# Every bench user's password; runs mint tokens instead of logging in
+PASSWORD = "benchmark"
+
+PRODUCT_CATEGORIES = ["vegetables", "fruits", "grains", "pulses", "spices", "dairy"]
+SOIL_TYPES = ["loamy", "clay", "sandy", "black", "red", "alluvial"]
+# In the order of schedule_templates.json
+CROPS = ["wheat", "rice"]
+
+
+@dataclass
+class DatasetSize:
+    farmers: int = 200
+    lands_per_farmer: int = 3
+    cycles_per_land: int = 2
+    products: int = 2000
+    seed: int = 42
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def farmer_id(i: int) -> str:
+    return f"bench-farmer-{i}"
+
+
+def land_id(farmer: int, land: int) -> str:
+    return f"bench-land-{farmer}-{land}"
+
+
+def schedule_id(farmer: int, land: int) -> str:
+    return f"bench-schedule-{farmer}-{land}"
+
+
+def cycle_id(farmer: int, land: int, cycle: int) -> str:
+    return f"bench-cycle-{farmer}-{land}-{cycle}"
+
+
+def task_id(parent_id: str, index: int) -> str:
+    return f"{parent_id}-task-{index}"
+
+
+def product_id(i: int) -> str:
+    return f"bench-product-{i}"
+
+
+def crop_index(farmer: int, land: int) -> int:
+    """Which template (wheat, rice) a land's schedule and cycles follow"""
+    return (farmer + land) % len(CROPS)
+
+
+def land_location(size: DatasetSize, farmer: int, land: int) -> Dict[str, float]:
+    """Somewhere in India; stable for a given seed"""
+    rng = random.Random(f"{size.seed}-land-{farmer}-{land}")
+    return {"lat": round(rng.uniform(10, 28), 5), "lng": round(rng.uniform(72, 88), 5)}
+
+
+def template_tasks() -> List[List[dict]]:
+    with open(TEMPLATES_PATH) as f:
+        return [template["tasks"] for template in json.load(f)]
+
+
+def _documents(size: DatasetSize, password_hash: str) -> Iterator[tuple]:
+    """(collection name, document) pairs for the whole data set"""
+    rng = random.Random(size.seed)
+    templates = template_tasks()
+    now = datetime.utcnow().replace(microsecond=0)
+
+    for f in range(size.farmers):
+        yield "users", {
+            "id": farmer_id(f), "email": f"farmer{f}@bench.agriverse", "password": password_hash,
+            "user_type": "farmer", "name": f"Bench Farmer {f}", "phone": None,
+            "location": land_location(size, f, 0), "address": None, "created_at": now - timedelta(days=400),
+        }
+        for l in range(size.lands_per_farmer):
+            location = land_location(size, f, l)
+            crop = crop_index(f, l)
+            yield "lands", {
+                "id": land_id(f, l), "farmer_id": farmer_id(f), "name": f"Field {l + 1}",
+                "size": round(rng.uniform(0.5, 12), 1), "location": location, "geo": geo_point(location),
+                "address": None, "soil_type": rng.choice(SOIL_TYPES), "custom_soil_type": None,
+                "crops": [CROPS[crop]], "intended_crops": [], "description": None,
+                "last_updated": now - timedelta(days=rng.randint(0, 60)),
+            }
+
+            days_elapsed = rng.randint(0, 110)
+            schedule = schedule_id(f, l)
+            yield "crop_schedules", {
+                "id": schedule, "farmer_id": farmer_id(f), "land_id": land_id(f, l), "crop_name": CROPS[crop],
+                "current_cycle_id": cycle_id(f, l, size.cycles_per_land - 1) if size.cycles_per_land else None,
+                "schedule": [
+                    {**task, "id": task_id(schedule, i), "completed": task["day"] < days_elapsed, "skipped": False,
+                     "completed_at": None, "cycle_id": None}
+                    for i, task in enumerate(templates[crop])
+                ],
+                "current_stage": "Growth", "days_elapsed": days_elapsed, "disease_alerts": [],
+                "next_action": None, "health_score": rng.randint(60, 100), "active": True,
+                "start_date": now - timedelta(days=days_elapsed), "created_at": now - timedelta(days=days_elapsed),
+            }
+
+            for c in range(size.cycles_per_land):
+                cycle = cycle_id(f, l, c)
+                started = now - timedelta(days=(size.cycles_per_land - c) * 130)
+                latest = c == size.cycles_per_land - 1
+                yield "cultivation_cycles", {
+                    "id": cycle, "farmer_id": farmer_id(f), "land_id": land_id(f, l), "crop_name": CROPS[crop],
+                    "cycle_version": c + 1, "start_date": started, "end_date": None if latest else started + timedelta(days=120),
+                    "status": "active" if latest else "completed", "parent_cycle_id": cycle_id(f, l, c - 1) if c else None,
+                    "soil_type": "loamy", "season": "rabi", "weather_conditions": None, "notes": None,
+                    "created_at": started, "updated_at": started,
+                }
+                for i, task in enumerate(templates[crop]):
+                    done = not latest or task["day"] < days_elapsed
+                    yield "cycle_tasks", {
+                        **task, "id": task_id(cycle, i), "cycle_id": cycle, "farmer_id": farmer_id(f),
+                        "completed": done, "skipped": False,
+                        "completed_at": (started + timedelta(days=task["day"])).isoformat() if done else None,
+                        "created_at": started,
+                    }
+
+    for p in range(size.products):
+        farmer = rng.randrange(size.farmers)
+        location = land_location(size, farmer, 0)
+        yield "products", {
+            "id": product_id(p), "farmer_id": farmer_id(farmer), "name": f"Produce {p}",
+            "description": "Fresh from the farm", "price": round(rng.uniform(10, 500), 2),
+            "unit": rng.choice(["kg", "ton", "piece"]), "quantity": rng.randint(1, 1000),
+            "category": rng.choice(PRODUCT_CATEGORIES), "image_base64": None, "image": None,
+            "location": location, "geo": geo_point(location), "available": rng.random() > 0.1,
+            "created_at": now - timedelta(minutes=p),
+        }
+
+
+async def seed(db, size: DatasetSize) -> Dict[str, int]:
+    """Insert the data set into db (expected to be empty); returns counts per collection"""
+    counts: Dict[str, int] = {}
+    batches: Dict[str, List[dict]] = {}
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt()).decode()
+    for name, doc in _documents(size, password_hash):
+        batch = batches.setdefault(name, [])
+        batch.append(doc)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            await db[name].insert_many(batch, ordered=False)
+            counts[name] = counts.get(name, 0) + len(batch)
+            batches[name] = []
+    for name, batch in batches.items():
+        if batch:
+            await db[name].insert_many(batch, ordered=False)
+            counts[name] = counts.get(name, 0) + len(batch)
+    return counts
@@ -0,0 +1,139 @@
+"""In-memory stand-in for the async MongoDB client, backed by mongomock.
+
+Only for benchmarks (`--db memory`): it measures the API's own overhead with
+no database round trips, so numbers are not comparable with a real MongoDB
+run. Needs `pip install mongomock`. Features mongomock lacks (e.g. $geoNear,
+2dsphere and TTL indexes) fail the same way a misconfigured server would, so
+keep the scenarios that depend on them to `--db mongo`.
+"""
+from typing import Any, List
+
+try:
+    import mongomock
+except ImportError:  # optional; only needed for --db memory
+    mongomock = None
+
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import OperationFailure
+
+
+class MemoryCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs) -> "MemoryCursor":
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count: int) -> "MemoryCursor":
+        self._cursor = self._cursor.skip(count)
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length: int = None) -> List[dict]:
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._cursor:
+            yield doc
+
+
+class BulkWriteResult:
+    def __init__(self):
+        self.matched_count = self.modified_count = self.inserted_count = self.deleted_count = self.upserted_count = 0
+
+
+class MemoryCollection:
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def find(self, *args, **kwargs) -> MemoryCursor:
+        return MemoryCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline: List[dict], **kwargs) -> MemoryCursor:
+        return MemoryCursor(self._collection.aggregate(pipeline))
+
+    async def find_one_and_update(self, filter: dict, update: dict, projection: dict = None, **kwargs):
+        # mongomock drops the document when a projection is combined with
+        # ReturnDocument.AFTER; return it whole (minus _id) instead
+        doc = self._collection.find_one_and_update(filter, update, **kwargs)
+        if doc is not None and projection and projection.get("_id") == 0:
+            doc.pop("_id", None)
+        return doc
+
+    async def bulk_write(self, operations: List[Any], ordered: bool = True, **kwargs) -> BulkWriteResult:
+        result = BulkWriteResult()
+        for op in operations:
+            if isinstance(op, (UpdateOne, UpdateMany)):
+                update = self._collection.update_one if isinstance(op, UpdateOne) else self._collection.update_many
+                outcome = update(op._filter, op._doc, upsert=op._upsert)
+                result.matched_count += outcome.matched_count
+                result.modified_count += outcome.modified_count
+            elif isinstance(op, ReplaceOne):
+                outcome = self._collection.replace_one(op._filter, op._doc, upsert=op._upsert)
+                result.matched_count += outcome.matched_count
+                result.modified_count += outcome.modified_count
+            elif isinstance(op, InsertOne):
+                self._collection.insert_one(op._doc)
+                result.inserted_count += 1
+            elif isinstance(op, (DeleteOne, DeleteMany)):
+                delete = self._collection.delete_one if isinstance(op, DeleteOne) else self._collection.delete_many
+                result.deleted_count += delete(op._filter).deleted_count
+        return result
+
+    def __getattr__(self, name: str):
+        method = getattr(self._collection, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class MemoryDatabase:
+    def __init__(self, database):
+        self._database = database
+        self.name = database.name
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        return MemoryCollection(self._database[name])
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, *args, **kwargs) -> dict:
+        return {"ok": 1.0}
+
+
+class MemoryClient:
+    """Drop-in for AsyncMongoClient as far as server.py uses it"""
+
+    def __init__(self):
+        if mongomock is None:
+            raise RuntimeError("--db memory needs mongomock (pip install mongomock)")
+        self._client = mongomock.MongoClient()
+        self.admin = MemoryDatabase(self._client.admin)
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        return MemoryDatabase(self._client[name])
+
+    def start_session(self, **kwargs):
+        # Like a standalone mongod: no transactions (callers fall back to plain writes)
+        raise OperationFailure("Transaction numbers are only allowed on a replica set member or mongos", code=20)
+
+    async def drop_database(self, name: str):
+        self._client.drop_database(name)
+
+    async def close(self):
+        pass
@@ -0,0 +1,342 @@
+"""Benchmark the API endpoint by endpoint and compare with a stored baseline.
+
+Starts the fake OpenAI and Open-Meteo servers and the API (benchmarks/app.py,
+seeded with the deterministic data set), then drives each scenario with
+concurrent aiohttp clients over real HTTP and reports p50/p95/p99 latency and
+requests per second. Run from backend/:
+
+    python -m benchmarks.run --db memory                      # no MongoDB needed (pip install mongomock)
+    python -m benchmarks.run --db mongo --save-baseline       # MONGO_URL, database agriverse_bench
+    python -m benchmarks.run --db mongo                       # compare with benchmarks/baseline.json
+    python -m benchmarks.run --url http://127.0.0.1:8800      # an app you started with benchmarks.app
+
+A scenario regresses when any of its requests failed, or when its p95 grows
+or its RPS drops by more than --tolerance (default 20%) against the
+baseline; the exit status is then 1.
+Requests are generated from --seed, so two runs send the same requests in
+the same order. Baselines only compare runs on the same machine and settings.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import jwt
+
+from benchmarks import dataset
+from benchmarks.app import add_dataset_arguments, dataset_size
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+BENCH_SECRET_KEY = "agriverse-benchmark-secret-key-not-for-production"
+
+# (method, path, json body, farmer index to authenticate as or None)
+Request = Tuple[str, str, Optional[dict], Optional[int]]
+
+
+class Scenarios:
+    """Request generators per endpoint, over the ids of the seeded data set"""
+
+    def __init__(self, size: dataset.DatasetSize):
+        self.size = size
+        self.task_counts = [len(tasks) for tasks in dataset.template_tasks()]
+
+    def _land(self, rng: random.Random) -> Tuple[int, int]:
+        return rng.randrange(self.size.farmers), rng.randrange(self.size.lands_per_farmer)
+
+    def products(self, rng: random.Random) -> Request:
+        return "GET", "/api/products?limit=20", None, None
+
+    def product_detail(self, rng: random.Random) -> Request:
+        return "GET", f"/api/products/{dataset.product_id(rng.randrange(self.size.products))}", None, None
+
+    def products_nearby(self, rng: random.Random) -> Request:
+        location = dataset.land_location(self.size, rng.randrange(self.size.farmers), 0)
+        return "GET", f"/api/products?lat={location['lat']}&lng={location['lng']}&radius=100&limit=20", None, None
+
+    def lands(self, rng: random.Random) -> Request:
+        farmer = rng.randrange(self.size.farmers)
+        return "GET", "/api/lands", None, farmer
+
+    def crop_schedules(self, rng: random.Random) -> Request:
+        farmer, land = self._land(rng)
+        return "GET", f"/api/crop-schedules/{dataset.land_id(farmer, land)}", None, farmer
+
+    def cultivation_cycles(self, rng: random.Random) -> Request:
+        farmer, land = self._land(rng)
+        return "GET", f"/api/cultivation-cycles/{dataset.land_id(farmer, land)}", None, farmer
+
+    def cycle_tasks(self, rng: random.Random) -> Request:
+        farmer, land = self._land(rng)
+        cycle = dataset.cycle_id(farmer, land, rng.randrange(self.size.cycles_per_land))
+        return "GET", f"/api/cultivation-cycles/{cycle}/tasks", None, farmer
+
+    def task_action(self, rng: random.Random) -> Request:
+        farmer, land = self._land(rng)
+        schedule = dataset.schedule_id(farmer, land)
+        task = dataset.task_id(schedule, rng.randrange(self.task_counts[dataset.crop_index(farmer, land)]))
+        body = {"task_id": task, "action": rng.choice(["done", "skip"])}
+        return "PUT", f"/api/crop-schedules/{schedule}/task-action", body, farmer
+
+    def land_details(self, rng: random.Random) -> Request:
+        farmer, land = self._land(rng)
+        return "GET", f"/api/land-details/{dataset.land_id(farmer, land)}", None, farmer
+
+    def weather(self, rng: random.Random) -> Request:
+        location = dataset.land_location(self.size, *self._land(rng))
+        return "GET", f"/api/weather/{location['lat']}/{location['lng']}", None, None
+
+    def ai_chat(self, rng: random.Random) -> Request:
+        farmer, land = self._land(rng)
+        body = {"message": "When should I irrigate next?", "land_id": dataset.land_id(farmer, land)}
+        return "POST", "/api/ai-chat", body, farmer
+
+
+ALL_SCENARIOS = [
+    "products", "products_nearby", "product_detail", "lands", "crop_schedules", "cultivation_cycles",
+    "cycle_tasks", "task_action", "land_details", "weather", "ai_chat",
+]
+# Need $geoNear or $lookup with a pipeline, which the in-memory stand-in lacks
+MONGO_ONLY_SCENARIOS = ["products_nearby", "cultivation_cycles"]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[max(0, rank - 1)]
+
+
+def make_token(farmer: int) -> str:
+    return jwt.encode({
+        "sub": dataset.farmer_id(farmer), "user_type": "farmer",
+        "exp": datetime.utcnow() + timedelta(hours=6),
+    }, os.environ.get("SECRET_KEY", BENCH_SECRET_KEY), algorithm="HS256")
+
+
+async def run_scenario(session: aiohttp.ClientSession, base_url: str, requests: List[Request], concurrency: int, tokens: Dict[int, str]) -> dict:
+    """Send requests with `concurrency` clients; returns latency stats in milliseconds"""
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(requests)
+
+    async def client():
+        nonlocal errors
+        for method, path, body, farmer in pending:
+            headers = {"Authorization": f"Bearer {tokens[farmer]}"} if farmer is not None else {}
+            started = time.perf_counter()
+            try:
+                async with session.request(method, base_url + path, json=body, headers=headers) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+async def run_all(args: argparse.Namespace, base_url: str) -> Dict[str, dict]:
+    scenarios = Scenarios(dataset_size(args))
+    tokens = {farmer: make_token(farmer) for farmer in range(args.farmers)}
+    results = {}
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        for name in args.scenarios:
+            rng = random.Random(f"{args.seed}-{name}")
+            generate: Callable[[random.Random], Request] = getattr(scenarios, name)
+            warmup = [generate(rng) for _ in range(args.warmup)]
+            measured = [generate(rng) for _ in range(args.requests)]
+            await run_scenario(session, base_url, warmup, args.concurrency, tokens)
+            results[name] = await run_scenario(session, base_url, measured, args.concurrency, tokens)
+            print(f"  {name:<20} {format_stats(results[name])}", flush=True)
+    return results
+
+
+def format_stats(stats: dict) -> str:
+    return (f"{stats['rps']:>8.1f} rps  p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  "
+            f"p99 {stats['p99_ms']:>8.2f} ms  errors {stats['errors']}")
+
+
+def compare(results: Dict[str, dict], baseline: dict, tolerance: float) -> List[str]:
+    """Print the change against the baseline; returns the scenarios that regressed"""
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['meta'].get('created_at', '?')}:")
+    for name, stats in results.items():
+        before = baseline["results"].get(name)
+        # Failed requests are cheap and would otherwise read as a speed-up
+        errors = f"  errors {stats['errors']}" if stats["errors"] else ""
+        if before is None:
+            if stats["errors"]:
+                regressions.append(name)
+            print(f"  {name:<20} (not in baseline){errors}{'  ❌ REGRESSION' if errors else ''}")
+            continue
+        if before.get("errors"):
+            errors += f" (baseline {before['errors']})"
+        p95_change = stats["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps_change = stats["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        regressed = stats["errors"] > 0 or p95_change > tolerance or rps_change < -tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<20} p95 {p95_change:+7.1%}  rps {rps_change:+7.1%}{errors}{'  ❌ REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def start_process(args: List[str], log_path: Path, env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable] + args, cwd=BACKEND_DIR, env=env,
+        stdout=open(log_path, "w"), stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_until_up(url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"{url} exited with status {process.returncode}; see its log")
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def start_stack(args: argparse.Namespace) -> Tuple[List[subprocess.Popen], str]:
+    """Start the fakes and the seeded app; returns the processes and the app URL"""
+    log_dir = Path(args.log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.llm_port}/v1",
+        "WEATHER_BASE_URL": f"http://127.0.0.1:{args.weather_port}/v1",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", BENCH_SECRET_KEY),
+        "DATABASE_NAME": os.environ.get("DATABASE_NAME", "agriverse_bench"),
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+    os.environ["SECRET_KEY"] = env["SECRET_KEY"]
+    processes = [
+        start_process(["fake_llm_server.py", "--port", str(args.llm_port), "--latency", str(args.llm_latency),
+                       "--token-delay", "0"], log_dir / "fake_llm.log", env),
+        start_process(["fake_weather_server.py", "--port", str(args.weather_port), "--latency", str(args.weather_latency)],
+                      log_dir / "fake_weather.log", env),
+        start_process(["-m", "benchmarks.app", "--db", args.db, "--port", str(args.port),
+                       "--farmers", str(args.farmers), "--lands-per-farmer", str(args.lands_per_farmer),
+                       "--cycles-per-land", str(args.cycles_per_land), "--products", str(args.products),
+                       "--seed", str(args.seed)], log_dir / "app.log", env),
+    ]
+    return processes, f"http://127.0.0.1:{args.port}"
+
+
+def stop_stack(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def main(args: argparse.Namespace) -> int:
+    processes: List[subprocess.Popen] = []
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+            await wait_until_up(base_url + "/", None, 10)
+        else:
+            processes, base_url = start_stack(args)
+            await wait_until_up(base_url + "/", processes[-1], args.startup_timeout)
+        print(f"Benchmarking {base_url} ({args.requests} requests per scenario, {args.concurrency} concurrent clients)")
+        results = await run_all(args, base_url)
+    finally:
+        stop_stack(processes)
+
+    meta = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "db": "external" if args.url else args.db,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "llm_latency": args.llm_latency,
+        "weather_latency": args.weather_latency,
+        "dataset": dataset_size(args).as_dict(),
+    }
+    report = {"meta": meta, "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\n✅ Saved baseline to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    differing = [key for key in ("db", "requests", "concurrency", "llm_latency", "weather_latency", "dataset")
+                 if baseline["meta"].get(key) != meta[key]]
+    if differing:
+        print(f"\n⚠️ Baseline was recorded with different settings ({', '.join(differing)}); the comparison is not like for like")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} scenario(s) had errors or regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the AgriVerse API against a stored baseline")
+    parser.add_argument("--db", choices=["mongo", "memory"], default="mongo")
+    parser.add_argument("--url", help="benchmark an already running app (seeded by benchmarks.app) instead of starting one")
+    parser.add_argument("--scenarios", nargs="+", choices=ALL_SCENARIOS, help="default: all (all but %s with --db memory)" % ", ".join(MONGO_ONLY_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario sent first")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds the fake LLM waits per completion")
+    parser.add_argument("--weather-latency", type=float, default=0.1, help="seconds the fake Open-Meteo waits per lookup")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--llm-port", type=int, default=8811)
+    parser.add_argument("--weather-port", type=int, default=8812)
+    parser.add_argument("--startup-timeout", type=float, default=120, help="seconds to wait for seeding and startup")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/RPS change before failing")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--log-dir", default=str(Path(tempfile.gettempdir()) / "agriverse-bench"), help="where the started processes log")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+    if args.scenarios is None:
+        args.scenarios = [name for name in ALL_SCENARIOS if args.db == "mongo" or name not in MONGO_ONLY_SCENARIOS]
+    sys.exit(asyncio.run(main(args)))
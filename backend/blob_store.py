@@ -0,0 +1,307 @@
+"""Content-addressed blob storage for uploaded images.
+
+Blobs are keyed by the SHA-256 of their bytes, so identical uploads are
+stored once. Documents keep only a small reference (see `store_image_base64`)
+and the bytes are served by `/api/blobs/{blob_id}`.
+
+Backends:
+    BLOB_STORE_BACKEND=local  files under BLOB_STORE_PATH (default ./blob_data)
+    BLOB_STORE_BACKEND=s3     any S3-compatible bucket (S3_BUCKET, S3_ENDPOINT_URL, S3_PREFIX)
+
+Run `python blob_store.py --migrate` once to move inline base64 images that
+were stored before this module existed out of MongoDB, and to add thumbnail
+and preview renditions to images stored before image_derivatives.py existed.
+"""
+import os
+import base64
+import asyncio
+import binascii
+import hashlib
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+
+from image_derivatives import process_image
+
+BLOB_STORE_BACKEND = os.environ.get("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.environ.get("BLOB_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "blob_data"))
+S3_BUCKET = os.environ.get("S3_BUCKET")
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL") or None
+S3_PREFIX = os.environ.get("S3_PREFIX", "blobs/")
+BLOB_CHUNK_SIZE = 64 * 1024
+
+
+class BlobStore(ABC):
+    """Interface implemented by the storage backends"""
+
+    @abstractmethod
+    async def put(self, blob_id: str, data: bytes):
+        ...
+
+    @abstractmethod
+    async def exists(self, blob_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def size(self, blob_id: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def iter_range(self, blob_id: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes start..end (inclusive) of a blob in chunks"""
+
+
+class LocalBlobStore(BlobStore):
+    """Filesystem backend; blobs live at <root>/<id[:2]>/<id[2:4]>/<id>"""
+
+    def __init__(self, root: str = BLOB_STORE_PATH):
+        self.root = root
+
+    def _path(self, blob_id: str) -> str:
+        return os.path.join(self.root, blob_id[:2], blob_id[2:4], blob_id)
+
+    def _write(self, blob_id: str, data: bytes):
+        path = self._path(blob_id)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def put(self, blob_id: str, data: bytes):
+        await asyncio.to_thread(self._write, blob_id, data)
+
+    async def exists(self, blob_id: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self._path(blob_id))
+
+    async def size(self, blob_id: str) -> Optional[int]:
+        try:
+            return await asyncio.to_thread(os.path.getsize, self._path(blob_id))
+        except OSError:
+            return None
+
+    async def iter_range(self, blob_id: str, start: int, end: int) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self._path(blob_id), "rb")
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await asyncio.to_thread(f.read, min(BLOB_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+
+class S3BlobStore(BlobStore):
+    """S3-compatible backend (AWS S3, MinIO, R2, ...) using boto3"""
+
+    def __init__(self, bucket: str = S3_BUCKET, endpoint_url: Optional[str] = S3_ENDPOINT_URL, prefix: str = S3_PREFIX):
+        import boto3
+
+        if not bucket:
+            raise ValueError("S3_BUCKET environment variable is not set")
+        self.bucket = bucket
+        self.prefix = prefix
+        self._s3 = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def _key(self, blob_id: str) -> str:
+        return f"{self.prefix}{blob_id}"
+
+    async def put(self, blob_id: str, data: bytes):
+        if await self.exists(blob_id):
+            return
+        await asyncio.to_thread(self._s3.put_object, Bucket=self.bucket, Key=self._key(blob_id), Body=data)
+
+    async def size(self, blob_id: str) -> Optional[int]:
+        try:
+            head = await asyncio.to_thread(self._s3.head_object, Bucket=self.bucket, Key=self._key(blob_id))
+        except self._s3.exceptions.ClientError:
+            return None
+        return head["ContentLength"]
+
+    async def exists(self, blob_id: str) -> bool:
+        return await self.size(blob_id) is not None
+
+    async def iter_range(self, blob_id: str, start: int, end: int) -> AsyncIterator[bytes]:
+        response = await asyncio.to_thread(
+            self._s3.get_object, Bucket=self.bucket, Key=self._key(blob_id), Range=f"bytes={start}-{end}"
+        )
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await asyncio.to_thread(body.read, BLOB_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+
+def get_blob_store() -> BlobStore:
+    if BLOB_STORE_BACKEND == "s3":
+        return S3BlobStore()
+    return LocalBlobStore()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def decode_base64_image(image_base64: str) -> bytes:
+    """Decode a base64 upload, accepting an optional data: URI prefix"""
+    if image_base64.startswith("data:") and "," in image_base64:
+        image_base64 = image_base64.split(",", 1)[1]
+    return base64.b64decode(image_base64)
+
+
+def blob_url(blob_id: str) -> str:
+    return f"/api/blobs/{blob_id}"
+
+
+async def store_blob(data: bytes, blobs_collection, content_type: str, width: Optional[int] = None, height: Optional[int] = None) -> dict:
+    """Store bytes once (deduplicated by hash) and return the reference kept on documents"""
+    blob_id = content_hash(data)
+    await blob_store.put(blob_id, data)
+    ref = {
+        "blob_id": blob_id,
+        "url": blob_url(blob_id),
+        "content_type": content_type,
+        "size": len(data),
+        "width": width,
+        "height": height,
+    }
+    await blobs_collection.update_one(
+        {"id": blob_id},
+        {"$setOnInsert": {
+            "id": blob_id,
+            "content_type": content_type,
+            "size": len(data),
+            "width": width,
+            "height": height,
+            "created_at": datetime.utcnow()
+        }},
+        upsert=True
+    )
+    return ref
+
+
+async def store_image_base64(image_base64: str, blobs_collection) -> dict:
+    """Decode a base64 image upload, store it with its renditions and return its reference.
+
+    The reference describes the original and carries one nested reference per
+    rendition (thumbnail, preview), each stored as its own blob. Raises a 400
+    for anything that is not valid base64 or not an image.
+    """
+    try:
+        data = decode_base64_image(image_base64)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid image")
+    return await store_image(data, blobs_collection, images_only=True)
+
+
+async def store_image(data: bytes, blobs_collection, images_only: bool = False) -> dict:
+    processed = await process_image(data)
+    if images_only and processed["width"] is None:
+        raise HTTPException(status_code=400, detail="Invalid image")
+    renditions = processed["renditions"]
+    ref, *rendition_refs = await asyncio.gather(
+        store_blob(data, blobs_collection, processed["content_type"], processed["width"], processed["height"]),
+        *(
+            store_blob(rendition["data"], blobs_collection, rendition["content_type"], rendition["width"], rendition["height"])
+            for rendition in renditions.values()
+        )
+    )
+    ref.update(zip(renditions.keys(), rendition_refs))
+    return ref
+
+
+async def read_blob(blob_id: str) -> Optional[bytes]:
+    size = await blob_store.size(blob_id)
+    if size is None:
+        return None
+    return b"".join([chunk async for chunk in blob_store.iter_range(blob_id, 0, size - 1)])
+
+
+# Shared blob store instance
+blob_store = get_blob_store()
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from pymongo import AsyncMongoClient
+
+    load_dotenv()
+
+    async def add_renditions(ref: dict, blobs_collection) -> Optional[dict]:
+        """Rebuild a reference stored without renditions; None if nothing changed"""
+        if not ref or "thumbnail" in ref:
+            return None
+        data = await read_blob(ref["blob_id"])
+        if data is None:
+            return None
+        return await store_image(data, blobs_collection)
+
+    async def migrate():
+        """Move inline image_base64 payloads into the blob store and add missing renditions"""
+        client = AsyncMongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+        db = client[os.environ.get("DATABASE_NAME", "agriverse")]
+
+        for collection in (db.disease_reports, db.products):
+            moved = 0
+            async for doc in collection.find({"image_base64": {"$nin": [None, ""]}}, {"_id": 1, "image_base64": 1}):
+                try:
+                    ref = await store_image_base64(doc["image_base64"], db.blobs)
+                except HTTPException:
+                    print(f"⚠️ {collection.name} {doc['_id']}: not a valid image, left inline")
+                    continue
+                await collection.update_one({"_id": doc["_id"]}, {"$set": {"image": ref, "image_base64": None}})
+                moved += 1
+            print(f"✅ {collection.name}: moved {moved} images")
+
+            updated = 0
+            async for doc in collection.find({"image.blob_id": {"$exists": True}, "image.thumbnail": {"$exists": False}}, {"_id": 1, "image": 1}):
+                ref = await add_renditions(doc["image"], db.blobs)
+                if ref:
+                    await collection.update_one({"_id": doc["_id"]}, {"$set": {"image": ref}})
+                    updated += 1
+            print(f"✅ {collection.name}: added renditions to {updated} images")
+
+        moved = 0
+        photos_query = {"$or": [
+            {"photos.image_base64": {"$exists": True}},
+            {"photos": {"$elemMatch": {"image.blob_id": {"$exists": True}, "image.thumbnail": {"$exists": False}}}}
+        ]}
+        async for doc in db.growth_data.find(photos_query, {"_id": 1, "photos": 1}):
+            photos = []
+            for photo in doc.get("photos", []):
+                if photo.get("image_base64"):
+                    try:
+                        photo = {**photo, "image": await store_image_base64(photo["image_base64"], db.blobs)}
+                    except HTTPException:
+                        print(f"⚠️ growth_data {doc['_id']}: photo {photo.get('id')} is not a valid image, left inline")
+                    else:
+                        photo.pop("image_base64")
+                        moved += 1
+                else:
+                    ref = await add_renditions(photo.get("image"), db.blobs)
+                    if ref:
+                        photo = {**photo, "image": ref}
+                        moved += 1
+                photos.append(photo)
+            await db.growth_data.update_one({"_id": doc["_id"]}, {"$set": {"photos": photos}})
+        print(f"✅ growth_data: updated {moved} photos")
+        await client.close()
+
+    if "--migrate" in sys.argv:
+        asyncio.run(migrate())
+    else:
+        print(__doc__)
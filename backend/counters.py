@@ -0,0 +1,43 @@
+"""Atomic sequences (cycle versions and the like) in the `counters` collection.
+
+Each sequence is one document `{"_id": <name>, "value": <last issued>}`;
+next_value hands out the following number with a single
+find_one_and_update/$inc, so concurrent callers always get distinct,
+increasing values.
+
+A sequence that replaces an older scheme (e.g. versions computed from the
+highest existing document) passes `start`, which returns the last value
+issued so far. It is only called the first time the sequence is used.
+"""
+from typing import Awaitable, Callable, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+async def next_value(collection, name: str, start: Optional[Callable[[], Awaitable[int]]] = None) -> int:
+    """Increment sequence `name` and return its new value (the first value is start() + 1, or 1)"""
+    counter = await collection.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"value": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if counter is not None:
+        return counter["value"]
+
+    # First use: create the counter at the last value issued before it existed
+    try:
+        await collection.insert_one({"_id": name, "value": await start() if start else 0})
+    except DuplicateKeyError:
+        pass  # a concurrent caller created it first
+    counter = await collection.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"value": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    return counter["value"]
+
+
+def cycle_version_sequence(land_id: str, crop_name: str) -> str:
+    """Sequence of cultivation cycle versions for one crop on one land"""
+    return f"cycle_version:{land_id}:{crop_name}"
@@ -0,0 +1,213 @@
+"""Declarative MongoDB index registry and collection-scan report.
+
+INDEXES lists, per collection, the indexes that back the query shapes used by
+server.py. `ensure_indexes` creates them at startup (creation is idempotent),
+and `collscan_report` explains each entry in QUERY_SHAPES and lists the ones
+whose winning plan still contains a COLLSCAN stage:
+
+    python db_indexes.py            # create indexes, then print the report
+    python db_indexes.py --report   # only print the report
+"""
+import os
+import asyncio
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "lands": [
+        IndexModel([("id", ASCENDING), ("farmer_id", ASCENDING)]),
+        IndexModel([("farmer_id", ASCENDING)]),
+        # find_nearest_land ($geoNear within one farmer's lands)
+        IndexModel([("farmer_id", ASCENDING), ("geo", GEOSPHERE)]),
+    ],
+    "products": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("farmer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("available", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        # get_products near lat/lng ($geoNear)
+        IndexModel([("geo", GEOSPHERE), ("available", ASCENDING)]),
+    ],
+    "disease_reports": [
+        IndexModel([("farmer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("land_id", ASCENDING), ("farmer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "plant_plans": [
+        IndexModel([("farmer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("land_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "crop_schedules": [
+        IndexModel([("id", ASCENDING)]),
+        # save_schedule / check_existing_schedule / create_cultivation_cycle upsert
+        IndexModel([("land_id", ASCENDING), ("farmer_id", ASCENDING), ("crop_name", ASCENDING), ("created_at", DESCENDING)]),
+        # analyze_growth_photo looks up the active schedule of a land
+        IndexModel([("land_id", ASCENDING), ("active", ASCENDING)]),
+        # get_crop_schedules pages
+        IndexModel([("land_id", ASCENDING), ("farmer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("farmer_id", ASCENDING)]),
+        # save_schedule idempotency check
+        IndexModel([("request_id", ASCENDING)], sparse=True),
+    ],
+    "alerts": [
+        IndexModel([("farmer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("id", ASCENDING), ("farmer_id", ASCENDING)]),
+    ],
+    "crop_planning_history": [
+        IndexModel([("land_id", ASCENDING), ("farmer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "cultivation_cycles": [
+        IndexModel([("id", ASCENDING), ("farmer_id", ASCENDING)]),
+        IndexModel([("land_id", ASCENDING), ("farmer_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("land_id", ASCENDING), ("crop_name", ASCENDING), ("farmer_id", ASCENDING), ("cycle_version", DESCENDING)]),
+    ],
+    "cycle_tasks": [
+        IndexModel([("cycle_id", ASCENDING), ("day", ASCENDING)]),
+        IndexModel([("cycle_id", ASCENDING), ("completed", ASCENDING)]),
+        IndexModel([("id", ASCENDING), ("cycle_id", ASCENDING)]),
+    ],
+    "growth_data": [
+        IndexModel([("schedule_id", ASCENDING)]),
+    ],
+    "blobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "schedule_templates": [
+        IndexModel([("crop", ASCENDING), ("soil_type", ASCENDING), ("climate_band", ASCENDING), ("version", DESCENDING)], unique=True),
+    ],
+    "ai_suggestion_cache": [
+        # Entries are looked up by _id; MongoDB deletes them once expires_at passes
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "jobs": [
+        IndexModel([("id", ASCENDING), ("owner_id", ASCENDING)], unique=True),
+        # Worker claims: due queued jobs, and running jobs whose lease ran out
+        IndexModel([("type", ASCENDING), ("status", ASCENDING), ("run_after", ASCENDING)]),
+        IndexModel([("type", ASCENDING), ("status", ASCENDING), ("locked_until", ASCENDING)]),
+        IndexModel(
+            [("owner_id", ASCENDING), ("type", ASCENDING), ("idempotency_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$type": "string"}},
+        ),
+        # Finished jobs are deleted once their retention period is over
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+# (name, collection, filter, sort) for the queries issued by the API routes
+QUERY_SHAPES: List[Tuple[str, str, Dict[str, Any], List[Tuple[str, int]]]] = [
+    ("get_current_user", "users", {"id": "x"}, []),
+    ("login", "users", {"email": "x"}, []),
+    ("get_lands", "lands", {"farmer_id": "x"}, []),
+    ("land ownership", "lands", {"id": "x", "farmer_id": "x"}, []),
+    ("find_nearest_land", "lands", {"farmer_id": "x", "geo": {"$nearSphere": {"$geometry": {"type": "Point", "coordinates": [0, 0]}}}}, []),
+    ("get_my_products", "products", {"farmer_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("get_products", "products", {"available": True}, [("created_at", -1), ("id", -1)]),
+    ("get_products near", "products", {"geo": {"$nearSphere": {"$geometry": {"type": "Point", "coordinates": [0, 0]}}}, "available": True}, []),
+    ("get_product", "products", {"id": "x"}, []),
+    ("get_disease_reports", "disease_reports", {"farmer_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("get_disease_reports land", "disease_reports", {"farmer_id": "x", "land_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("get_land_details disease reports", "disease_reports", {"land_id": "x"}, []),
+    ("get_plant_plans", "plant_plans", {"farmer_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("get_land_details plant plans", "plant_plans", {"land_id": "x"}, []),
+    ("get_crop_schedules", "crop_schedules", {"land_id": "x", "farmer_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("save_schedule", "crop_schedules", {"land_id": "x", "farmer_id": "x", "crop_name": "x"}, [("created_at", -1)]),
+    ("save_schedule request_id", "crop_schedules", {"request_id": "x"}, []),
+    ("schedule ownership", "crop_schedules", {"id": "x", "farmer_id": "x"}, []),
+    ("analyze_growth_photo", "crop_schedules", {"land_id": "x", "farmer_id": "x", "active": True}, []),
+    ("get_alerts", "alerts", {"farmer_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("get_crop_planning_history", "crop_planning_history", {"land_id": "x", "farmer_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("get_cultivation_cycles", "cultivation_cycles", {"land_id": "x", "farmer_id": "x"}, [("created_at", -1), ("id", -1)]),
+    ("cycle ownership", "cultivation_cycles", {"id": "x", "farmer_id": "x"}, []),
+    ("cycle version counter start", "cultivation_cycles", {"land_id": "x", "crop_name": "x", "farmer_id": "x"}, [("cycle_version", -1)]),
+    ("get_cycle_tasks", "cycle_tasks", {"cycle_id": "x", "farmer_id": "x"}, [("day", 1)]),
+    ("cycle task counts", "cycle_tasks", {"cycle_id": "x", "completed": True}, []),
+    ("update_cycle_task", "cycle_tasks", {"id": "x", "cycle_id": "x", "farmer_id": "x"}, []),
+    ("bulk cycle task actions", "cycle_tasks", {"id": {"$in": ["x"]}, "farmer_id": "x"}, []),
+    ("get_growth_data", "growth_data", {"schedule_id": "x", "farmer_id": "x"}, []),
+    ("get_blob", "blobs", {"id": "x"}, []),
+    ("schedule template", "schedule_templates", {"crop": "x", "soil_type": "x", "climate_band": "x"}, [("version", -1)]),
+    ("get_job", "jobs", {"id": "x", "owner_id": "x"}, []),
+    ("job idempotency key", "jobs", {"owner_id": "x", "type": "x", "idempotency_key": "x"}, []),
+    ("job claim", "jobs", {"type": "x", "$or": [{"status": "queued", "run_after": {"$lte": 0}}, {"status": "running", "locked_until": {"$lte": 0}}]}, [("run_after", 1)]),
+]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create every registered index; returns the index names per collection.
+
+    A failure on one collection (e.g. duplicate data blocking a unique index)
+    is reported and does not stop the others.
+    """
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        try:
+            created[collection_name] = await db[collection_name].create_indexes(indexes)
+        except Exception as e:
+            logger.error("❌ Failed to create indexes on %s: %s", collection_name, e)
+    return created
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Collect every stage name in an explain plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def collscan_report(db) -> List[Dict[str, Any]]:
+    """Explain every registered query shape and return those that still scan the collection"""
+    scans = []
+    for name, collection_name, query_filter, sort in QUERY_SHAPES:
+        command = {"find": collection_name, "filter": query_filter}
+        if sort:
+            command["sort"] = dict(sort)
+        explain = await db.command("explain", command, verbosity="queryPlanner")
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = _plan_stages(winning_plan)
+        if "COLLSCAN" in stages:
+            scans.append({
+                "query": name,
+                "collection": collection_name,
+                "filter": query_filter,
+                "sort": sort,
+                "stages": stages,
+            })
+    return scans
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from pymongo import AsyncMongoClient
+
+    load_dotenv()
+
+    async def main():
+        client = AsyncMongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+        db = client[os.environ.get("DATABASE_NAME", "agriverse")]
+        if "--report" not in sys.argv:
+            for collection_name, names in (await ensure_indexes(db)).items():
+                print(f"✅ {collection_name}: {', '.join(names)}")
+        scans = await collscan_report(db)
+        if not scans:
+            print(f"✅ All {len(QUERY_SHAPES)} registered queries use an index")
+        for scan in scans:
+            print(f"⚠️ COLLSCAN: {scan['query']} on {scan['collection']} filter={scan['filter']} sort={scan['sort']}")
+        await client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""Local fake of the OpenAI chat completions API for offline testing.
+
+Serves `POST /v1/chat/completions` with a configurable artificial latency so
+the async LLM gateway (and the event-loop latency it protects) can be
+exercised without network access or an API key:
+
+    python fake_llm_server.py --port 8011 --latency 3.0
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=fake uvicorn server:app --port 8001
+
+While a batch of slow `/api/ai-chat` requests is in flight, `GET /` on the API
+should keep answering in milliseconds.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import List, Dict
+
+from aiohttp import web
+
+FAKE_CROPS = [
+    {"name": name, "duration": "100 days", "water_requirement": "Medium",
+     "benefits": "Fake crop for offline testing", "planting_time": "Early season",
+     "yield_potential": "Medium"}
+    for name in ["Wheat", "Corn", "Soybeans", "Potatoes", "Tomatoes", "Peas", "Lettuce", "Spinach"]
+]
+
+FAKE_SCHEDULE = [
+    {"day": day, "phase": phase, "task": task, "description": f"{task} (fake)", "priority": "High"}
+    for day, phase, task in [
+        (1, "Preparation", "Soil Testing"), (7, "Preparation", "Land Preparation"),
+        (10, "Planting", "Sowing"), (20, "Growth", "Fertilization"),
+        (60, "Maintenance", "Irrigation"), (110, "Harvest", "Harvesting"),
+    ]
+]
+
+
+def build_reply(messages: List[Dict[str, str]]) -> str:
+    """Pick a canned reply shaped like what the calling endpoint parses"""
+    prompt = "\n".join(message.get("content", "") for message in messages)
+    if "suggest exactly 8 best crops" in prompt:
+        return json.dumps(FAKE_CROPS)
+    if "day-by-day farming schedule" in prompt:
+        return json.dumps(FAKE_SCHEDULE)
+    if "JSON" in prompt:
+        return json.dumps({"recommendations": [], "current_state_analysis": "Fake analysis"})
+    return "This is a fake response from the local LLM server."
+
+
+def usage(body: dict, reply: str) -> dict:
+    """Rough token counts (words) so usage metrics have something to show"""
+    prompt_tokens = len(str(body.get("messages", "")).split())
+    completion_tokens = len(reply.split())
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+def make_app(latency: float, token_delay: float) -> web.Application:
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        reply = build_reply(body.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake-model")
+
+        await asyncio.sleep(latency)
+
+        if body.get("stream"):
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for word in reply.split(" "):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+                }
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                await asyncio.sleep(token_delay)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [], "usage": usage(body, reply),
+                }
+                await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+            return response
+
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": usage(body, reply),
+        })
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=2.0, help="seconds to wait before answering")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed tokens")
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency, args.token_delay), host=args.host, port=args.port)
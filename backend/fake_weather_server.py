@@ -0,0 +1,45 @@
+"""Local fake of the Open-Meteo forecast API for offline testing.
+
+Serves `GET /v1/forecast` with current conditions derived from the requested
+coordinates (so different grid cells get different weather) after a
+configurable artificial latency:
+
+    python fake_weather_server.py --port 8012 --latency 0.2
+    WEATHER_BASE_URL=http://127.0.0.1:8012/v1 uvicorn server:app --port 8001
+"""
+import argparse
+import asyncio
+
+from aiohttp import web
+
+
+def make_app(latency: float) -> web.Application:
+    async def forecast(request: web.Request) -> web.Response:
+        lat = float(request.query.get("latitude", 0))
+        lng = float(request.query.get("longitude", 0))
+        await asyncio.sleep(latency)
+        return web.json_response({
+            "latitude": lat,
+            "longitude": lng,
+            "current": {
+                "temperature_2m": round(15 + (abs(lat) * 7 + abs(lng) * 3) % 20, 1),
+                "relative_humidity_2m": int(40 + (abs(lat) * 11 + abs(lng) * 5) % 50),
+                "pressure_msl": 1013.2,
+                "wind_speed_10m": round((abs(lat) + abs(lng)) % 15, 1),
+                "wind_direction_10m": int((abs(lat) * 37 + abs(lng) * 17) % 360),
+                "weather_code": 1,
+            },
+        })
+
+    app = web.Application()
+    app.router.add_get("/v1/forecast", forecast)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Open-Meteo forecast server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8012)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to wait before answering")
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency), host=args.host, port=args.port)
@@ -0,0 +1,118 @@
+"""GeoJSON helpers for location queries.
+
+Documents keep their `location` as {"lat", "lng"} for the API and mirror it in
+a GeoJSON `geo` point, which is what the 2dsphere indexes in db_indexes.py
+cover. Distances are great-circle metres as computed by MongoDB.
+
+    python geo.py --backfill   # add `geo` to products and lands stored before it existed
+"""
+import os
+import json
+import asyncio
+import base64
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+
+def geo_point(location: Optional[Dict[str, float]]) -> Optional[Dict[str, Any]]:
+    """GeoJSON point for a {"lat", "lng"} location, or None if it is not a valid coordinate"""
+    if not location:
+        return None
+    lat, lng = location.get("lat"), location.get("lng")
+    if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def encode_distance_cursor(items: List[dict], previous: Optional[str] = None) -> str:
+    """Cursor after the last item of a distance-sorted page.
+
+    Stores the last distance and the ids returned at exactly that distance, so
+    the next page can resume at that distance without repeating them. When a
+    run of equal distances spans several pages, the ids from the earlier pages
+    (carried by the previous cursor) are kept too.
+    """
+    last_distance = items[-1]["distance_m"]
+    ids = [item["id"] for item in items if item["distance_m"] == last_distance]
+    if previous:
+        before = decode_distance_cursor(previous)
+        if before["distance"] == last_distance:
+            ids = before["ids"] + ids
+    raw = json.dumps({"d": last_distance, "ids": ids}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_distance_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return {"distance": float(key["d"]), "ids": list(key["ids"])}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def geo_near_stage(lat: float, lng: float, max_distance_m: float, query: dict, cursor: Optional[str] = None) -> dict:
+    """$geoNear stage for documents within max_distance_m of (lat, lng), nearest first.
+
+    The computed distance is returned in `distance_m`. With a cursor the stage
+    resumes at the last distance of the previous page.
+    """
+    stage = {
+        "near": {"type": "Point", "coordinates": [lng, lat]},
+        "distanceField": "distance_m",
+        "key": "geo",
+        "maxDistance": max_distance_m,
+        "query": query,
+        "spherical": True,
+    }
+    if cursor:
+        after = decode_distance_cursor(cursor)
+        stage["minDistance"] = after["distance"]
+        stage["query"] = {**query, "id": {"$nin": after["ids"]}}
+    return {"$geoNear": stage}
+
+
+async def find_nearest(collection, lat: float, lng: float, max_distance_m: float, query: dict) -> Optional[dict]:
+    """Closest document matching query within max_distance_m of (lat, lng), with its distance_m"""
+    if geo_point({"lat": lat, "lng": lng}) is None:
+        return None
+    cursor = await collection.aggregate([
+        geo_near_stage(lat, lng, max_distance_m, query),
+        {"$limit": 1},
+        {"$project": {"_id": 0}}
+    ])
+    nearest = await cursor.to_list(1)
+    return nearest[0] if nearest else None
+
+
+async def backfill_geo(collection) -> int:
+    """Add `geo` to documents that only have a lat/lng `location`"""
+    updated = 0
+    async for doc in collection.find({"geo": {"$exists": False}, "location": {"$type": "object"}}, {"_id": 1, "location": 1}):
+        point = geo_point(doc["location"])
+        if point:
+            await collection.update_one({"_id": doc["_id"]}, {"$set": {"geo": point}})
+            updated += 1
+    return updated
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from pymongo import AsyncMongoClient
+
+    load_dotenv()
+
+    async def main():
+        client = AsyncMongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+        db = client[os.environ.get("DATABASE_NAME", "agriverse")]
+        for collection in (db.products, db.lands):
+            print(f"✅ {collection.name}: added geo to {await backfill_geo(collection)} documents")
+        await client.close()
+
+    if "--backfill" in sys.argv:
+        asyncio.run(main())
+    else:
+        print(__doc__)
@@ -0,0 +1,98 @@
+"""Thumbnail and preview renditions for uploaded images.
+
+Each upload is decoded once in a worker process and resized into every
+rendition in RENDITIONS. Decoding and resampling are CPU bound, so they run in
+a process pool instead of on the event loop.
+
+Tune with:
+    IMAGE_DERIVATIVE_FORMAT   JPEG (default) or WEBP
+    IMAGE_THUMBNAIL_MAX_PX    longest side of list thumbnails (default 320)
+    IMAGE_PREVIEW_MAX_PX      longest side of detail previews (default 1280)
+    IMAGE_PROCESS_WORKERS     size of the process pool (default min(4, CPUs))
+"""
+import os
+import io
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+IMAGE_DERIVATIVE_FORMAT = os.environ.get("IMAGE_DERIVATIVE_FORMAT", "JPEG").upper()
+IMAGE_THUMBNAIL_MAX_PX = int(os.environ.get("IMAGE_THUMBNAIL_MAX_PX", 320))
+IMAGE_PREVIEW_MAX_PX = int(os.environ.get("IMAGE_PREVIEW_MAX_PX", 1280))
+IMAGE_PROCESS_WORKERS = int(os.environ.get("IMAGE_PROCESS_WORKERS", min(4, os.cpu_count() or 1)))
+
+# name -> (longest side in pixels, encoder quality)
+RENDITIONS = {
+    "thumbnail": (IMAGE_THUMBNAIL_MAX_PX, 75),
+    "preview": (IMAGE_PREVIEW_MAX_PX, 85),
+}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def render_derivatives(data: bytes, image_format: str = IMAGE_DERIVATIVE_FORMAT) -> Dict:
+    """Decode an image once and encode every rendition (runs in a worker process).
+
+    Returns the original's content type and dimensions plus, per rendition,
+    the encoded bytes and their dimensions. Renditions are never upscaled;
+    non-images come back with no renditions.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            content_type = Image.MIME.get(image.format, "application/octet-stream")
+            # Camera photos are often stored sideways with an EXIF orientation tag
+            image = ImageOps.exif_transpose(image)
+            info = {"content_type": content_type, "width": image.width, "height": image.height}
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+
+            renditions = {}
+            for name, (max_px, quality) in RENDITIONS.items():
+                rendition = image.copy()
+                rendition.thumbnail((max_px, max_px), Image.LANCZOS)
+                buf = io.BytesIO()
+                rendition.save(buf, format=image_format, quality=quality, optimize=True)
+                renditions[name] = {
+                    "data": buf.getvalue(),
+                    "content_type": Image.MIME.get(image_format, "image/jpeg"),
+                    "width": rendition.width,
+                    "height": rendition.height,
+                }
+            return {**info, "renditions": renditions}
+    except Exception:
+        return {"content_type": "application/octet-stream", "width": None, "height": None, "renditions": {}}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_PROCESS_WORKERS)
+    return _executor
+
+
+async def process_image(data: bytes) -> Dict:
+    """Render all derivatives of an upload off the event loop"""
+    global _executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executor(), render_derivatives, data)
+    except BrokenProcessPool as e:
+        # A worker died (e.g. OOM on a huge upload); start a fresh pool next time
+        logger.warning("⚠️ Image process pool broken, rendering in a thread: %s", e)
+        _executor = None
+        return await asyncio.to_thread(render_derivatives, data)
+
+
+def shutdown_image_pool():
+    """Stop the worker processes (called on app shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
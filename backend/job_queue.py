@@ -0,0 +1,244 @@
+"""Background jobs for long-running AI work, persisted in MongoDB.
+
+A route submits a job and returns its id right away; workers in the API process
+run it and store the result on the job document, where clients poll
+(GET /api/jobs/{id}) or subscribe (GET /api/jobs/{id}/events) for it. Because
+state lives in the `jobs` collection, a result survives the client's
+connection dropping, and a job a crashed worker was running is picked up again
+once its lease runs out.
+
+Each job type has its own concurrency cap (JOB_CONCURRENCY_<TYPE>, e.g.
+JOB_CONCURRENCY_AI_FARM_ANALYSIS=4). A failed attempt is retried with
+exponential backoff up to JOB_MAX_ATTEMPTS times; HTTPExceptions with a 4xx
+status are not retried. Submitting again with the same idempotency key returns
+the existing job instead of creating a new one.
+
+Job states: queued -> running -> succeeded | failed
+"""
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_BACKOFF_SECONDS = float(os.environ.get("JOB_BACKOFF_SECONDS", 5))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", 300))
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", 2))
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", 7 * 24 * 3600))
+
+FINISHED = ("succeeded", "failed")
+
+# Handlers get the job payload and the submitting user, and return the result document
+Handler = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]]
+
+
+def public_job(job: dict) -> dict:
+    """Job fields returned to clients"""
+    return {field: job.get(field) for field in (
+        "id", "type", "status", "result", "error", "attempts", "max_attempts", "created_at", "updated_at", "finished_at"
+    )}
+
+
+class JobQueue:
+    def __init__(self):
+        self._handlers: Dict[str, Dict[str, Any]] = {}
+        self._collection = None
+        self._workers: List[asyncio.Task] = []
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, List[asyncio.Event]] = {}
+
+    def register(self, job_type: str, handler: Handler, concurrency: int = 2, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self._handlers[job_type] = {
+            "handler": handler,
+            "concurrency": int(os.environ.get(f"JOB_CONCURRENCY_{job_type.upper()}", concurrency)),
+            "max_attempts": max_attempts,
+        }
+
+    def start(self, collection):
+        """Start the workers for every registered job type (call once on startup)"""
+        self._collection = collection
+        for job_type, spec in self._handlers.items():
+            self._wakeups[job_type] = asyncio.Event()
+            for _ in range(spec["concurrency"]):
+                self._workers.append(asyncio.create_task(self._worker(job_type)))
+        logger.info("✅ Started %s job workers for %s", len(self._workers), ', '.join(self._handlers))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, job_type: str, payload: Dict[str, Any], owner: Dict[str, Any], idempotency_key: Optional[str] = None) -> dict:
+        """Queue a job, or return the owner's existing job with the same idempotency key"""
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        if idempotency_key:
+            existing = await self._find_by_key(job_type, owner["id"], idempotency_key)
+            if existing:
+                return existing
+
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "owner_id": owner["id"],
+            "owner": {"id": owner["id"], "user_type": owner.get("user_type")},
+            "payload": payload,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "max_attempts": self._handlers[job_type]["max_attempts"],
+            "run_after": now,
+            "locked_until": None,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+        }
+        if idempotency_key:
+            job["idempotency_key"] = idempotency_key
+        try:
+            await self._collection.insert_one(job)
+        except DuplicateKeyError:
+            # A concurrent submit with the same key won
+            return await self._find_by_key(job_type, owner["id"], idempotency_key)
+        job.pop("_id", None)
+        self._wakeups[job_type].set()
+        return job
+
+    async def get(self, job_id: str, owner_id: str) -> Optional[dict]:
+        return await self._collection.find_one({"id": job_id, "owner_id": owner_id}, {"_id": 0})
+
+    async def wait(self, job_id: str, owner_id: str, timeout: float) -> Optional[dict]:
+        """Return the job once it changes state or timeout passes, whichever is first"""
+        job = await self.get(job_id, owner_id)
+        if job is None or job["status"] in FINISHED:
+            return job
+        event = asyncio.Event()
+        self._waiters.setdefault(job_id, []).append(event)
+        try:
+            # Jobs run by another worker process only show up by polling
+            await asyncio.wait_for(event.wait(), timeout=min(timeout, JOB_POLL_SECONDS))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self._waiters.get(job_id, [])
+            if event in waiters:
+                waiters.remove(event)
+            if not waiters:
+                self._waiters.pop(job_id, None)
+        return await self.get(job_id, owner_id)
+
+    async def _find_by_key(self, job_type: str, owner_id: str, idempotency_key: str) -> Optional[dict]:
+        return await self._collection.find_one(
+            {"owner_id": owner_id, "type": job_type, "idempotency_key": idempotency_key}, {"_id": 0}
+        )
+
+    async def _worker(self, job_type: str):
+        wakeup = self._wakeups[job_type]
+        while True:
+            try:
+                job = await self._claim(job_type)
+                if job is None:
+                    wakeup.clear()
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout=JOB_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Job worker for %s failed: %s", job_type, e)
+                await asyncio.sleep(JOB_POLL_SECONDS)
+
+    async def _claim(self, job_type: str) -> Optional[dict]:
+        """Take the next due job, or one whose worker's lease ran out"""
+        now = datetime.utcnow()
+        return await self._collection.find_one_and_update(
+            {"type": job_type, "$or": [
+                {"status": "queued", "run_after": {"$lte": now}},
+                {"status": "running", "locked_until": {"$lte": now}},
+            ]},
+            {"$set": {
+                "status": "running",
+                "locked_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "updated_at": now,
+            }, "$inc": {"attempts": 1}},
+            sort=[("run_after", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _run(self, job: dict):
+        self._notify(job["id"])
+        if job["attempts"] > job["max_attempts"]:
+            # Reclaimed after its last attempt's worker died
+            await self._finish(job, {"status": "failed", "error": job.get("error") or "Job did not complete"})
+            self._notify(job["id"])
+            return
+        handler = self._handlers[job["type"]]["handler"]
+        try:
+            result = await asyncio.wait_for(handler(job["payload"], job["owner"]), timeout=JOB_LEASE_SECONDS)
+            if hasattr(result, "model_dump"):
+                result = result.model_dump()
+            if await self._finish(job, {"status": "succeeded", "result": result, "error": None}):
+                logger.info("✅ Job %s %s succeeded (attempt %s)", job['type'], job['id'], job['attempts'])
+        except Exception as e:
+            error = e.detail if isinstance(e, HTTPException) else str(e) or type(e).__name__
+            permanent = isinstance(e, HTTPException) and e.status_code < 500
+            if permanent or job["attempts"] >= job["max_attempts"]:
+                await self._finish(job, {"status": "failed", "error": error})
+                logger.error("❌ Job %s %s failed: %s", job['type'], job['id'], error)
+            else:
+                delay = JOB_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+                now = datetime.utcnow()
+                await self._collection.update_one(self._lease_filter(job), {"$set": {
+                    "status": "queued",
+                    "error": error,
+                    "run_after": now + timedelta(seconds=delay),
+                    "locked_until": None,
+                    "updated_at": now,
+                }})
+                logger.warning("⚠️ Job %s %s attempt %s failed, retrying in %.0fs: %s", job['type'], job['id'], job['attempts'], delay, error)
+        self._notify(job["id"])
+
+    @staticmethod
+    def _lease_filter(job: dict) -> dict:
+        """Matches the job only while this attempt still holds it; once the lease
+        runs out and another worker reclaims it, attempts has moved on"""
+        return {"id": job["id"], "status": "running", "attempts": job["attempts"]}
+
+    async def _finish(self, job: dict, fields: dict) -> bool:
+        now = datetime.utcnow()
+        result = await self._collection.update_one(self._lease_filter(job), {"$set": {
+            **fields,
+            "locked_until": None,
+            "updated_at": now,
+            "finished_at": now,
+            # Removed by the TTL index once retention is over
+            "expires_at": now + timedelta(seconds=JOB_RETENTION_SECONDS),
+        }})
+        if not result.matched_count:
+            logger.warning("⚠️ Job %s %s attempt %s lost its lease; result discarded", job['type'], job['id'], job['attempts'])
+            return False
+        return True
+
+    def _notify(self, job_id: str):
+        for event in self._waiters.get(job_id, []):
+            event.set()
+
+
+# Shared job queue
+job_queue = JobQueue()
@@ -0,0 +1,152 @@
+import os
+import time
+import asyncio
+from typing import AsyncIterator, List, Dict, Optional
+from openai import AsyncOpenAI
+
+from metrics import record_dependency, record_llm_usage
+
+# LLM gateway configuration
+LLM_MODEL = os.environ.get("LLM_MODEL", "gpt-3.5-turbo")
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 8))
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", 30))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", 2))
+# Point this at fake_llm_server.py (e.g. http://127.0.0.1:8011/v1) to run offline
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+
+
+class LLMGateway:
+    """Process-wide async gateway for chat completions.
+
+    Holds one AsyncOpenAI client (and therefore one pooled HTTP connection
+    pool) for the whole worker, caps the number of in-flight completions and
+    bounds every call with a timeout so a slow upstream never blocks the
+    event loop or piles up unbounded requests.
+    """
+
+    def __init__(
+        self,
+        model: str = LLM_MODEL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        base_url: Optional[str] = OPENAI_BASE_URL,
+    ):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_url = base_url
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[AsyncOpenAI] = None
+
+    def _get_client(self) -> AsyncOpenAI:
+        if self._client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY environment variable is not set")
+            self._client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+            )
+        return self._client
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Run one chat completion and return the message content.
+
+        `timeout` covers both waiting for a concurrency slot and the upstream
+        call itself; asyncio.TimeoutError is raised when it is exceeded.
+        """
+        client = self._get_client()
+        params = self._params(messages, temperature, max_tokens, model)
+
+        async def _call() -> str:
+            async with self._semaphore:
+                started, outcome = time.perf_counter(), "error"
+                try:
+                    response = await client.chat.completions.create(**params)
+                    outcome = "ok"
+                except asyncio.CancelledError:
+                    outcome = "cancelled"
+                    raise
+                finally:
+                    record_dependency("llm", time.perf_counter() - started, outcome)
+            record_llm_usage(params["model"], response.usage)
+            return response.choices[0].message.content
+
+        return await asyncio.wait_for(_call(), timeout=timeout or self.timeout)
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """Run one streaming chat completion and yield content deltas as they arrive.
+
+        The concurrency slot is held until the stream ends. `timeout` bounds
+        the wait for the first chunk and every gap between chunks. Closing the
+        generator early (e.g. the HTTP client went away) closes the upstream
+        response, which stops the completion.
+        """
+        client = self._get_client()
+        params = self._params(messages, temperature, max_tokens, model)
+        timeout = timeout or self.timeout
+
+        async with self._semaphore:
+            started, outcome = time.perf_counter(), "error"
+            try:
+                response = await asyncio.wait_for(client.chat.completions.create(
+                    stream=True, stream_options={"include_usage": True}, **params
+                ), timeout=timeout)
+            except BaseException:
+                record_dependency("llm", time.perf_counter() - started, outcome)
+                raise
+            chunks = response.__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                    except StopAsyncIteration:
+                        outcome = "ok"
+                        break
+                    # The last chunk carries usage and no choices
+                    if getattr(chunk, "usage", None):
+                        record_llm_usage(params["model"], chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            except (GeneratorExit, asyncio.CancelledError):
+                outcome = "cancelled"
+                raise
+            finally:
+                record_dependency("llm", time.perf_counter() - started, outcome)
+                # shield so a cancelled caller still releases the upstream connection
+                await asyncio.shield(response.close())
+
+    def _params(self, messages: List[Dict[str, str]], temperature: Optional[float], max_tokens: Optional[int], model: Optional[str]) -> dict:
+        params = {"model": model or self.model, "messages": messages}
+        if temperature is not None:
+            params["temperature"] = temperature
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        return params
+
+    async def close(self):
+        """Release the pooled HTTP client (called on app shutdown)"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# Shared gateway instance used by every AI endpoint
+llm_gateway = LLMGateway()
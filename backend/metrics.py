@@ -0,0 +1,266 @@
+"""Request and dependency metrics in the Prometheus text format.
+
+MetricsMiddleware times every request by route template, and per-dependency
+timers record where the time went: MongoDB commands (through a pymongo
+command listener), Open-Meteo and LLM calls, plus LLM token usage and cache
+hits. Everything is served on GET /metrics.
+
+Each request also gets a Server-Timing header (e.g.
+`mongo;dur=12.4;desc="3 ops", llm;dur=2810.0, app;dur=2831.2`) so a single
+slow call can be broken down in the browser's network panel.
+
+Metrics live in the worker's memory and reset on restart; with several
+workers, scrape each one (or run one worker per container).
+"""
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Exposition lines for every label combination"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, key)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # [per-bucket counts..., sum, count]
+            state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def samples(self) -> Iterator[str]:
+        for key, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {state[-1]}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {state[-2]}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {state[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "agriverse_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")))
+HTTP_LATENCY = registry.register(Histogram(
+    "agriverse_http_request_duration_seconds", "HTTP request latency (until the last body byte is sent)", ("method", "route")))
+HTTP_IN_PROGRESS = registry.register(Gauge(
+    "agriverse_http_requests_in_progress", "HTTP requests currently being handled"))
+MONGO_COMMANDS = registry.register(Histogram(
+    "agriverse_mongo_command_duration_seconds", "MongoDB command latency by command name", ("command", "outcome")))
+MONGO_OPS_PER_REQUEST = registry.register(Histogram(
+    "agriverse_mongo_commands_per_request", "MongoDB commands issued by one HTTP request", ("route",), COUNT_BUCKETS))
+MONGO_SECONDS_PER_REQUEST = registry.register(Histogram(
+    "agriverse_mongo_seconds_per_request", "Time one HTTP request spent waiting on MongoDB", ("route",)))
+UPSTREAM_LATENCY = registry.register(Histogram(
+    "agriverse_upstream_duration_seconds", "Upstream call latency (weather, llm)", ("dependency", "outcome")))
+LLM_TOKENS = registry.register(Counter(
+    "agriverse_llm_tokens_total", "LLM tokens used, from the API's usage report", ("model", "kind")))
+CACHE_REQUESTS = registry.register(Counter(
+    "agriverse_cache_requests_total", "Cache lookups by cache and result (hit, stale, miss)", ("cache", "result")))
+
+
+class RequestStats:
+    """Dependency time spent by one request (shared with the tasks it spawns)"""
+
+    __slots__ = ("mongo_ops", "mongo_seconds", "upstream")
+
+    def __init__(self):
+        self.mongo_ops = 0
+        self.mongo_seconds = 0.0
+        self.upstream: Dict[str, float] = {}
+
+
+request_stats_var: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_dependency(dependency: str, seconds: float, outcome: str = "ok"):
+    """Record one upstream call (weather, llm) against the metrics and the current request"""
+    UPSTREAM_LATENCY.observe(seconds, dependency=dependency, outcome=outcome)
+    stats = request_stats_var.get()
+    if stats is not None:
+        stats.upstream[dependency] = stats.upstream.get(dependency, 0.0) + seconds
+
+
+def record_llm_usage(model: str, usage) -> None:
+    if usage is None:
+        return
+    LLM_TOKENS.inc(usage.prompt_tokens or 0, model=model, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens or 0, model=model, kind="completion")
+
+
+def record_cache(cache: str, result: str):
+    CACHE_REQUESTS.inc(cache=cache, result=result)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Pass to AsyncMongoClient(event_listeners=[...]) to time every command.
+
+    pymongo calls this from the task that ran the command, so the request it
+    belongs to is still in context.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "ok")
+
+    def failed(self, event):
+        self._record(event, "error")
+
+    def _record(self, event, outcome: str):
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMANDS.observe(seconds, command=event.command_name, outcome=outcome)
+        stats = request_stats_var.get()
+        if stats is not None:
+            stats.mongo_ops += 1
+            stats.mongo_seconds += seconds
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+def _server_timing(stats: RequestStats, elapsed: float) -> bytes:
+    parts = [f'mongo;dur={stats.mongo_seconds * 1000:.1f};desc="{stats.mongo_ops} ops"']
+    parts.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stats.upstream.items())
+    parts.append(f"app;dur={elapsed * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency by route template and per-request dependency time"""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            # The router stores the matched endpoint in scope; map it back to its path template
+            app = scope.get("app")
+            for candidate in getattr(getattr(app, "router", None), "routes", []):
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            route = self._routes[endpoint] = route or "unmatched"
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = request_stats_var.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", _server_timing(stats, time.perf_counter() - started))
+                ]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            request_stats_var.reset(token)
+            elapsed = time.perf_counter() - started
+            route = self._route(scope)
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
+            HTTP_LATENCY.observe(elapsed, method=scope["method"], route=route)
+            MONGO_OPS_PER_REQUEST.observe(stats.mongo_ops, route=route)
+            MONGO_SECONDS_PER_REQUEST.observe(stats.mongo_seconds, route=route)
@@ -0,0 +1,70 @@
+"""Backfill `farmer_id` on documents that predate it.
+
+Schedules, cultivation cycles, cycle tasks and growth data are owned by the
+farmer in their `farmer_id` field, and every route checks it in the same query
+that fetches the document. Older documents only point at their land (or
+cycle/schedule), so they are invisible to those queries until this runs once:
+
+    python ownership.py --backfill
+"""
+import os
+import asyncio
+from typing import Dict
+
+from pymongo import UpdateMany
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BACKFILL_BATCH_SIZE = 500
+
+MISSING = {"farmer_id": {"$exists": False}}
+
+
+async def _backfill_from(parent, child, parent_key: str) -> int:
+    """Copy farmer_id from each parent document to the children whose parent_key points at it"""
+    updated, batch = 0, []
+    async for doc in parent.find({"farmer_id": {"$exists": True}}, {"_id": 0, "id": 1, "farmer_id": 1}):
+        batch.append(UpdateMany({parent_key: doc["id"], **MISSING}, {"$set": {"farmer_id": doc["farmer_id"]}}))
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            updated += (await child.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await child.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+
+async def backfill_farmer_ids(db) -> Dict[str, int]:
+    """Set farmer_id from the owning land, cycle or schedule; returns updated counts"""
+    counts = {}
+    # Order matters: tasks and growth data inherit from what is filled in before them
+    counts["crop_schedules"] = await _backfill_from(db.lands, db.crop_schedules, "land_id")
+    counts["cultivation_cycles"] = await _backfill_from(db.lands, db.cultivation_cycles, "land_id")
+    counts["cycle_tasks"] = await _backfill_from(db.cultivation_cycles, db.cycle_tasks, "cycle_id")
+    counts["growth_data"] = await _backfill_from(db.crop_schedules, db.growth_data, "schedule_id")
+    for name in counts:
+        orphans = await db[name].count_documents(MISSING)
+        if orphans:
+            logger.warning("⚠️ %s: %s documents have no owner (their land, cycle or schedule is gone)", name, orphans)
+    return counts
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from pymongo import AsyncMongoClient
+
+    load_dotenv()
+
+    async def main():
+        client = AsyncMongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+        db = client[os.environ.get("DATABASE_NAME", "agriverse")]
+        for name, count in (await backfill_farmer_ids(db)).items():
+            print(f"✅ {name}: added farmer_id to {count} documents")
+        await client.close()
+
+    if "--backfill" in sys.argv:
+        asyncio.run(main())
+    else:
+        print(__doc__)
@@ -0,0 +1,89 @@
+"""Keyset pagination for list endpoints.
+
+Lists are ordered newest first by (created_at, id); `id` breaks ties between
+documents created in the same millisecond. A page is fetched with a range
+filter on that key instead of an offset, so with a matching
+(..., created_at -1, id -1) index every page costs the same regardless of how
+deep it is.
+
+The cursor handed to clients is an opaque, URL-safe token for the last item of
+the previous page. Every paginated route returns the same envelope:
+
+    {"items": [...], "next_cursor": "..." | None, "has_more": bool, "limit": int}
+"""
+import os
+import json
+import base64
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 200))
+
+# Sort order every paginated query uses
+KEYSET_SORT = [("created_at", -1), ("id", -1)]
+
+
+def encode_cursor(doc: dict) -> str:
+    created_at = doc.get("created_at")
+    if isinstance(created_at, datetime):
+        key = {"t": "d", "c": created_at.isoformat(), "i": doc.get("id")}
+    else:
+        key = {"t": "s", "c": created_at, "i": doc.get("id")}
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """Return the (created_at, id) key stored in a cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+        created_at = datetime.fromisoformat(key["c"]) if key["t"] == "d" else key["c"]
+        return created_at, key["i"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_params(cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """Query parameters shared by paginated routes (use with Depends)"""
+    return {"cursor": cursor, "limit": max(1, min(limit, MAX_PAGE_SIZE))}
+
+
+def keyset_filter(query: dict, cursor: Optional[str]) -> dict:
+    """Restrict a query to the documents that sort after the cursor"""
+    if not cursor:
+        return query
+    created_at, doc_id = decode_cursor(cursor)
+    return {"$and": [query, {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": doc_id}}
+    ]}]}
+
+
+def page_envelope(docs: List[dict], limit: int, make_cursor: Optional[Callable[[List[dict]], str]] = None) -> Dict[str, Any]:
+    """Build the response from up to limit + 1 documents fetched in page order.
+
+    make_cursor builds the next cursor from the page items; the default is the
+    (created_at, id) key of the last one.
+    """
+    has_more = len(docs) > limit
+    items = docs[:limit]
+    make_cursor = make_cursor or (lambda page_items: encode_cursor(page_items[-1]))
+    return {
+        "items": items,
+        "next_cursor": make_cursor(items) if has_more and items else None,
+        "has_more": has_more,
+        "limit": limit,
+    }
+
+
+async def paginate(collection, query: dict, projection: dict, page: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch one page of a find() query"""
+    limit = page["limit"]
+    docs = await collection.find(
+        keyset_filter(query, page["cursor"]), projection
+    ).sort(KEYSET_SORT).limit(limit + 1).to_list(limit + 1)
+    return page_envelope(docs, limit)
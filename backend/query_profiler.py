@@ -0,0 +1,181 @@
+"""Per-request MongoDB query profiler and N+1 detector (development/staging).
+
+With QUERY_PROFILER=1, every MongoDB command is attributed to the request
+that issued it and grouped by query shape: command, collection and filter
+with the values blanked out (`find cycle_tasks {"cycle_id": "?"}`). A shape
+that runs QUERY_PROFILER_REPEAT_THRESHOLD (default 3) or more times in one
+request is almost always a query inside a Python loop, i.e. an N+1.
+
+Each response gets a summary header:
+
+    X-Query-Profile: commands=14; mongo_ms=23.5; repeated=find cycle_tasks {"cycle_id": "?"} x12
+
+and, depending on QUERY_PROFILER_LOG, a log record: "repeats" (default)
+logs a warning only for requests with repeated shapes, "all" logs every
+request's summary, "off" logs nothing. The full per-shape breakdown is
+attached to the record as `query_profile` (visible with LOG_FORMAT=json).
+
+Off by default: it costs a little per command and the header exposes query
+shapes, so keep it out of production.
+"""
+import os
+import json
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+QUERY_PROFILER_ENABLED = os.environ.get("QUERY_PROFILER", "").lower() in ("1", "true", "yes")
+QUERY_PROFILER_REPEAT_THRESHOLD = int(os.environ.get("QUERY_PROFILER_REPEAT_THRESHOLD", 3))
+QUERY_PROFILER_LOG = os.environ.get("QUERY_PROFILER_LOG", "repeats").lower()
+
+PROFILE_HEADER = b"x-query-profile"
+
+# Where each command keeps the filter that identifies its shape
+FILTER_FIELDS = {"find": "filter", "count": "query", "distinct": "query", "findAndModify": "query"}
+STATEMENT_FIELDS = {"update": ("updates", "q"), "delete": ("deletes", "q")}
+# Cursor batches of an earlier command, not queries of their own
+NOT_REPEATS = ("getMore", "killCursors")
+
+
+def query_shape(value: Any) -> Any:
+    """A filter with its values replaced by "?" (lists of sub-filters keep their structure)"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]
+    return "?"
+
+
+def command_shape(name: str, command: dict) -> str:
+    """`<command> <collection> <filter shape>` for a command document"""
+    collection = command.get("collection") if name == "getMore" else command.get(name)
+    if name in FILTER_FIELDS:
+        shape = query_shape(command.get(FILTER_FIELDS[name]) or {})
+    elif name in STATEMENT_FIELDS:
+        field, query = STATEMENT_FIELDS[name]
+        statements = command.get(field) or [{}]
+        shape = query_shape(statements[0].get(query) or {})
+    elif name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        first = pipeline[0]
+        shape = query_shape(first["$match"]) if "$match" in first else [next(iter(stage), "?") for stage in pipeline]
+    else:
+        shape = None
+    parts = [name, str(collection)] if isinstance(collection, str) else [name]
+    if shape is not None:
+        parts.append(json.dumps(shape, default=str))
+    return " ".join(parts)
+
+
+class RequestProfile:
+    """MongoDB commands issued while handling one request, by shape"""
+
+    def __init__(self):
+        self.commands = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, List[float]] = {}  # shape -> [count, seconds]
+        self.pending: Dict[Tuple[Any, int], str] = {}
+
+    def repeated(self) -> List[Tuple[str, int]]:
+        return sorted(
+            ((shape, int(count)) for shape, (count, _) in self.shapes.items()
+             if count >= QUERY_PROFILER_REPEAT_THRESHOLD and not shape.startswith(NOT_REPEATS)),
+            key=lambda item: -item[1]
+        )
+
+    def header(self) -> bytes:
+        value = f"commands={self.commands}; mongo_ms={self.seconds * 1000:.1f}"
+        repeated = self.repeated()
+        if repeated:
+            value += "; repeated=" + ", ".join(f"{shape} x{count}" for shape, count in repeated)
+        return value.encode("latin-1", "replace")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "commands": self.commands,
+            "mongo_ms": round(self.seconds * 1000, 1),
+            "shapes": [
+                {"shape": shape, "count": int(count), "mongo_ms": round(seconds * 1000, 1)}
+                for shape, (count, seconds) in sorted(self.shapes.items(), key=lambda item: -item[1][0])
+            ],
+        }
+
+
+request_profile_var: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """Pass to AsyncMongoClient(event_listeners=[...]); a no-op outside profiled requests"""
+
+    def started(self, event):
+        profile = request_profile_var.get()
+        if profile is not None:
+            profile.pending[(event.connection_id, event.request_id)] = command_shape(event.command_name, event.command)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        profile = request_profile_var.get()
+        if profile is None:
+            return
+        shape = profile.pending.pop((event.connection_id, event.request_id), event.command_name)
+        seconds = event.duration_micros / 1e6
+        stats = profile.shapes.setdefault(shape, [0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        profile.commands += 1
+        profile.seconds += seconds
+
+
+query_profiler = QueryProfiler()
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware that profiles each request's MongoDB commands (add only when enabled)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile()
+        token = request_profile_var.set(profile)
+        started = time.perf_counter()
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_HEADER, profile.header())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            request_profile_var.reset(token)
+            self._log(scope, profile, time.perf_counter() - started)
+
+    def _log(self, scope, profile: RequestProfile, elapsed: float):
+        repeated = profile.repeated()
+        extra = {"query_profile": profile.summary()}
+        if repeated and QUERY_PROFILER_LOG in ("repeats", "all"):
+            logger.warning(
+                "🔁 Possible N+1 in %s %s: %s (%s commands, %.1f ms in MongoDB)",
+                scope["method"], scope["path"], ", ".join(f"{shape} x{count}" for shape, count in repeated),
+                profile.commands, profile.seconds * 1000, extra=extra
+            )
+        elif QUERY_PROFILER_LOG == "all":
+            logger.info(
+                "🔎 %s %s: %s commands, %.1f ms in MongoDB, %.1f ms total",
+                scope["method"], scope["path"], profile.commands, profile.seconds * 1000, elapsed * 1000, extra=extra
+            )
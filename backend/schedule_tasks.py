@@ -0,0 +1,221 @@
+"""In-place updates of the tasks embedded in crop_schedules.schedule.
+
+Tasks are addressed by their stable `id`, so marking one done or skipped is a
+single positional update instead of rewriting the whole array, and taps from
+two devices on different tasks can no longer overwrite each other.
+Temporary disease tasks are removed with `$pull` as soon as they are acted on.
+
+Every action stamps the task with `action_at`. Bulk actions replayed from an
+offline queue only apply if they are newer than the task's last action, so a
+late replay cannot undo what was done since, and replaying the same batch
+twice changes nothing.
+
+Schedules saved before tasks had ids can be fixed with:
+
+    python schedule_tasks.py --backfill
+"""
+import os
+import uuid
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+MAX_BULK_TASK_ACTIONS = int(os.environ.get("MAX_BULK_TASK_ACTIONS", 500))
+
+TASK_ACTIONS = {
+    "done": {"completed": True, "skipped": False},
+    "skip": {"completed": False, "skipped": True},
+}
+
+# Tasks added by integrate-disease-tasks; dropped once done or skipped
+TEMPORARY_DISEASE_TASK = {"temporary": True, "disease_related": True}
+
+
+async def apply_task_action(collection, schedule_query: dict, task_id: str, action: str) -> Optional[str]:
+    """Mark one task done or skipped.
+
+    Returns "updated", "removed" (a temporary disease task was pulled), or None
+    if the schedule has no such task.
+    """
+    # `$` is the element matched by $elemMatch, i.e. this (non-temporary) task
+    fields = {f"schedule.$.{field}": value for field, value in TASK_ACTIONS[action].items()}
+    fields["schedule.$.completed_at"] = datetime.utcnow().isoformat()
+    fields["schedule.$.action_at"] = datetime.utcnow()
+    result = await collection.update_one(
+        {**schedule_query, "schedule": {"$elemMatch": {"id": task_id, "$nor": [TEMPORARY_DISEASE_TASK]}}},
+        {"$set": fields}
+    )
+    if result.matched_count:
+        return "updated"
+
+    result = await collection.update_one(
+        schedule_query,
+        {"$pull": {"schedule": {"id": task_id, **TEMPORARY_DISEASE_TASK}}}
+    )
+    return "removed" if result.modified_count else None
+
+
+async def apply_task_action_at(collection, schedule_query: dict, task_index: int, action: str) -> bool:
+    """Same as apply_task_action for clients that still address tasks by position"""
+    fields = {f"schedule.{task_index}.{field}": value for field, value in TASK_ACTIONS[action].items()}
+    fields[f"schedule.{task_index}.completed_at"] = datetime.utcnow().isoformat()
+    fields[f"schedule.{task_index}.action_at"] = datetime.utcnow()
+    result = await collection.update_one(
+        {**schedule_query, f"schedule.{task_index}": {"$exists": True}},
+        {"$set": fields}
+    )
+    if not result.matched_count:
+        return False
+    await collection.update_one(
+        schedule_query,
+        {"$pull": {"schedule": {**TEMPORARY_DISEASE_TASK, "$or": [{"completed": True}, {"skipped": True}]}}}
+    )
+    return True
+
+
+def action_time(acted_at: Optional[datetime]) -> datetime:
+    """When an action happened, as naive UTC at MongoDB's millisecond precision.
+
+    Missing or future timestamps (clock skew) become now.
+    """
+    now = datetime.utcnow()
+    if acted_at is None:
+        return now.replace(microsecond=now.microsecond // 1000 * 1000)
+    if acted_at.tzinfo is not None:
+        acted_at = acted_at.astimezone(timezone.utc).replace(tzinfo=None)
+    acted_at = min(acted_at, now)
+    return acted_at.replace(microsecond=acted_at.microsecond // 1000 * 1000)
+
+
+def cycle_task_fields(action: str, acted_at: datetime) -> dict:
+    """$set for a cycle_tasks document (skipping clears completed_at)"""
+    return {
+        **TASK_ACTIONS[action],
+        "completed_at": acted_at.isoformat() if action == "done" else None,
+        "action_at": acted_at,
+    }
+
+
+def _not_newer(acted_at: datetime) -> dict:
+    return {"$or": [{"action_at": {"$exists": False}}, {"action_at": {"$lte": acted_at}}]}
+
+
+def _latest_per_task(items: List[dict], parent: str) -> Tuple[List[dict], Dict[int, str]]:
+    """Keep only the newest action per task in a batch; the others are superseded by it"""
+    latest: Dict[tuple, dict] = {}
+    for item in items:
+        key = (item[parent], item["task_id"])
+        if key not in latest or item["acted_at"] > latest[key]["acted_at"]:
+            latest[key] = item
+    kept = {id(item) for item in latest.values()}
+    return list(latest.values()), {item["index"]: "superseded" for item in items if id(item) not in kept}
+
+
+async def bulk_schedule_task_actions(collection, farmer_id: str, items: List[dict]) -> Dict[int, str]:
+    """Apply task actions on crop schedules with one bulk_write.
+
+    items are {"index", "schedule_id", "task_id", "action", "acted_at"}; returns
+    index -> "applied" | "superseded" | "not_found" (also for a temporary
+    disease task that an earlier action already removed).
+    """
+    schedule_ids = list({item["schedule_id"] for item in items})
+    schedules = await collection.find(
+        {"id": {"$in": schedule_ids}, "farmer_id": farmer_id},
+        {"_id": 0, "id": 1, "schedule.id": 1, "schedule.temporary": 1, "schedule.disease_related": 1, "schedule.action_at": 1}
+    ).to_list(len(schedule_ids))
+    tasks = {(schedule["id"], task.get("id")): task for schedule in schedules for task in schedule.get("schedule", [])}
+
+    items, results = _latest_per_task(items, "schedule_id")
+    operations = []
+    for item in items:
+        task = tasks.get((item["schedule_id"], item["task_id"]))
+        if task is None:
+            results[item["index"]] = "not_found"
+            continue
+        schedule_query = {"id": item["schedule_id"], "farmer_id": farmer_id}
+        if task.get("temporary") and task.get("disease_related"):
+            operations.append(UpdateOne(schedule_query, {"$pull": {"schedule": {"id": item["task_id"], **TEMPORARY_DISEASE_TASK}}}))
+            results[item["index"]] = "applied"
+            continue
+        if task.get("action_at") and task["action_at"] > item["acted_at"]:
+            results[item["index"]] = "superseded"
+            continue
+        fields = {f"schedule.$.{field}": value for field, value in TASK_ACTIONS[item["action"]].items()}
+        fields["schedule.$.completed_at"] = item["acted_at"].isoformat()
+        fields["schedule.$.action_at"] = item["acted_at"]
+        # The action_at guard keeps this safe if the task changed since we read it
+        operations.append(UpdateOne(
+            {**schedule_query, "schedule": {"$elemMatch": {"id": item["task_id"], **_not_newer(item["acted_at"])}}},
+            {"$set": fields}
+        ))
+        results[item["index"]] = "applied"
+
+    if operations:
+        # At most one operation per task, so the order does not matter
+        await collection.bulk_write(operations, ordered=False)
+    return results
+
+
+async def bulk_cycle_task_actions(collection, farmer_id: str, items: List[dict]) -> Dict[int, str]:
+    """Apply task actions on cultivation cycle tasks with one bulk_write (same contract as above)"""
+    task_ids = list({item["task_id"] for item in items})
+    tasks = {(task["cycle_id"], task["id"]): task for task in await collection.find(
+        {"id": {"$in": task_ids}, "farmer_id": farmer_id}, {"_id": 0, "id": 1, "cycle_id": 1, "action_at": 1}
+    ).to_list(len(task_ids))}
+
+    items, results = _latest_per_task(items, "cycle_id")
+    operations = []
+    for item in items:
+        task = tasks.get((item["cycle_id"], item["task_id"]))
+        if task is None:
+            results[item["index"]] = "not_found"
+            continue
+        if task.get("action_at") and task["action_at"] > item["acted_at"]:
+            results[item["index"]] = "superseded"
+            continue
+        operations.append(UpdateOne(
+            {"id": item["task_id"], "cycle_id": item["cycle_id"], "farmer_id": farmer_id, **_not_newer(item["acted_at"])},
+            {"$set": cycle_task_fields(item["action"], item["acted_at"])}
+        ))
+        results[item["index"]] = "applied"
+
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+    return results
+
+
+async def backfill_task_ids(collection) -> int:
+    """Give every embedded task without an id one"""
+    updated = 0
+    async for schedule in collection.find({"schedule": {"$elemMatch": {"id": {"$exists": False}}}}, {"_id": 1, "schedule": 1}):
+        missing = [i for i, task in enumerate(schedule["schedule"]) if not task.get("id")]
+        # Only write if those tasks are still where we saw them
+        guard = {f"schedule.{i}.id": {"$exists": False} for i in missing}
+        guard.update({f"schedule.{i}.task": schedule["schedule"][i].get("task") for i in missing})
+        result = await collection.update_one(
+            {"_id": schedule["_id"], **guard},
+            {"$set": {f"schedule.{i}.id": str(uuid.uuid4()) for i in missing}}
+        )
+        updated += result.modified_count
+    return updated
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from pymongo import AsyncMongoClient
+
+    load_dotenv()
+
+    async def main():
+        client = AsyncMongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+        db = client[os.environ.get("DATABASE_NAME", "agriverse")]
+        print(f"✅ Added task ids to {await backfill_task_ids(db.crop_schedules)} schedules")
+        await client.close()
+
+    if "--backfill" in sys.argv:
+        asyncio.run(main())
+    else:
+        print(__doc__)
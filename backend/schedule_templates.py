@@ -0,0 +1,167 @@
+"""Versioned library of crop schedule templates.
+
+A template is the task list of a crop schedule (day, phase, task,
+description, priority) stored under (crop, soil_type, climate_band). New
+schedules are instantiated from the best matching template instead of asking
+the LLM, trying from the most to the least specific key:
+
+    (crop, soil_type, climate_band) -> (crop, soil_type, "any") -> (crop, "any", "any")
+
+Every save adds a new version; lookups use the highest one. Templates come
+from three places:
+    - curated data in schedule_templates.json   (python schedule_templates.py --seed)
+    - existing cultivation cycles                (python schedule_templates.py --import-cycles)
+    - every schedule the LLM generates on a template miss
+"""
+import os
+import json
+import asyncio
+from datetime import datetime
+from typing import Any, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from ttl_cache import TTLCache
+
+SCHEDULE_TEMPLATE_CACHE_TTL_SECONDS = float(os.environ.get("SCHEDULE_TEMPLATE_CACHE_TTL_SECONDS", 300))
+CURATED_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule_templates.json")
+ANY = "any"
+
+TASK_FIELDS = ("day", "phase", "task", "description", "priority")
+
+# (upper bound in °C, name); humidity splits each band into dry/humid at 60 %
+TEMPERATURE_BANDS = [(15, "cool"), (25, "mild"), (32, "warm"), (float("inf"), "hot")]
+
+
+def normalize(value: Optional[str]) -> str:
+    return (value or ANY).strip().lower()
+
+
+def climate_band(weather_data: Optional[dict]) -> str:
+    """Coarse climate band (e.g. "warm-humid") from current weather"""
+    if not weather_data or weather_data.get("temperature") is None:
+        return ANY
+    temperature = weather_data["temperature"]
+    band = next(name for upper, name in TEMPERATURE_BANDS if temperature < upper)
+    humidity = weather_data.get("humidity")
+    if humidity is None:
+        return band
+    return f"{band}-{'humid' if humidity >= 60 else 'dry'}"
+
+
+def template_tasks(tasks: List[Any]) -> List[dict]:
+    """Strip tasks (dicts or models) down to the fields a template keeps"""
+    result = []
+    for task in tasks:
+        task = task if isinstance(task, dict) else task.model_dump()
+        result.append({field: task.get(field) for field in TASK_FIELDS})
+    return sorted(result, key=lambda task: task["day"])
+
+
+class ScheduleTemplateStore:
+    def __init__(self, cache_ttl: float = SCHEDULE_TEMPLATE_CACHE_TTL_SECONDS):
+        self._cache = TTLCache(max_entries=1000, ttl=cache_ttl)
+
+    async def find(self, collection, crop: str, soil_type: str, band: str) -> Optional[dict]:
+        """Latest version of the most specific template for this crop, soil and climate"""
+        crop, soil_type = normalize(crop), normalize(soil_type)
+        for key in ((crop, soil_type, band), (crop, soil_type, ANY), (crop, ANY, ANY)):
+            template = self._cache.get(key)
+            if template is None:
+                template = await collection.find_one(
+                    {"crop": key[0], "soil_type": key[1], "climate_band": key[2]},
+                    {"_id": 0},
+                    sort=[("version", -1)]
+                )
+                if template is not None:
+                    self._cache.set(key, template)
+            if template is not None:
+                return template
+        return None
+
+    async def save(self, collection, crop: str, soil_type: str, band: str, tasks: List[Any], source: str) -> Optional[dict]:
+        """Store tasks as the next version of a template"""
+        key = (normalize(crop), normalize(soil_type), band)
+        latest = await collection.find_one(
+            {"crop": key[0], "soil_type": key[1], "climate_band": key[2]},
+            {"version": 1},
+            sort=[("version", -1)]
+        )
+        template = {
+            "crop": key[0],
+            "soil_type": key[1],
+            "climate_band": key[2],
+            "version": (latest["version"] if latest else 0) + 1,
+            "source": source,
+            "tasks": template_tasks(tasks),
+            "created_at": datetime.utcnow(),
+        }
+        try:
+            await collection.insert_one(template)
+        except DuplicateKeyError:
+            # Another request saved the same version first; keep theirs
+            return None
+        template.pop("_id", None)
+        self._cache.set(key, template)
+        return template
+
+    def clear(self):
+        self._cache.clear()
+
+
+async def seed_curated(store: ScheduleTemplateStore, collection, path: str = CURATED_TEMPLATES_PATH) -> int:
+    """Add curated templates that are missing or whose tasks changed"""
+    with open(path) as f:
+        curated = json.load(f)
+    added = 0
+    for entry in curated:
+        crop, soil_type, band = normalize(entry["crop"]), normalize(entry.get("soil_type")), normalize(entry.get("climate_band"))
+        latest = await collection.find_one(
+            {"crop": crop, "soil_type": soil_type, "climate_band": band},
+            {"_id": 0, "tasks": 1},
+            sort=[("version", -1)]
+        )
+        if latest is None or latest["tasks"] != template_tasks(entry["tasks"]):
+            if await store.save(collection, crop, soil_type, band, entry["tasks"], "curated"):
+                added += 1
+    return added
+
+
+async def import_cycles(store: ScheduleTemplateStore, db) -> int:
+    """Create templates from existing cultivation cycles for keys that have none"""
+    added = 0
+    async for cycle in db.cultivation_cycles.find({}, {"_id": 0}).sort("created_at", -1):
+        crop, soil_type = normalize(cycle.get("crop_name")), normalize(cycle.get("soil_type"))
+        band = climate_band(cycle.get("weather_conditions"))
+        if crop == ANY or await db.schedule_templates.find_one({"crop": crop, "soil_type": soil_type, "climate_band": band}):
+            continue
+        tasks = await db.cycle_tasks.find({"cycle_id": cycle["id"]}, {"_id": 0}).to_list(1000)
+        if tasks and await store.save(db.schedule_templates, crop, soil_type, band, tasks, f"cycle:{cycle['id']}"):
+            added += 1
+    return added
+
+
+# Shared template store
+schedule_template_store = ScheduleTemplateStore()
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+    from pymongo import AsyncMongoClient
+
+    load_dotenv()
+
+    async def main():
+        client = AsyncMongoClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+        db = client[os.environ.get("DATABASE_NAME", "agriverse")]
+        if "--seed" in sys.argv:
+            print(f"✅ Added {await seed_curated(schedule_template_store, db.schedule_templates)} curated templates")
+        if "--import-cycles" in sys.argv:
+            print(f"✅ Added {await import_cycles(schedule_template_store, db)} templates from cultivation cycles")
+        await client.close()
+
+    if "--seed" in sys.argv or "--import-cycles" in sys.argv:
+        asyncio.run(main())
+    else:
+        print(__doc__)
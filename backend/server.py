@@ -4,26 +4,52 @@ import base64
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 import asyncio
-from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Body, status
+import logging
+from contextlib import aclosing
+from fastapi import FastAPI, HTTPException, Depends, File, UploadFile, Body, status, Request, Header
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from pymongo import MongoClient
-from pymongo import AsyncMongoClient
+from pymongo import AsyncMongoClient, ReturnDocument
 from pymongo.server_api import ServerApi
 from passlib.context import CryptContext
 import jwt
 import openai
 import io
 import tempfile
-import aiohttp
 import json
 from dotenv import load_dotenv
 from bson import ObjectId
+from logging_config import setup_logging, shutdown_logging, get_logger, RequestIdMiddleware
+from metrics import MetricsMiddleware, mongo_command_metrics, record_cache, registry as metrics_registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from query_profiler import QueryProfilerMiddleware, query_profiler, QUERY_PROFILER_ENABLED
+from llm_gateway import llm_gateway
+from weather_service import weather_service
+from ttl_cache import TTLCache
+from db_indexes import ensure_indexes, collscan_report
+from blob_store import blob_store, store_image_base64
+from image_derivatives import shutdown_image_pool
+from pagination import DEFAULT_PAGE_SIZE, page_params, paginate, page_envelope, keyset_filter
+from geo import geo_point, geo_near_stage, encode_distance_cursor, find_nearest
+from suggestion_cache import suggestion_cache, suggestion_context
+from schedule_templates import schedule_template_store, climate_band, seed_curated
+from job_queue import job_queue, public_job, FINISHED
+from counters import next_value, cycle_version_sequence
+from transactions import run_in_transaction
+from schedule_tasks import (
+    TASK_ACTIONS, TEMPORARY_DISEASE_TASK, MAX_BULK_TASK_ACTIONS, apply_task_action, apply_task_action_at,
+    action_time, cycle_task_fields, bulk_schedule_task_actions, bulk_cycle_task_actions
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Structured logging; LOG_LEVEL=DEBUG adds prompt and payload dumps
+setup_logging()
+logger = get_logger("agriverse")
+
 # Get port from environment (Railway sets PORT env var)
 PORT = int(os.environ.get("PORT", 8000))
 
@@ -32,20 +58,21 @@ app = FastAPI(title="AgriVerse API", version="1.0.0")
 
 @app.on_event("startup")
 async def startup_db_client():
-    global client, db, users_collection, lands_collection, products_collection, disease_reports_collection, plant_plans_collection, crop_schedules_collection, alerts_collection, crop_planning_history_collection, cultivation_cycles_collection, cycle_tasks_collection, growth_data_collection
+    global client, db, users_collection, lands_collection, products_collection, disease_reports_collection, plant_plans_collection, crop_schedules_collection, alerts_collection, crop_planning_history_collection, cultivation_cycles_collection, cycle_tasks_collection, growth_data_collection, blobs_collection, ai_suggestion_cache_collection, schedule_templates_collection, jobs_collection, counters_collection
     
     try:
         # Test the connection
         await client.admin.command('ping')
-        print("✅ MongoDB connection successful!")
+        logger.info("✅ MongoDB connection successful!")
     except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
+        logger.error("❌ MongoDB connection failed: %s", e)
         # Try alternative connection string format
         try:
             alt_url = MONGO_URL.replace('mongodb+srv://', 'mongodb://')
             client = AsyncMongoClient(
                 alt_url,
-                server_api=ServerApi('1')
+                server_api=ServerApi('1'),
+                event_listeners=[mongo_command_metrics, query_profiler]
             )
             db = client[DATABASE_NAME]
             
@@ -61,12 +88,60 @@ async def startup_db_client():
             cultivation_cycles_collection = db.cultivation_cycles
             cycle_tasks_collection = db.cycle_tasks
             growth_data_collection = db.growth_data
+            blobs_collection = db.blobs
+            ai_suggestion_cache_collection = db.ai_suggestion_cache
+            schedule_templates_collection = db.schedule_templates
+            jobs_collection = db.jobs
+            counters_collection = db.counters
             
             await client.admin.command('ping')
-            print("✅ MongoDB connection successful with alternative URL!")
+            logger.info("✅ MongoDB connection successful with alternative URL!")
         except Exception as e2:
-            print(f"❌ Alternative connection also failed: {e2}")
-            print("⚠️ Continuing with basic connection...")
+            logger.error("❌ Alternative connection also failed: %s", e2)
+            logger.warning("⚠️ Continuing with basic connection...")
+
+@app.on_event("startup")
+async def startup_db_indexes():
+    try:
+        created = await ensure_indexes(db)
+        logger.info("✅ Ensured indexes on %s collections", len(created))
+        if os.environ.get("INDEX_REPORT_ON_STARTUP", "false").lower() == "true":
+            for scan in await collscan_report(db):
+                logger.warning("⚠️ COLLSCAN: %s on %s filter=%s", scan['query'], scan['collection'], scan['filter'])
+    except Exception as e:
+        logger.error("❌ Index bootstrap failed: %s", e)
+
+@app.on_event("startup")
+async def startup_schedule_templates():
+    try:
+        added = await seed_curated(schedule_template_store, schedule_templates_collection)
+        if added:
+            logger.info("✅ Added %s curated schedule templates", added)
+    except Exception as e:
+        logger.error("❌ Schedule template seeding failed: %s", e)
+
+@app.on_event("startup")
+async def startup_job_workers():
+    job_queue.start(jobs_collection)
+
+@app.on_event("shutdown")
+async def shutdown_job_workers():
+    await job_queue.stop()
+
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    # Close the pooled LLM and weather HTTP clients
+    await llm_gateway.close()
+    await weather_service.close()
+
+@app.on_event("shutdown")
+async def shutdown_image_workers():
+    shutdown_image_pool()
+
+@app.on_event("shutdown")
+async def shutdown_log_listener():
+    # Flush queued log records
+    shutdown_logging()
 
 # CORS configuration
 app.add_middleware(
@@ -75,22 +150,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing", "X-Query-Profile"],
 )
 
+# Latency by route and per-request dependency time, served on /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Development/staging only: per-request query shapes and N+1 warnings
+if QUERY_PROFILER_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware)
+
+# Tag every log line with the request it belongs to
+app.add_middleware(RequestIdMiddleware)
+
 # Security setup
 security = HTTPBearer()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 
+# Crop suggestions are filed under the farmer's closest land within this distance
+LAND_MATCH_RADIUS_METERS = float(os.environ.get("LAND_MATCH_RADIUS_METERS", 1000))
+
+# Per-section time budgets for get_land_details
+LAND_DETAILS_DB_TIMEOUT_SECONDS = float(os.environ.get("LAND_DETAILS_DB_TIMEOUT_SECONDS", 2))
+LAND_DETAILS_WEATHER_TIMEOUT_SECONDS = float(os.environ.get("LAND_DETAILS_WEATHER_TIMEOUT_SECONDS", 3))
+
+# Per-worker cache of user documents for get_current_user
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get("USER_CACHE_MAX_ENTRIES", 10000))
+user_cache = TTLCache(max_entries=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+
 # Database setup
 MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
-DATABASE_NAME = "agriverse"
+DATABASE_NAME = os.environ.get("DATABASE_NAME", "agriverse")
 
 # Initialize MongoDB client with proper Atlas configuration
 client = AsyncMongoClient(
     MONGO_URL,
-    server_api=ServerApi('1')
+    server_api=ServerApi('1'),
+    event_listeners=[mongo_command_metrics, query_profiler]
 )
 db = client[DATABASE_NAME]
 
@@ -109,6 +208,17 @@ cultivation_cycles_collection = db.cultivation_cycles
 cycle_tasks_collection = db.cycle_tasks
 growth_data_collection = db.growth_data
 
+# Metadata for images kept in the blob store
+blobs_collection = db.blobs
+# Cached AI crop suggestions (see suggestion_cache.py)
+ai_suggestion_cache_collection = db.ai_suggestion_cache
+# Reusable crop schedules (see schedule_templates.py)
+schedule_templates_collection = db.schedule_templates
+# Background AI jobs (see job_queue.py)
+jobs_collection = db.jobs
+# Atomic sequences such as cycle versions (see counters.py)
+counters_collection = db.counters
+
 # Pydantic models
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -140,6 +250,7 @@ class Land(BaseModel):
     name: str
     size: float  # in acres
     location: Dict[str, float]  # {"lat": 0.0, "lng": 0.0}
+    geo: Optional[Dict[str, Any]] = None  # GeoJSON point mirroring location, for nearest-land lookups
     address: Optional[str] = None  # Human readable address like "Hyderabad, Telangana"
     soil_type: str
     custom_soil_type: Optional[str] = None
@@ -157,8 +268,10 @@ class Product(BaseModel):
     unit: str  # "kg", "ton", "piece", etc.
     quantity: int
     category: str
-    image_base64: Optional[str] = None
+    image_base64: Optional[str] = None  # Upload only; moved to the blob store on save
+    image: Optional[Dict[str, Any]] = None  # Blob reference: blob_id, url, content_type, size, width, height, thumbnail, preview
     location: Dict[str, float]
+    geo: Optional[Dict[str, Any]] = None  # GeoJSON point mirroring location, for $geoNear
     available: bool = True
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -167,7 +280,8 @@ class DiseaseReport(BaseModel):
     farmer_id: Optional[str] = None
     land_id: Optional[str] = None
     crop_name: str
-    image_base64: str
+    image_base64: Optional[str] = None  # Only kept inline if storing the image failed
+    image: Optional[Dict[str, Any]] = None  # Blob reference
     ai_diagnosis: str
     confidence: float
     recommendations: List[str]
@@ -225,6 +339,18 @@ class Task(BaseModel):
     completed_at: Optional[str] = None
     cycle_id: Optional[str] = None  # Link to cultivation cycle
 
+class TaskActionItem(BaseModel):
+    # Exactly one of schedule_id / cycle_id
+    schedule_id: Optional[str] = None
+    cycle_id: Optional[str] = None
+    task_id: str
+    action: str  # 'done' or 'skip'
+    acted_at: Optional[datetime] = None  # when the farmer tapped it (offline queues)
+    client_id: Optional[str] = None  # echoed back in the results
+
+class BulkTaskActionRequest(BaseModel):
+    actions: List[TaskActionItem]
+
 class CultivationCycle(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     farmer_id: str
@@ -245,6 +371,7 @@ class CultivationCycle(BaseModel):
 class CycleTask(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     cycle_id: str
+    farmer_id: str  # owner, so tasks can be checked without loading the cycle
     day: int
     phase: str
     task: str
@@ -255,6 +382,8 @@ class CycleTask(BaseModel):
     completed_at: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+cycle_tasks_adapter = TypeAdapter(List[CycleTask])
+
 class CropSchedule(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     farmer_id: str
@@ -363,6 +492,7 @@ class GenerateScheduleRequest(BaseModel):
     crop_name: str
     land_id: str
     start_date: str
+    regenerate: bool = False  # Ask the AI for a new schedule even if a template exists
 
 # Helper functions
 def hash_password(password: str) -> str:
@@ -381,230 +511,199 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def decode_access_token(token: str) -> dict:
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        
-        user = await users_collection.find_one({"id": user_id})
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return payload
+
+async def load_user(user_id: str) -> dict:
+    """Fetch a user (without password hash) through the per-worker user cache"""
+    user = user_cache.get(user_id)
+    record_cache("users", "miss" if user is None else "hit")
+    if user is None:
+        user = await users_collection.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        user_cache.set(user_id, user)
+    return dict(user)
 
-# Weather API Configuration - Using Open-Meteo (Completely Free)
-WEATHER_BASE_URL = "https://api.open-meteo.com/v1"
-print("🌤️ Using Open-Meteo API - Completely free weather data!")
-print("   No API key required, no rate limits for reasonable usage")
-# OpenAI API setup
-def get_chatgpt_client():
-    from openai import OpenAI
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable is not set")
-    return OpenAI(api_key=api_key)
+def invalidate_user_cache(user_id: str):
+    """Drop a cached user; call after any write that changes a user's profile or role"""
+    user_cache.pop(user_id)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = decode_access_token(credentials.credentials)
+    return await load_user(payload["sub"])
+
+async def get_current_principal(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Lightweight {"id", "user_type"} principal decoded from the token.
+
+    Tokens issued before user_type was added as a claim fall back to the
+    cached user lookup.
+    """
+    payload = decode_access_token(credentials.credentials)
+    user_type = payload.get("user_type")
+    if user_type is None:
+        user = await load_user(payload["sub"])
+        user_type = user["user_type"]
+    return {"id": payload["sub"], "user_type": user_type}
+
+# List endpoints never send full images: inline base64 is dropped and blob
+# references are reduced to their thumbnail (the detail routes keep the rest)
+LIST_PROJECTION = {"_id": 0, "image_base64": 0, "image.preview": 0}
+
+def thumbnail_only(image: Optional[dict]) -> Optional[dict]:
+    """Reduce an image reference to its thumbnail, if it has one"""
+    if image and image.get("thumbnail"):
+        return {"thumbnail": image["thumbnail"]}
+    return image
+
+def list_view(docs: List[dict]) -> List[dict]:
+    for doc in docs:
+        if "image" in doc:
+            doc["image"] = thumbnail_only(doc["image"])
+    return docs
+
+# Weather data comes from the shared weather service (Open-Meteo, completely free)
+logger.info("🌤️ Using Open-Meteo API for weather data (no API key required)")
+
+async def find_nearest_land(farmer_id: str, lat: float, lng: float, max_distance_m: float = LAND_MATCH_RADIUS_METERS) -> Optional[dict]:
+    """The farmer's land closest to (lat, lng) within max_distance_m metres, or None"""
+    return await find_nearest(lands_collection, lat, lng, max_distance_m, {"farmer_id": farmer_id})
 
 # Weather API functions
 async def get_weather_data(lat: float, lng: float) -> dict:
-    """Fetch real-time weather data from Open-Meteo API (Completely Free)"""
-    try:
-        async with aiohttp.ClientSession() as session:
-            url = f"{WEATHER_BASE_URL}/forecast"
-            params = {
-                "latitude": lat,
-                "longitude": lng,
-                "current": "temperature_2m,relative_humidity_2m,pressure_msl,wind_speed_10m,wind_direction_10m,weather_code",
-                "timezone": "auto"
-            }
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    current = data["current"]
-                    
-                    # Convert weather code to description and icon
-                    weather_info = get_weather_info_from_code(current["weather_code"])
-                    
-                    return {
-                        "temperature": current["temperature_2m"],
-                        "humidity": current["relative_humidity_2m"],
-                        "pressure": int(current["pressure_msl"]),
-                        "wind_speed": current["wind_speed_10m"],
-                        "wind_direction": int(current["wind_direction_10m"]),
-                        "description": weather_info["description"],
-                        "icon": weather_info["icon"],
-                        "timestamp": datetime.utcnow()
-                    }
-                else:
-                    print(f"Open-Meteo API error: {response.status}")
-                    return get_fallback_weather_data()
-    except Exception as e:
-        print(f"Weather API error: {e}")
-        return get_fallback_weather_data()
-
-def get_weather_info_from_code(code: int) -> dict:
-    """Convert Open-Meteo weather codes to descriptions and icons"""
-    weather_codes = {
-        0: {"description": "Clear sky", "icon": "01d"},
-        1: {"description": "Mainly clear", "icon": "02d"},
-        2: {"description": "Partly cloudy", "icon": "03d"},
-        3: {"description": "Overcast", "icon": "04d"},
-        45: {"description": "Foggy", "icon": "50d"},
-        48: {"description": "Depositing rime fog", "icon": "50d"},
-        51: {"description": "Light drizzle", "icon": "09d"},
-        53: {"description": "Moderate drizzle", "icon": "09d"},
-        55: {"description": "Dense drizzle", "icon": "09d"},
-        56: {"description": "Light freezing drizzle", "icon": "13d"},
-        57: {"description": "Dense freezing drizzle", "icon": "13d"},
-        61: {"description": "Slight rain", "icon": "10d"},
-        63: {"description": "Moderate rain", "icon": "10d"},
-        65: {"description": "Heavy rain", "icon": "10d"},
-        66: {"description": "Light freezing rain", "icon": "13d"},
-        67: {"description": "Heavy freezing rain", "icon": "13d"},
-        71: {"description": "Slight snow", "icon": "13d"},
-        73: {"description": "Moderate snow", "icon": "13d"},
-        75: {"description": "Heavy snow", "icon": "13d"},
-        77: {"description": "Snow grains", "icon": "13d"},
-        80: {"description": "Slight rain showers", "icon": "09d"},
-        81: {"description": "Moderate rain showers", "icon": "09d"},
-        82: {"description": "Violent rain showers", "icon": "09d"},
-        85: {"description": "Slight snow showers", "icon": "13d"},
-        86: {"description": "Heavy snow showers", "icon": "13d"},
-        95: {"description": "Thunderstorm", "icon": "11d"},
-        96: {"description": "Thunderstorm with slight hail", "icon": "11d"},
-        99: {"description": "Thunderstorm with heavy hail", "icon": "11d"}
-    }
-    
-    return weather_codes.get(code, {"description": "Unknown", "icon": "01d"})
-
-def get_fallback_weather_data() -> dict:
-    """Return fallback weather data when API fails"""
-    return {
-        "temperature": 25.0,
-        "humidity": 65,
-        "pressure": 1013,
-        "wind_speed": 5.0,
-        "wind_direction": 180,
-        "description": "Partly cloudy",
-        "icon": "02d",
-        "timestamp": datetime.utcnow()
-    }
+    """Current weather for a location, served from the grid-snapped weather cache"""
+    return await weather_service.get_current(lat, lng)
 
 async def get_ai_crop_suggestions(lat: float, lng: float, soil_type: str, season: str, temperature: float = None, humidity: float = None) -> List[dict]:
-    """Get AI-powered crop suggestions based on location and conditions"""
+    """Get AI-powered crop suggestions based on location and conditions.
+
+    Answers are shared through the suggestion cache by farms with the same
+    snapped location, soil, season and temperature/humidity buckets.
+    """
     try:
-        print(f"🤖 Getting AI crop suggestions for: lat={lat}, lng={lng}, soil={soil_type}, season={season}")
+        logger.info("🤖 Getting AI crop suggestions for: lat=%s, lng=%s, soil=%s, season=%s", lat, lng, soil_type, season)
         
         # If weather data not provided, fetch it
         if temperature is None or humidity is None:
-            print("🌤️ Fetching weather data...")
+            logger.debug("🌤️ Fetching weather data...")
             weather_data = await get_weather_data(lat, lng)
             temperature = weather_data["temperature"]
             humidity = weather_data["humidity"]
-            print(f"🌤️ Weather data: {temperature}°C, {humidity}% humidity")
+            logger.debug("🌤️ Weather data: %s°C, %s%% humidity", temperature, humidity)
         
-        prompt = f"""
-        You are an agricultural expert. Based on the following conditions, suggest exactly 8 best crops for farming:
-
-        Location: Latitude {lat}, Longitude {lng}
-        Soil Type: {soil_type}
-        Season: {season}
-        Temperature: {temperature}°C
-        Humidity: {humidity}%
-
-        CRITICAL REQUIREMENTS:
-        1. Return EXACTLY 8 crops - no more, no less
-        2. Return ONLY a valid JSON array
-        3. Each crop object MUST have these exact fields:
-           - name: crop name
-           - duration: growing duration (e.g., "120 days")
-           - water_requirement: "Low", "Medium", or "High"
-           - benefits: key benefits description
-           - planting_time: best planting time
-           - yield_potential: "Low", "Medium", "High", or "Very High"
-
-        Example response format:
-        [
-          {{
-            "name": "Wheat",
-            "duration": "120 days",
-            "water_requirement": "Medium",
-            "benefits": "High yield, good market price, excellent for {soil_type} soil",
-            "planting_time": "Early {season}",
-            "yield_potential": "High"
-          }},
-          {{
-            "name": "Corn",
-            "duration": "90 days",
-            "water_requirement": "High",
-            "benefits": "Versatile crop, good for rotation, thrives in {soil_type}",
-            "planting_time": "Mid-{season}",
-            "yield_potential": "Very High"
-          }}
-        ]
-
-        IMPORTANT: Return ONLY the JSON array with exactly 8 crops. No additional text.
-        """
-        
-        print("🧠 Calling ChatGPT for crop suggestions...")
-        client = get_chatgpt_client()
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # Change this to any model: gpt-4, gpt-4-turbo, gpt-4-vision
-            messages=[
-                {"role": "system", "content": "You are an agricultural expert. Provide crop suggestions in valid JSON format only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000
+        context = suggestion_context(lat, lng, soil_type, season, temperature, humidity)
+        suggestions = await suggestion_cache.get_or_load(
+            ai_suggestion_cache_collection,
+            context,
+            lambda: request_ai_crop_suggestions(lat, lng, soil_type, season, temperature, humidity)
         )
-        response_text = response.choices[0].message.content
-        print(f"🧠 AI Response length: {len(response_text)} characters")
-        
-        # Try to parse JSON from response
-        try:
-            # Extract JSON from the response
-            import re
-            json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            if json_match:
-                crops_data = json.loads(json_match.group())
-                print(f"✅ Successfully parsed {len(crops_data)} crops from AI response")
-                
-                # Ensure we have exactly 8 crops with all required fields
-                if len(crops_data) >= 8:
-                    # Take first 8 crops and ensure all fields are present
-                    final_crops = []
-                    for i, crop in enumerate(crops_data[:8]):
-                        final_crop = {
-                            "name": crop.get("name", f"Crop {i+1}"),
-                            "duration": crop.get("duration", "120 days"),
-                            "water_requirement": crop.get("water_requirement", "Medium"),
-                            "benefits": crop.get("benefits", "Good for this soil type and season"),
-                            "planting_time": crop.get("planting_time", "Early season"),
-                            "yield_potential": crop.get("yield_potential", "Medium")
-                        }
-                        final_crops.append(final_crop)
-                    print(f"✅ AI returned {len(final_crops)} crops successfully")
-                    return final_crops
-                else:
-                    print(f"⚠️ AI returned only {len(crops_data)} crops, using fallback to get 8")
-                    return get_fallback_crop_suggestions(soil_type, season)
-            else:
-                print("⚠️ No JSON array found in AI response, using fallback")
-                return get_fallback_crop_suggestions(soil_type, season)
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing error: {e}")
-            print(f"📄 AI Response: {response_text[:200]}...")
-            return get_fallback_crop_suggestions(soil_type, season)
-            
+        if suggestions is not None:
+            return suggestions
     except Exception as e:
-        print(f"❌ AI crop suggestion error: {e}")
-        # Return fallback suggestions
-        fallback_crops = get_fallback_crop_suggestions(soil_type, season)
-        print(f"🔄 Using fallback suggestions: {len(fallback_crops)} crops")
-        return fallback_crops
+        logger.error("❌ AI crop suggestion error: %s", e)
+    
+    # Return fallback suggestions
+    fallback_crops = get_fallback_crop_suggestions(soil_type, season)
+    logger.info("🔄 Using fallback suggestions: %s crops", len(fallback_crops))
+    return fallback_crops
+
+async def request_ai_crop_suggestions(lat: float, lng: float, soil_type: str, season: str, temperature: float, humidity: float) -> Optional[List[dict]]:
+    """Ask the LLM for 8 crop suggestions; None if the answer is unusable"""
+    prompt = f"""
+    You are an agricultural expert. Based on the following conditions, suggest exactly 8 best crops for farming:
+
+    Location: Latitude {lat}, Longitude {lng}
+    Soil Type: {soil_type}
+    Season: {season}
+    Temperature: {temperature}°C
+    Humidity: {humidity}%
+
+    CRITICAL REQUIREMENTS:
+    1. Return EXACTLY 8 crops - no more, no less
+    2. Return ONLY a valid JSON array
+    3. Each crop object MUST have these exact fields:
+       - name: crop name
+       - duration: growing duration (e.g., "120 days")
+       - water_requirement: "Low", "Medium", or "High"
+       - benefits: key benefits description
+       - planting_time: best planting time
+       - yield_potential: "Low", "Medium", "High", or "Very High"
+
+    Example response format:
+    [
+      {{
+        "name": "Wheat",
+        "duration": "120 days",
+        "water_requirement": "Medium",
+        "benefits": "High yield, good market price, excellent for {soil_type} soil",
+        "planting_time": "Early {season}",
+        "yield_potential": "High"
+      }},
+      {{
+        "name": "Corn",
+        "duration": "90 days",
+        "water_requirement": "High",
+        "benefits": "Versatile crop, good for rotation, thrives in {soil_type}",
+        "planting_time": "Mid-{season}",
+        "yield_potential": "Very High"
+      }}
+    ]
+
+    IMPORTANT: Return ONLY the JSON array with exactly 8 crops. No additional text.
+    """
+    
+    logger.debug("🧠 Calling ChatGPT for crop suggestions...")
+    response_text = await llm_gateway.complete(
+        messages=[
+            {"role": "system", "content": "You are an agricultural expert. Provide crop suggestions in valid JSON format only."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=2000
+    )
+    logger.debug("🧠 AI Response length: %s characters", len(response_text))
+    
+    # Try to parse JSON from response
+    try:
+        # Extract JSON from the response
+        import re
+        json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
+        if json_match:
+            crops_data = json.loads(json_match.group())
+            logger.info("✅ Successfully parsed %s crops from AI response", len(crops_data))
+            
+            # Ensure we have exactly 8 crops with all required fields
+            if len(crops_data) >= 8:
+                # Take first 8 crops and ensure all fields are present
+                final_crops = []
+                for i, crop in enumerate(crops_data[:8]):
+                    final_crop = {
+                        "name": crop.get("name", f"Crop {i+1}"),
+                        "duration": crop.get("duration", "120 days"),
+                        "water_requirement": crop.get("water_requirement", "Medium"),
+                        "benefits": crop.get("benefits", "Good for this soil type and season"),
+                        "planting_time": crop.get("planting_time", "Early season"),
+                        "yield_potential": crop.get("yield_potential", "Medium")
+                    }
+                    final_crops.append(final_crop)
+                logger.info("✅ AI returned %s crops successfully", len(final_crops))
+                return final_crops
+            else:
+                logger.warning("⚠️ AI returned only %s crops, using fallback to get 8", len(crops_data))
+                return None
+        else:
+            logger.warning("⚠️ No JSON array found in AI response, using fallback")
+            return None
+    except json.JSONDecodeError as e:
+        logger.error("❌ JSON parsing error: %s", e)
+        logger.debug("📄 AI Response: %s...", response_text[:200])
+        return None
 
 def parse_crop_suggestions(response_text: str) -> List[dict]:
     """Parse crop suggestions from AI response text"""
@@ -855,8 +954,23 @@ def get_fallback_crop_suggestions(soil_type: str, season: str) -> List[dict]:
     
     return season_suggestions[:8]  # Ensure exactly 8 crops
 
-async def generate_crop_schedule(crop_name: str, start_date: datetime, soil_type: str, weather_data: dict) -> List[Task]:
-    """Generate detailed crop schedule using AI"""
+async def generate_crop_schedule(crop_name: str, start_date: datetime, soil_type: str, weather_data: dict, regenerate: bool = False) -> List[Task]:
+    """Crop schedule from the template library, generated by AI on a miss.
+
+    AI schedules are saved as the next template version for this crop, soil
+    and climate band; `regenerate` skips the template lookup.
+    """
+    band = climate_band(weather_data)
+    if not regenerate:
+        try:
+            template = await schedule_template_store.find(schedule_templates_collection, crop_name, soil_type, band)
+            record_cache("schedule_templates", "hit" if template else "miss")
+            if template:
+                logger.info("📋 Using schedule template %s/%s/%s v%s", template['crop'], template['soil_type'], template['climate_band'], template['version'])
+                return [Task(**task) for task in template["tasks"]]
+        except Exception as e:
+            logger.error("❌ Schedule template lookup failed: %s", e)
+    
     try:
         prompt = f"""
         Create a detailed day-by-day farming schedule for {crop_name} crop.
@@ -886,11 +1000,7 @@ async def generate_crop_schedule(crop_name: str, start_date: datetime, soil_type
         Format as JSON array with objects containing: day, phase, task, description, priority
         """
         
-        # Initialize ChatGPT client
-        client = get_chatgpt_client()
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response_text = await llm_gateway.complete(
             messages=[
                 {"role": "system", "content": "You are an agricultural expert. Create detailed farming schedules in JSON format."},
                 {"role": "user", "content": prompt}
@@ -898,7 +1008,6 @@ async def generate_crop_schedule(crop_name: str, start_date: datetime, soil_type
             temperature=0.7,
             max_tokens=1500
         )
-        response_text = response.choices[0].message.content
         
         try:
             import re
@@ -916,6 +1025,10 @@ async def generate_crop_schedule(crop_name: str, start_date: datetime, soil_type
                         priority=task_dict.get('priority', 'Medium')
                     )
                     tasks.append(task)
+                try:
+                    await schedule_template_store.save(schedule_templates_collection, crop_name, soil_type, band, tasks, "ai")
+                except Exception as e:
+                    logger.error("❌ Failed to save schedule template: %s", e)
                 return tasks
             else:
                 return generate_fallback_schedule(crop_name, start_date)
@@ -923,7 +1036,7 @@ async def generate_crop_schedule(crop_name: str, start_date: datetime, soil_type
             return generate_fallback_schedule(crop_name, start_date)
             
     except Exception as e:
-        print(f"Schedule generation error: {e}")
+        logger.error("Schedule generation error: %s", e)
         return generate_fallback_schedule(crop_name, start_date)
 
 def generate_fallback_schedule(crop_name: str, start_date: datetime) -> List[Task]:
@@ -954,6 +1067,11 @@ def generate_fallback_schedule(crop_name: str, start_date: datetime) -> List[Tas
 async def root():
     return {"message": "AgriVerse API - Empowering Farmers with AI"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (this worker's metrics)"""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.post("/api/register")
 async def register(user_data: UserRegister):
     # Check if user already exists
@@ -978,7 +1096,7 @@ async def register(user_data: UserRegister):
     # Create access token
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": user.id}, expires_delta=access_token_expires
+        data={"sub": user.id, "user_type": user.user_type}, expires_delta=access_token_expires
     )
     
     return {
@@ -1000,7 +1118,7 @@ async def login(user_credentials: UserLogin):
     
     access_token_expires = timedelta(minutes=30)
     access_token = create_access_token(
-        data={"sub": user["id"]}, expires_delta=access_token_expires
+        data={"sub": user["id"], "user_type": user["user_type"]}, expires_delta=access_token_expires
     )
     
     return {
@@ -1028,16 +1146,17 @@ async def get_profile(current_user: dict = Depends(get_current_user)):
 
 # Farmer routes
 @app.post("/api/lands")
-async def create_land(land_data: Land, current_user: dict = Depends(get_current_user)):
+async def create_land(land_data: Land, current_user: dict = Depends(get_current_principal)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can create lands")
     
     land_data.farmer_id = current_user["id"]
+    land_data.geo = geo_point(land_data.location)
     await lands_collection.insert_one(land_data.model_dump())
     return land_data
 
 @app.get("/api/lands")
-async def get_lands(current_user: dict = Depends(get_current_user)):
+async def get_lands(current_user: dict = Depends(get_current_principal)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view lands")
     
@@ -1045,7 +1164,7 @@ async def get_lands(current_user: dict = Depends(get_current_user)):
     return lands
 
 @app.delete("/api/lands/{land_id}")
-async def delete_land(land_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_land(land_id: str, current_user: dict = Depends(get_current_principal)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can delete lands")
     
@@ -1058,12 +1177,12 @@ async def delete_land(land_id: str, current_user: dict = Depends(get_current_use
     await lands_collection.delete_one({"id": land_id, "farmer_id": current_user["id"]})
     
     # Also delete related crop schedules
-    await crop_schedules_collection.delete_many({"land_id": land_id})
+    await crop_schedules_collection.delete_many({"land_id": land_id, "farmer_id": current_user["id"]})
     
     return {"message": "Land deleted successfully"}
 
 @app.put("/api/lands/{land_id}")
-async def update_land(land_id: str, land_data: Land, current_user: dict = Depends(get_current_user)):
+async def update_land(land_id: str, land_data: Land, current_user: dict = Depends(get_current_principal)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can update lands")
     
@@ -1076,24 +1195,27 @@ async def update_land(land_id: str, land_data: Land, current_user: dict = Depend
     land_data.farmer_id = current_user["id"]
     land_data.id = land_id
     land_data.last_updated = datetime.utcnow()
+    land_data.geo = geo_point(land_data.location)
     
     await lands_collection.replace_one({"id": land_id}, land_data.model_dump())
     
     return land_data
 
 @app.post("/api/detect-disease")
-async def detect_disease(request: DiseaseDetectionRequest, current_user: dict = Depends(get_current_user)):
+async def detect_disease(request: DiseaseDetectionRequest, current_user: dict = Depends(get_current_principal)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can detect diseases")
     
+    # Move the image into the blob store; the report keeps only a reference
+    try:
+        image_ref = await store_image_base64(request.image_base64, blobs_collection)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("❌ Failed to store disease image: %s", e)
+        image_ref = None
+    
     try:
-        # Initialize ChatGPT client
-        client = get_chatgpt_client()
-        
-        # Decode base64 image
-        import base64
-        image_data = base64.b64decode(request.image_base64)
-        
         # Create analysis prompt
         prompt = f"""
         Analyze this image of a {request.crop_name} crop for any diseases or health issues.
@@ -1114,7 +1236,7 @@ async def detect_disease(request: DiseaseDetectionRequest, current_user: dict =
         """
         
         # Use text-only analysis since GPT-4 Vision is deprecated
-        print("🔍 Performing text-based disease analysis...")
+        logger.debug("🔍 Performing text-based disease analysis...")
         analysis_prompt = f"""
         Based on the crop name '{request.crop_name}', provide comprehensive disease analysis and recommendations.
         
@@ -1133,16 +1255,14 @@ async def detect_disease(request: DiseaseDetectionRequest, current_user: dict =
         PREVENTION: [prevention measures]
         """
         
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response_text = await llm_gateway.complete(
             messages=[
                 {"role": "system", "content": "You are an agricultural expert specializing in crop disease diagnosis and treatment. Provide detailed, practical advice."},
                 {"role": "user", "content": analysis_prompt}
             ],
             max_tokens=1000
         )
-        response_text = response.choices[0].message.content
-        print("✅ Text-based analysis successful")
+        logger.info("✅ Text-based analysis successful")
         
         # Parse response
         ai_diagnosis = response_text
@@ -1170,7 +1290,8 @@ async def detect_disease(request: DiseaseDetectionRequest, current_user: dict =
             farmer_id=current_user["id"],
             land_id=request.land_id,
             crop_name=request.crop_name,
-            image_base64=request.image_base64,
+            image_base64=None if image_ref else request.image_base64,
+            image=image_ref,
             ai_diagnosis=ai_diagnosis,
             confidence=confidence,
             recommendations=recommendations
@@ -1192,7 +1313,7 @@ async def detect_disease(request: DiseaseDetectionRequest, current_user: dict =
         return disease_report
         
     except Exception as e:
-        print(f"❌ Disease detection error: {e}")
+        logger.error("❌ Disease detection error: %s", e)
         # Return a fallback response instead of throwing an error
         fallback_diagnosis = f"""
         Unable to analyze the image due to technical issues: {str(e)}
@@ -1209,7 +1330,8 @@ async def detect_disease(request: DiseaseDetectionRequest, current_user: dict =
             farmer_id=current_user["id"],
             land_id=request.land_id,
             crop_name=request.crop_name,
-            image_base64=request.image_base64,
+            image_base64=None if image_ref else request.image_base64,
+            image=image_ref,
             ai_diagnosis=fallback_diagnosis,
             confidence=0.0,
             recommendations=["Please try with a clearer image", "Ensure good lighting", "Check image format"]
@@ -1219,132 +1341,169 @@ async def detect_disease(request: DiseaseDetectionRequest, current_user: dict =
         return disease_report
 
 @app.get("/api/disease-reports")
-async def get_disease_reports(current_user: dict = Depends(get_current_user)):
+async def get_disease_reports(land_id: Optional[str] = None, current_user: dict = Depends(get_current_principal), page: dict = Depends(page_params)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view disease reports")
     
-    reports = await disease_reports_collection.find({"farmer_id": current_user["id"]}, {"_id": 0}).to_list(100)
-    return reports
+    query = {"farmer_id": current_user["id"]}
+    if land_id:
+        query["land_id"] = land_id
+    result = await paginate(disease_reports_collection, query, LIST_PROJECTION, page)
+    list_view(result["items"])
+    return result
+
+async def build_plant_plan_messages(request: PlantPlanRequest, current_user: dict) -> List[Dict[str, str]]:
+    # Get land details
+    land = await lands_collection.find_one({"id": request.land_id, "farmer_id": current_user["id"]})
+    if not land:
+        raise HTTPException(status_code=404, detail="Land not found")
+    
+    prompt = f"""
+    Create a comprehensive farm plant plan for:
+    
+    Land Details:
+    - Name: {land['name']}
+    - Size: {land['size']} acres
+    - Soil Type: {land['soil_type']}
+    - Current Crops: {', '.join(land.get('crops', []))}
+    
+    Planning Requirements:
+    - Season: {request.season}
+    - Preferred Crops: {', '.join(request.preferred_crops)}
+    - Goals: {request.goals}
+    
+    Please provide:
+    1. Detailed planting schedule
+    2. Crop rotation recommendations
+    3. Soil preparation steps
+    4. Irrigation requirements
+    5. Pest and disease prevention
+    6. Expected yield estimates
+    7. Market timing advice
+    
+    Format as a comprehensive farming plan.
+    """
+    
+    return [
+        {"role": "system", "content": "You are an agricultural expert. Provide comprehensive farming plans."},
+        {"role": "user", "content": prompt}
+    ]
+
+async def save_plant_plan(request: PlantPlanRequest, current_user: dict, response_text: str) -> PlantPlan:
+    plant_plan = PlantPlan(
+        farmer_id=current_user["id"],
+        land_id=request.land_id,
+        season=request.season,
+        crops=request.preferred_crops,
+        plan_details=request.goals,
+        ai_recommendations=response_text
+    )
+    
+    await plant_plans_collection.insert_one(plant_plan.model_dump())
+    return plant_plan
 
 @app.post("/api/plant-plan")
-async def create_plant_plan(request: PlantPlanRequest, current_user: dict = Depends(get_current_user)):
+async def create_plant_plan(request: PlantPlanRequest, current_user: dict = Depends(get_current_principal)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can create plant plans")
     
+    messages = await build_plant_plan_messages(request, current_user)
     try:
-        # Get land details
-        land = await lands_collection.find_one({"id": request.land_id, "farmer_id": current_user["id"]})
-        if not land:
-            raise HTTPException(status_code=404, detail="Land not found")
-        
-        # Initialize ChatGPT client
-        client = get_chatgpt_client()
-        
-        prompt = f"""
-        Create a comprehensive farm plant plan for:
-        
-        Land Details:
-        - Name: {land['name']}
-        - Size: {land['size']} acres
-        - Soil Type: {land['soil_type']}
-        - Current Crops: {', '.join(land.get('crops', []))}
-        
-        Planning Requirements:
-        - Season: {request.season}
-        - Preferred Crops: {', '.join(request.preferred_crops)}
-        - Goals: {request.goals}
-        
-        Please provide:
-        1. Detailed planting schedule
-        2. Crop rotation recommendations
-        3. Soil preparation steps
-        4. Irrigation requirements
-        5. Pest and disease prevention
-        6. Expected yield estimates
-        7. Market timing advice
-        
-        Format as a comprehensive farming plan.
-        """
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an agricultural expert. Provide comprehensive farming plans."},
-                {"role": "user", "content": prompt}
-            ],
+        response_text = await llm_gateway.complete(
+            messages=messages,
             temperature=0.7,
             max_tokens=1500
         )
-        response_text = response.choices[0].message.content
         
-        # Create plant plan
-        plant_plan = PlantPlan(
-            farmer_id=current_user["id"],
-            land_id=request.land_id,
-            season=request.season,
-            crops=request.preferred_crops,
-            plan_details=request.goals,
-            ai_recommendations=response_text
-        )
-        
-        await plant_plans_collection.insert_one(plant_plan.model_dump())
-        
-        return plant_plan
+        return await save_plant_plan(request, current_user, response_text)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Plant plan creation failed: {str(e)}")
 
+@app.post("/api/plant-plan/stream")
+async def create_plant_plan_stream(request: PlantPlanRequest, http_request: Request, current_user: dict = Depends(get_current_principal)):
+    """Stream the plan as Server-Sent Events; the finished plan is saved and sent with `done`.
+
+    If the client goes away before the plan is complete, the completion is
+    cancelled and nothing is saved.
+    """
+    if current_user["user_type"] != "farmer":
+        raise HTTPException(status_code=403, detail="Only farmers can create plant plans")
+    
+    messages = await build_plant_plan_messages(request, current_user)
+    
+    async def events():
+        parts = []
+        try:
+            async with aclosing(llm_gateway.stream(messages=messages, temperature=0.7, max_tokens=1500)) as tokens:
+                async for token in tokens:
+                    if await http_request.is_disconnected():
+                        logger.info("🔌 Plant plan client disconnected, cancelling completion")
+                        return
+                    parts.append(token)
+                    yield sse_event("token", {"content": token})
+            plant_plan = await save_plant_plan(request, current_user, "".join(parts))
+            yield sse_event("done", plant_plan.model_dump())
+        except Exception as e:
+            logger.error("Plant plan stream error: %s", e)
+            yield sse_event("error", {"message": f"Plant plan creation failed: {str(e)}"})
+    
+    return sse_response(events())
+
 @app.get("/api/plant-plans")
-async def get_plant_plans(current_user: dict = Depends(get_current_user)):
+async def get_plant_plans(current_user: dict = Depends(get_current_principal), page: dict = Depends(page_params)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view plant plans")
     
-    plans = await plant_plans_collection.find({"farmer_id": current_user["id"]}, {"_id": 0}).to_list(100)
-    return plans
+    return await paginate(plant_plans_collection, {"farmer_id": current_user["id"]}, {"_id": 0}, page)
 
 @app.post("/api/products")
-async def create_product(product_data: Product, current_user: dict = Depends(get_current_user)):
+async def create_product(product_data: Product, current_user: dict = Depends(get_current_principal)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can create products")
     
     product_data.farmer_id = current_user["id"]
+    product_data.geo = geo_point(product_data.location)
+    if product_data.image_base64:
+        product_data.image = await store_image_base64(product_data.image_base64, blobs_collection)
+        product_data.image_base64 = None
     await products_collection.insert_one(product_data.model_dump())
     return product_data
 
 @app.get("/api/my-products")
-async def get_my_products(current_user: dict = Depends(get_current_user)):
+async def get_my_products(current_user: dict = Depends(get_current_principal), page: dict = Depends(page_params)):
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view their products")
     
-    products = await products_collection.find({"farmer_id": current_user["id"]}, {"_id": 0}).to_list(100)
-    return products
+    result = await paginate(products_collection, {"farmer_id": current_user["id"]}, LIST_PROJECTION, page)
+    list_view(result["items"])
+    return result
 
 # Customer routes
 @app.get("/api/products")
-async def get_products(lat: Optional[float] = None, lng: Optional[float] = None, radius: Optional[float] = 50):
+async def get_products(lat: Optional[float] = None, lng: Optional[float] = None, radius: Optional[float] = 50, page: dict = Depends(page_params)):
     query = {"available": True}
     
-    # If location is provided, filter by proximity
+    # If location is provided, return products within radius km, nearest first
     if lat is not None and lng is not None:
-        # Simple proximity filter (in a real app, you'd use geo-spatial queries)
-        products = await products_collection.find(query, {"_id": 0}).to_list(100)
-        
-        # Filter by distance (simple calculation)
-        nearby_products = []
-        for product in products:
-            if product.get("location"):
-                product_lat = product["location"].get("lat", 0)
-                product_lng = product["location"].get("lng", 0)
-                
-                # Simple distance calculation (not accurate, but for demo)
-                distance = ((lat - product_lat) ** 2 + (lng - product_lng) ** 2) ** 0.5
-                if distance <= radius / 111:  # Rough conversion
-                    nearby_products.append(product)
-        
-        return nearby_products
+        if geo_point({"lat": lat, "lng": lng}) is None:
+            raise HTTPException(status_code=400, detail="Invalid coordinates")
+        limit = page["limit"]
+        cursor = await products_collection.aggregate([
+            geo_near_stage(lat, lng, radius * 1000, query, page["cursor"]),
+            {"$limit": limit + 1},
+            {"$project": LIST_PROJECTION}
+        ])
+        result = page_envelope(
+            await cursor.to_list(limit + 1), limit,
+            lambda items: encode_distance_cursor(items, page["cursor"])
+        )
+        list_view(result["items"])
+        return result
     
-    products = await products_collection.find(query, {"_id": 0}).to_list(100)
-    return products
+    result = await paginate(products_collection, query, LIST_PROJECTION, page)
+    list_view(result["items"])
+    return result
 
 @app.get("/api/products/{product_id}")
 async def get_product(product_id: str):
@@ -1353,7 +1512,88 @@ async def get_product(product_id: str):
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
+# Server-Sent Events helpers for streamed AI responses
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    """Stream an async iterator of sse_event strings.
+
+    If the client disconnects, Starlette cancels the iterator, which closes
+    any upstream LLM stream it is reading from.
+    """
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Enhanced API Routes
+def parse_range_header(range_header: str, size: int) -> Optional[tuple]:
+    """Parse a single-range "bytes=" header into inclusive (start, end)"""
+    units, _, spec = range_header.partition("=")
+    if units.strip() != "bytes" or "," in spec:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(end_str), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end:
+        return None
+    return start, end
+
+@app.get("/api/blobs/{blob_id}")
+async def get_blob(blob_id: str, request: Request):
+    """Stream a stored image.
+
+    Blob ids are SHA-256 content hashes, so responses are immutable and
+    cacheable forever; the id doubles as the ETag. Single byte ranges are
+    supported. Unauthenticated so that <img> tags can load it directly.
+    """
+    blob = await blobs_collection.find_one({"id": blob_id}, {"_id": 0})
+    if not blob:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    
+    etag = f'"{blob_id}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes"
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    size = await blob_store.size(blob_id)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    
+    start, end = 0, size - 1
+    status_code = 200
+    range_header = request.headers.get("range")
+    if range_header and size > 0:
+        byte_range = parse_range_header(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        blob_store.iter_range(blob_id, start, end),
+        status_code=status_code,
+        media_type=blob["content_type"],
+        headers=headers
+    )
+
 @app.get("/api/region-crops/{region}")
 async def get_region_crops(region: str):
     """Get crop suggestions based on region"""
@@ -1391,45 +1631,137 @@ async def get_crop_schedule(crop_name: str):
     }
     return schedule_data.get(crop_name.lower(), [])
 
+async def load_section(name: str, awaitable, timeout: float, default: Any = None):
+    """Await one independent section of a response within its own time budget.
+
+    Returns (value, status) where status is "ok", "timeout" or "error"; on
+    failure the value is `default` so the rest of the response still renders.
+    """
+    try:
+        return await asyncio.wait_for(awaitable, timeout), "ok"
+    except asyncio.TimeoutError:
+        logger.warning("⚠️ Section '%s' exceeded its %ss budget", name, timeout)
+        return default, "timeout"
+    except Exception as e:
+        logger.error("❌ Section '%s' failed: %s", name, e)
+        return default, "error"
+
 @app.get("/api/land-details/{land_id}")
-async def get_land_details(land_id: str, current_user: dict = Depends(get_current_user)):
+async def get_land_details(land_id: str, current_user: dict = Depends(get_current_principal)):
     """Get detailed information about a specific land"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view land details")
     
-    land = await lands_collection.find_one({"id": land_id, "farmer_id": current_user["id"]}, {"_id": 0})
+    # Related data only depends on land_id, so start it alongside the ownership check
+    sections = {
+        "disease_reports": asyncio.ensure_future(load_section(
+            "disease_reports",
+            disease_reports_collection.find({"land_id": land_id}, LIST_PROJECTION).to_list(10),
+            LAND_DETAILS_DB_TIMEOUT_SECONDS,
+            []
+        )),
+        "plant_plans": asyncio.ensure_future(load_section(
+            "plant_plans",
+            plant_plans_collection.find({"land_id": land_id}, {"_id": 0}).to_list(10),
+            LAND_DETAILS_DB_TIMEOUT_SECONDS,
+            []
+        )),
+        "crop_schedules": asyncio.ensure_future(load_section(
+            "crop_schedules",
+            crop_schedules_collection.find({"land_id": land_id}, {"_id": 0}).to_list(10),
+            LAND_DETAILS_DB_TIMEOUT_SECONDS,
+            []
+        ))
+    }
+    
+    land = None
+    try:
+        land = await lands_collection.find_one({"id": land_id, "farmer_id": current_user["id"]}, {"_id": 0})
+    finally:
+        if not land:
+            for task in sections.values():
+                task.cancel()
     if not land:
         raise HTTPException(status_code=404, detail="Land not found")
     
     # Get real-time weather data
-    weather_data = await get_weather_data(land["location"]["lat"], land["location"]["lng"])
-    
-    # Get related data
-    disease_reports = await disease_reports_collection.find(
-        {"land_id": land_id}, {"_id": 0}
-    ).to_list(10)
+    sections["weather"] = asyncio.ensure_future(load_section(
+        "weather",
+        get_weather_data(land["location"]["lat"], land["location"]["lng"]),
+        LAND_DETAILS_WEATHER_TIMEOUT_SECONDS,
+        None
+    ))
     
-    plant_plans = await plant_plans_collection.find(
-        {"land_id": land_id}, {"_id": 0}
-    ).to_list(10)
-    
-    # Get crop schedules
-    crop_schedules = await crop_schedules_collection.find(
-        {"land_id": land_id}, {"_id": 0}
-    ).to_list(10)
+    await asyncio.gather(*sections.values())
+    results = {name: task.result() for name, task in sections.items()}
+    section_status = {name: status for name, (_, status) in results.items()}
     
     return {
         "land": land,
-        "weather": weather_data,
-        "disease_reports": disease_reports,
-        "plant_plans": plant_plans,
-        "crop_schedules": crop_schedules,
+        "weather": results["weather"][0],
+        "disease_reports": list_view(results["disease_reports"][0]),
+        "plant_plans": results["plant_plans"][0],
+        "crop_schedules": results["crop_schedules"][0],
         "growth_data": {
             "current_stage": "Vegetative",
             "days_planted": 45,
             "health_score": 85,
             "next_action": "Fertilization due in 3 days"
-        }
+        },
+        # Sections that timed out or failed are returned empty and listed here
+        "partial": any(status != "ok" for status in section_status.values()),
+        "section_status": section_status
+    }
+
+# Only the fields the farmer dashboard renders; the detail routes return the rest
+DASHBOARD_LAND_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "size": 1, "location": 1, "address": 1, "soil_type": 1
+}
+DASHBOARD_PLANT_PLAN_PROJECTION = {
+    "_id": 0, "id": 1, "land_id": 1, "season": 1, "crops": 1, "created_at": 1
+}
+DASHBOARD_SCHEDULE_PROJECTION = {
+    "_id": 0, "id": 1, "land_id": 1, "crop_name": 1, "active": 1, "status": 1,
+    "current_cycle_id": 1, "current_stage": 1, "days_elapsed": 1, "health_score": 1, "next_action": 1,
+    "created_at": 1, "start_date": 1, "end_date": 1,
+    **{f"schedule.{field}": 1 for field in (
+        "id", "day", "phase", "task", "description", "priority", "completed", "skipped", "completed_at",
+        "temporary", "disease_related"
+    )}
+}
+
+@app.get("/api/dashboard")
+async def get_dashboard(current_user: dict = Depends(get_current_principal)):
+    """Everything the farmer dashboard needs on load, in one response"""
+    if current_user["user_type"] != "farmer":
+        raise HTTPException(status_code=403, detail="Only farmers can view the dashboard")
+    
+    farmer_id = current_user["id"]
+    
+    # Products and disease reports are the first page of /api/my-products and
+    # /api/disease-reports, so next_cursor continues on those endpoints
+    first_page = {"cursor": None, "limit": DEFAULT_PAGE_SIZE}
+    
+    # All lookups only depend on the farmer id, so run them concurrently
+    lands, products, disease_reports, plant_plans, crop_schedules = await asyncio.gather(
+        lands_collection.find({"farmer_id": farmer_id}, DASHBOARD_LAND_PROJECTION).to_list(100),
+        paginate(products_collection, {"farmer_id": farmer_id}, LIST_PROJECTION, first_page),
+        paginate(disease_reports_collection, {"farmer_id": farmer_id}, LIST_PROJECTION, first_page),
+        plant_plans_collection.find({"farmer_id": farmer_id}, DASHBOARD_PLANT_PLAN_PROJECTION).to_list(100),
+        crop_schedules_collection.find({"farmer_id": farmer_id}, DASHBOARD_SCHEDULE_PROJECTION).to_list(1000)
+    )
+    
+    # Schedules are only shown for lands that still exist
+    land_ids = {land["id"] for land in lands}
+    list_view(products["items"])
+    list_view(disease_reports["items"])
+    
+    return {
+        "lands": lands,
+        "products": products,
+        "disease_reports": disease_reports,
+        "plant_plans": plant_plans,
+        "crop_schedules": [schedule for schedule in crop_schedules if schedule.get("land_id") in land_ids]
     }
 
 @app.get("/api/weather/{lat}/{lng}")
@@ -1439,7 +1771,7 @@ async def get_weather(lat: float, lng: float):
     return weather_data
 
 @app.post("/api/crop-suggestions")
-async def get_crop_suggestions(request: CropSuggestionRequest, current_user: dict = Depends(get_current_user)):
+async def get_crop_suggestions(request: CropSuggestionRequest, current_user: dict = Depends(get_current_principal)):
     """Get AI-powered crop suggestions based on location and conditions"""
     try:
         suggestions = await get_ai_crop_suggestions(
@@ -1453,33 +1785,15 @@ async def get_crop_suggestions(request: CropSuggestionRequest, current_user: dic
         
         # Save to history if user is authenticated
         if current_user and current_user["user_type"] == "farmer":
-            # Find the land for this location (with flexible matching)
-            # Get all lands for this farmer
-            lands = await lands_collection.find({
-                "farmer_id": current_user["id"]
-            }).to_list(100)
-            
-            # Find the closest land by coordinates (within 0.01 degree tolerance)
-            closest_land = None
-            min_distance = float('inf')
-            
-            for land in lands:
-                land_lat = land["location"]["lat"]
-                land_lng = land["location"]["lng"]
-                
-                # Calculate distance (simple Euclidean distance)
-                lat_diff = abs(land_lat - request.latitude)
-                lng_diff = abs(land_lng - request.longitude)
-                
-                # If coordinates are very close (within 0.01 degree ≈ 1km)
-                if lat_diff < 0.01 and lng_diff < 0.01:
-                    distance = (lat_diff ** 2 + lng_diff ** 2) ** 0.5
-                    if distance < min_distance:
-                        min_distance = distance
-                        closest_land = land
+            # Find the farmer's land for this location
+            try:
+                closest_land = await find_nearest_land(current_user["id"], request.latitude, request.longitude)
+            except Exception as e:
+                logger.error("❌ Nearest land lookup failed: %s", e)
+                closest_land = None
             
             if closest_land:
-                print(f"🎯 Found matching land: {closest_land['name']} for coordinates ({request.latitude}, {request.longitude})")
+                logger.info("🎯 Found matching land: %s (%.0f m) for coordinates (%s, %s)", closest_land['name'], closest_land['distance_m'], request.latitude, request.longitude)
                 history = CropPlanningHistory(
                     farmer_id=current_user["id"],
                     land_id=closest_land["id"],
@@ -1488,20 +1802,19 @@ async def get_crop_suggestions(request: CropSuggestionRequest, current_user: dic
                     season=request.season
                 )
                 await crop_planning_history_collection.insert_one(history.model_dump())
-                print(f"✅ Saved crop planning history for land {closest_land['id']}")
+                logger.info("✅ Saved crop planning history for land %s", closest_land['id'])
             else:
-                print(f"⚠️ No matching land found for coordinates ({request.latitude}, {request.longitude})")
-                print(f"Available lands: {[land['name'] for land in lands]}")
+                logger.warning("⚠️ No land within %.0f m of coordinates (%s, %s)", LAND_MATCH_RADIUS_METERS, request.latitude, request.longitude)
         
         return suggestions  # Return the array directly, not wrapped in a dict
     except Exception as e:
-        print(f"Error getting crop suggestions: {e}")
+        logger.error("Error getting crop suggestions: %s", e)
         # Return fallback suggestions
         fallback_suggestions = get_fallback_crop_suggestions(request.soil_type, request.season)
         return fallback_suggestions
 
 @app.post("/api/generate-schedule")
-async def generate_schedule(request: GenerateScheduleRequest, current_user: dict = Depends(get_current_user)):
+async def generate_schedule(request: GenerateScheduleRequest, current_user: dict = Depends(get_current_principal)):
     """Generate AI-powered crop schedule"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can generate schedules")
@@ -1521,7 +1834,7 @@ async def generate_schedule(request: GenerateScheduleRequest, current_user: dict
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
     # Generate schedule
-    schedule = await generate_crop_schedule(request.crop_name, start_datetime, land["soil_type"], weather_data)
+    schedule = await generate_crop_schedule(request.crop_name, start_datetime, land["soil_type"], weather_data, request.regenerate)
     
     # Calculate end date (approximate)
     end_date = start_datetime + timedelta(days=120)  # Default 120 days
@@ -1561,7 +1874,7 @@ async def generate_schedule(request: GenerateScheduleRequest, current_user: dict
 @app.post("/api/generate-schedule-from-suggestion")
 async def generate_schedule_from_suggestion(
     request: dict,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Generate schedule directly from crop suggestion"""
     if current_user["user_type"] != "farmer":
@@ -1591,7 +1904,8 @@ async def generate_schedule_from_suggestion(
             crop_name, 
             start_datetime, 
             land["soil_type"], 
-            weather_data
+            weather_data,
+            bool(request.get("regenerate", False))
         )
         
         # Mark all existing schedules for this land as inactive
@@ -1635,155 +1949,90 @@ async def generate_schedule_from_suggestion(
         raise HTTPException(status_code=500, detail=f"Schedule generation failed: {str(e)}")
 
 @app.get("/api/crop-schedules/{land_id}")
-async def get_crop_schedules(land_id: str, current_user: dict = Depends(get_current_user)):
+async def get_crop_schedules(land_id: str, current_user: dict = Depends(get_current_principal), page: dict = Depends(page_params)):
     """Get all crop schedules for a land"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view schedules")
     
-    print(f"🔍 Fetching schedules for land_id: {land_id}, farmer_id: {current_user['id']}")
-    
-    schedules = await crop_schedules_collection.find(
-        {"land_id": land_id, "farmer_id": current_user["id"]}, {"_id": 0}
-    ).to_list(100)
+    result = await paginate(
+        crop_schedules_collection, {"land_id": land_id, "farmer_id": current_user["id"]}, {"_id": 0}, page
+    )
     
-    print(f"📋 Found {len(schedules)} schedules:")
-    for schedule in schedules:
-        print(f"  - {schedule.get('crop_name', 'Unknown')} (ID: {schedule.get('id', 'no-id')}, Stage: {schedule.get('current_stage', 'no-stage')}, Start: {schedule.get('start_date', 'no-date')}, Created: {schedule.get('created_at', 'no-created')})")
+    logger.debug("📋 Found %s schedules for land %s", len(result["items"]), land_id)
+    if logger.isEnabledFor(logging.DEBUG):
+        for schedule in result["items"]:
+            logger.debug(
+                "  - %s (ID: %s, Stage: %s, Start: %s, Created: %s)",
+                schedule.get("crop_name", "Unknown"), schedule.get("id", "no-id"), schedule.get("current_stage", "no-stage"),
+                schedule.get("start_date", "no-date"), schedule.get("created_at", "no-created")
+            )
         
-    return schedules
+    return result
 
 @app.put("/api/crop-schedules/{schedule_id}/progress")
-async def update_crop_progress(schedule_id: str, days_elapsed: int, current_stage: str, current_user: dict = Depends(get_current_user)):
+async def update_crop_progress(schedule_id: str, days_elapsed: int, current_stage: str, current_user: dict = Depends(get_current_principal)):
     """Update crop progress"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can update progress")
     
     result = await crop_schedules_collection.update_one(
-        {"id": schedule_id},
+        {"id": schedule_id, "farmer_id": current_user["id"]},
         {"$set": {"days_elapsed": days_elapsed, "current_stage": current_stage}}
     )
     
-    if result.modified_count == 0:
+    if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Schedule not found")
     
     return {"message": "Progress updated successfully"}
 
 @app.put("/api/crop-schedules/{schedule_id}/task-action")
-async def update_task_action(schedule_id: str, request: dict, current_user: dict = Depends(get_current_user)):
+async def update_task_action(schedule_id: str, request: dict, current_user: dict = Depends(get_current_principal)):
     """Update task action (done/skip)"""
-    print(f"🔄 TASK ACTION ENDPOINT CALLED:")
-    print(f"   - Schedule ID: {schedule_id}")
-    print(f"   - Request body: {request}")
-    print(f"   - User ID: {current_user['id']}")
-    print(f"   - User type: {current_user['user_type']}")
-    
     if current_user["user_type"] != "farmer":
-        print(f"❌ Access denied - user is not a farmer")
         raise HTTPException(status_code=403, detail="Only farmers can update task actions")
     
     try:
-        task_index = request.get("task_index")
+        task_id = request.get("task_id")
+        task_index = request.get("task_index")  # older clients address tasks by position
         action = request.get("action")  # 'done' or 'skip'
         
-        print(f"🔄 TASK ACTION UPDATE:")
-        print(f"   - Schedule ID: {schedule_id}")
-        print(f"   - Task Index: {task_index}")
-        print(f"   - Action: {action}")
-        print(f"   - User ID: {current_user['id']}")
-        
-        if task_index is None or action not in ['done', 'skip']:
-            print(f"❌ Invalid parameters: task_index={task_index}, action={action}")
-            raise HTTPException(status_code=400, detail="Invalid task index or action")
-        
-        # Get user's lands first
-        print(f"🔍 Finding user's lands...")
-        user_lands = await lands_collection.find({"farmer_id": current_user["id"]}, {"id": 1}).to_list(100)
-        print(f"   - User has {len(user_lands)} lands")
-        land_ids = [land["id"] for land in user_lands]
-        print(f"   - Land IDs: {land_ids}")
-        
-        # Get the current schedule
-        print(f"🔍 Looking for schedule with ID: {schedule_id}")
-        schedule = await crop_schedules_collection.find_one({
-            "id": schedule_id, 
-            "land_id": {"$in": land_ids}
-        })
+        logger.debug("🔄 Task action on schedule %s: task_id=%s task_index=%s action=%s", schedule_id, task_id, task_index, action)
         
-        if not schedule:
-            print(f"❌ Schedule not found: {schedule_id}")
-            print(f"   - Available schedules for user:")
-            all_schedules = await crop_schedules_collection.find({"land_id": {"$in": land_ids}}).to_list(100)
-            for s in all_schedules:
-                print(f"     - {s.get('crop_name', 'Unknown')} (ID: {s.get('id', 'no-id')}, Land: {s.get('land_id', 'no-land')})")
-            raise HTTPException(status_code=404, detail="Schedule not found")
+        if (task_id is None and not isinstance(task_index, int)) or action not in TASK_ACTIONS:
+            logger.warning("⚠️ Invalid parameters: task_id=%s, task_index=%s, action=%s", task_id, task_index, action)
+            raise HTTPException(status_code=400, detail="Invalid task or action")
         
-        print(f"✅ Found schedule: {schedule['crop_name']} with {len(schedule['schedule'])} tasks")
-        print(f"   - Schedule land_id: {schedule.get('land_id')}")
-        print(f"   - Schedule farmer_id: {schedule.get('farmer_id')}")
-        
-        # Update the specific task
-        if 0 <= task_index < len(schedule["schedule"]):
-            old_task = schedule["schedule"][task_index]
-            print(f"📋 Updating task: {old_task['task']} (Day {old_task['day']})")
-            print(f"   - Before: completed={old_task.get('completed', False)}, skipped={old_task.get('skipped', False)}")
-            print(f"   - Action: {action}")
-            print(f"   - Task structure: {old_task}")
-            
-            # Update the task
-            if action == "done":
-                schedule["schedule"][task_index]["completed"] = True
-                schedule["schedule"][task_index]["skipped"] = False
-            elif action == "skip":
-                schedule["schedule"][task_index]["completed"] = False
-                schedule["schedule"][task_index]["skipped"] = True
-            
-            schedule["schedule"][task_index]["completed_at"] = datetime.utcnow().isoformat()
-            
-            updated_task = schedule["schedule"][task_index]
-            print(f"   - After: completed={updated_task.get('completed', False)}, skipped={updated_task.get('skipped', False)}")
-            print(f"   - Updated task structure: {updated_task}")
-            
-            # Check if this is a temporary disease task that should be removed
-            if updated_task.get("temporary") and updated_task.get("disease_related") and (updated_task.get("completed") or updated_task.get("skipped")):
-                print(f"🗑️  Removing temporary disease task: {updated_task['task']}")
-                # Remove the completed/skipped temporary disease task
-                schedule["schedule"].pop(task_index)
-                print(f"   - Removed temporary disease task, remaining tasks: {len(schedule['schedule'])}")
-            
-            # Update the schedule in database
-            print(f"🔄 Updating database with schedule ID: {schedule_id}")
-            result = await crop_schedules_collection.update_one(
-                {"id": schedule_id},
-                {"$set": {"schedule": schedule["schedule"]}}
-            )
-            
-            print(f"   - Database update result: modified_count={result.modified_count}")
-            
-            if result.modified_count > 0:
-                print(f"✅ Task successfully marked as {action}")
-                return {"message": f"Task marked as {action}"}
-            else:
-                print(f"❌ Database update failed - no documents modified")
-                raise HTTPException(status_code=500, detail="Failed to update task")
+        # One in-place write on the task; no read of the schedule first
+        schedule_query = {"id": schedule_id, "farmer_id": current_user["id"]}
+        if task_id is not None:
+            outcome = await apply_task_action(crop_schedules_collection, schedule_query, task_id, action)
         else:
-            print(f"❌ Invalid task index: {task_index} (schedule has {len(schedule['schedule'])} tasks)")
-            raise HTTPException(status_code=400, detail="Invalid task index")
+            outcome = "updated" if await apply_task_action_at(crop_schedules_collection, schedule_query, task_index, action) else None
+        
+        if outcome is None:
+            logger.warning("⚠️ Task not found in schedule %s", schedule_id)
+            raise HTTPException(status_code=404, detail="Task not found")
         
+        if outcome == "removed":
+            logger.debug("🗑️  Removed temporary disease task %s", task_id)
+        logger.info("✅ Task successfully marked as %s", action)
+        return {"message": f"Task marked as {action}"}
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Error updating task action: {e}")
+        logger.error("❌ Error updating task action: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/api/crop-planning-history/{land_id}")
-async def get_crop_planning_history(land_id: str, current_user: dict = Depends(get_current_user)):
+async def get_crop_planning_history(land_id: str, current_user: dict = Depends(get_current_principal), page: dict = Depends(page_params)):
     """Get crop planning history for a land"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view planning history")
     
-    history = await crop_planning_history_collection.find(
-        {"land_id": land_id, "farmer_id": current_user["id"]}, {"_id": 0}
-    ).sort("created_at", -1).to_list(20)
-    
-    return history
+    return await paginate(
+        crop_planning_history_collection, {"land_id": land_id, "farmer_id": current_user["id"]}, {"_id": 0}, page
+    )
 
 @app.get("/api/check-existing-schedule")
 async def check_existing_schedule(
@@ -1791,14 +2040,14 @@ async def check_existing_schedule(
     crop_name: str,
     soil_type: str,
     season: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Check if a schedule already exists for the given parameters"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can check schedules")
     
     try:
-        print(f"🔍 Checking for existing schedule: land_id={land_id}, crop_name={crop_name}, farmer_id={current_user['id']}")
+        logger.debug("🔍 Checking for existing schedule: land_id=%s, crop_name=%s, farmer_id=%s", land_id, crop_name, current_user['id'])
         
         # Look for existing schedule with matching parameters
         existing_schedule = await crop_schedules_collection.find_one({
@@ -1808,7 +2057,7 @@ async def check_existing_schedule(
         })
         
         if existing_schedule:
-            print(f"✅ Found existing schedule: {existing_schedule.get('id', 'no-id')}")
+            logger.debug("✅ Found existing schedule: %s", existing_schedule.get('id', 'no-id'))
             # Convert ObjectId to string for JSON serialization
             existing_schedule['_id'] = str(existing_schedule['_id'])
             
@@ -1818,7 +2067,7 @@ async def check_existing_schedule(
                 "message": f"Found existing schedule for {crop_name}"
             }
         else:
-            print(f"❌ No existing schedule found")
+            logger.debug("No existing schedule found")
             return {
                 "exists": False,
                 "message": f"No existing schedule found for {crop_name}"
@@ -1828,15 +2077,12 @@ async def check_existing_schedule(
         raise HTTPException(status_code=500, detail=f"Error checking existing schedule: {str(e)}")
 
 @app.get("/api/crop-schedules/{schedule_id}/complete")
-async def get_complete_schedule(schedule_id: str, current_user: dict = Depends(get_current_user)):
+async def get_complete_schedule(schedule_id: str, current_user: dict = Depends(get_current_principal)):
     """Get complete schedule with all tasks"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view schedules")
     
-    schedule = await crop_schedules_collection.find_one({
-        "id": schedule_id,
-        "land_id": {"$in": [land["id"] for land in await lands_collection.find({"farmer_id": current_user["id"]}, {"id": 1}).to_list(100)]}
-    })
+    schedule = await crop_schedules_collection.find_one({"id": schedule_id, "farmer_id": current_user["id"]})
     
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
@@ -1850,7 +2096,7 @@ async def get_complete_schedule(schedule_id: str, current_user: dict = Depends(g
 @app.post("/api/save-schedule")
 async def save_schedule(
     request: dict,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Activate an existing schedule (mark as active and deactivate others)"""
     if current_user["user_type"] != "farmer":
@@ -1861,16 +2107,12 @@ async def save_schedule(
         crop_name = request.get("crop_name")
         request_id = request.get("request_id", "unknown")
         
-        print(f"🔍 ACTIVATE SCHEDULE CALLED:")
-        print(f"   - Request ID: {request_id}")
-        print(f"   - Land ID: {land_id}")
-        print(f"   - Crop: {crop_name}")
-        print(f"   - Timestamp: {datetime.now()}")
+        logger.info("🔍 Activating schedule: request_id=%s land_id=%s crop=%s", request_id, land_id, crop_name)
         
         # Check if this request_id has already been processed
         existing_activation = await crop_schedules_collection.find_one({"request_id": request_id})
         if existing_activation:
-            print(f"⚠️  Duplicate request_id detected: {request_id}")
+            logger.warning("⚠️  Duplicate request_id detected: %s", request_id)
             return {"message": "Schedule already activated", "schedule_id": str(existing_activation["_id"])}
         
         # Validate required fields
@@ -1883,7 +2125,7 @@ async def save_schedule(
             raise HTTPException(status_code=404, detail="Land not found")
         
         # Find the most recent schedule for this crop and land
-        print(f"🔍 Finding most recent schedule for {crop_name} on land {land_id}")
+        logger.debug("🔍 Finding most recent schedule for %s on land %s", crop_name, land_id)
         target_schedule = await crop_schedules_collection.find_one(
             {
                 "land_id": land_id,
@@ -1894,60 +2136,45 @@ async def save_schedule(
         )
         
         if not target_schedule:
-            print(f"❌ No schedule found for {crop_name} on land {land_id}")
+            logger.warning("⚠️ No schedule found for %s on land %s", crop_name, land_id)
             raise HTTPException(status_code=404, detail="No schedule found for this crop and land")
         
-        print(f"✅ Found schedule: {target_schedule['_id']} (created: {target_schedule['created_at']})")
+        logger.debug("✅ Found schedule: %s (created: %s)", target_schedule['_id'], target_schedule['created_at'])
         
         # Get activation option from request
         activation_option = request.get("activation_option", "fresh")
-        print(f"🔄 Activation option: {activation_option}")
+        logger.debug("🔄 Activation option: %s", activation_option)
         
         # Handle task reset based on activation option
         if activation_option == "continue":
             # Keep existing task states but remove any temporary disease tasks
-            print(f"🔄 Continue option: Keeping existing task states, removing temporary disease tasks")
-            if "schedule" in target_schedule and target_schedule["schedule"]:
-                # Remove temporary disease tasks
-                original_count = len(target_schedule["schedule"])
-                target_schedule["schedule"] = [
-                    task for task in target_schedule["schedule"] 
-                    if not (task.get("temporary") and task.get("disease_related"))
-                ]
-                removed_count = original_count - len(target_schedule["schedule"])
-                if removed_count > 0:
-                    print(f"🗑️  Removed {removed_count} temporary disease tasks")
-                    await crop_schedules_collection.update_one(
-                        {"_id": target_schedule["_id"]},
-                        {"$set": {"schedule": target_schedule["schedule"]}}
-                    )
+            logger.debug("🔄 Continue option: Keeping existing task states, removing temporary disease tasks")
+            result = await crop_schedules_collection.update_one(
+                {"_id": target_schedule["_id"]},
+                {"$pull": {"schedule": TEMPORARY_DISEASE_TASK}}
+            )
+            if result.modified_count > 0:
+                logger.debug("🗑️  Removed temporary disease tasks")
         else:
             # Fresh cycle - reset all tasks and remove temporary disease tasks
-            print(f"🔄 Fresh option: Resetting all tasks, removing temporary disease tasks")
-            if "schedule" in target_schedule and target_schedule["schedule"]:
-                reset_schedule = []
-                for task in target_schedule["schedule"]:
-                    # Skip temporary disease tasks
-                    if task.get("temporary") and task.get("disease_related"):
-                        continue
-                    
-                    reset_task = {
-                        **task,
-                        "completed": False,
-                        "skipped": False,
-                        "completed_at": None
-                    }
-                    reset_schedule.append(reset_task)
-                
-                # Update the schedule with reset tasks (excluding temporary disease tasks)
+            logger.debug("🔄 Fresh option: Resetting all tasks, removing temporary disease tasks")
+            if target_schedule.get("schedule"):
+                await crop_schedules_collection.update_one(
+                    {"_id": target_schedule["_id"]},
+                    {"$pull": {"schedule": TEMPORARY_DISEASE_TASK}}
+                )
                 await crop_schedules_collection.update_one(
                     {"_id": target_schedule["_id"]},
-                    {"$set": {"schedule": reset_schedule}}
+                    {"$set": {
+                        "schedule.$[].completed": False,
+                        "schedule.$[].skipped": False,
+                        "schedule.$[].completed_at": None
+                    }}
                 )
-                print(f"✅ Reset {len(reset_schedule)} tasks (removed temporary disease tasks)")
+                logger.debug("✅ Reset tasks (removed temporary disease tasks)")
         
         # Mark all existing schedules for this land as inactive
-        print(f"🔄 Marking ALL schedules as inactive for land_id: {land_id}")
+        logger.debug("🔄 Marking ALL schedules as inactive for land_id: %s", land_id)
         update_result = await crop_schedules_collection.update_many(
             {
                 "land_id": land_id,
@@ -1955,10 +2182,10 @@ async def save_schedule(
             },
             {"$set": {"active": False}}
         )
-        print(f"✅ Marked {update_result.modified_count} schedules as inactive")
+        logger.debug("✅ Marked %s schedules as inactive", update_result.modified_count)
         
         # Mark the target schedule as active
-        print(f"🔄 Activating schedule: {target_schedule['_id']}")
+        logger.debug("🔄 Activating schedule: %s", target_schedule['_id'])
         
         # Set start_date if not already set
         update_data = {
@@ -1970,7 +2197,7 @@ async def save_schedule(
         # If start_date is not set, set it to current date
         if not target_schedule.get("start_date"):
             update_data["start_date"] = datetime.utcnow()
-            print(f"📅 Setting start_date to current date: {update_data['start_date']}")
+            logger.debug("📅 Setting start_date to current date: %s", update_data['start_date'])
         
         # If end_date is not set, calculate it as start_date + 90 days
         if not target_schedule.get("end_date"):
@@ -1979,7 +2206,7 @@ async def save_schedule(
                 from datetime import timedelta
                 end_date = start_date + timedelta(days=90)
                 update_data["end_date"] = end_date
-                print(f"📅 Setting end_date to: {end_date}")
+                logger.debug("📅 Setting end_date to: %s", end_date)
         
         result = await crop_schedules_collection.update_one(
             {"_id": target_schedule["_id"]},
@@ -1989,7 +2216,7 @@ async def save_schedule(
         if result.modified_count == 0:
             raise HTTPException(status_code=500, detail="Failed to activate schedule")
         
-        print(f"✅ Successfully activated schedule for {crop_name}")
+        logger.info("✅ Successfully activated schedule for %s", crop_name)
         
         return {
             "message": "Schedule activated successfully",
@@ -1999,23 +2226,19 @@ async def save_schedule(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error activating schedule: {e}")
+        logger.error("❌ Error activating schedule: %s", e)
         raise HTTPException(status_code=500, detail="Failed to activate schedule")
 
 @app.get("/api/alerts")
-async def get_alerts(current_user: dict = Depends(get_current_user)):
-    """Get all alerts for the current user"""
+async def get_alerts(current_user: dict = Depends(get_current_principal), page: dict = Depends(page_params)):
+    """Get alerts for the current user, newest first"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view alerts")
     
-    alerts = await alerts_collection.find(
-        {"farmer_id": current_user["id"]}, {"_id": 0}
-    ).sort("created_at", -1).to_list(50)
-    
-    return alerts
+    return await paginate(alerts_collection, {"farmer_id": current_user["id"]}, {"_id": 0}, page)
 
 @app.put("/api/alerts/{alert_id}/read")
-async def mark_alert_read(alert_id: str, current_user: dict = Depends(get_current_user)):
+async def mark_alert_read(alert_id: str, current_user: dict = Depends(get_current_principal)):
     """Mark an alert as read"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can update alerts")
@@ -2031,7 +2254,7 @@ async def mark_alert_read(alert_id: str, current_user: dict = Depends(get_curren
     return {"message": "Alert marked as read"}
 
 @app.delete("/api/alerts/{alert_id}")
-async def delete_alert(alert_id: str, current_user: dict = Depends(get_current_user)):
+async def delete_alert(alert_id: str, current_user: dict = Depends(get_current_principal)):
     """Delete an alert"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can delete alerts")
@@ -2064,59 +2287,80 @@ class AIChatRequest(BaseModel):
     message: str
     land_id: Optional[str] = None
 
+AI_CHAT_ERROR_MESSAGE = "I'm sorry, I'm having trouble processing your request right now. Please try again later."
+
+async def build_ai_chat_messages(request: AIChatRequest, current_user: dict) -> List[Dict[str, str]]:
+    # Get context if land_id is provided
+    context = ""
+    if request.land_id:
+        land = await lands_collection.find_one({"id": request.land_id, "farmer_id": current_user["id"]})
+        if land:
+            weather_data = await get_weather_data(land["location"]["lat"], land["location"]["lng"])
+            context = f"""
+            Context about your farm:
+            - Land: {land['name']} ({land['size']} acres)
+            - Soil Type: {land['soil_type']}
+            - Current Weather: {weather_data['temperature']}°C, {weather_data['humidity']}% humidity
+            - Weather Description: {weather_data['description']}
+            """
+    
+    prompt = f"""
+    You are an expert agricultural AI assistant. Answer the following farming question with practical, actionable advice.
+    
+    {context}
+    
+    Question: {request.message}
+    
+    Provide a helpful, detailed response with specific recommendations when possible.
+    """
+    
+    return [
+        {"role": "system", "content": "You are an expert agricultural AI assistant. Provide practical, actionable farming advice."},
+        {"role": "user", "content": prompt}
+    ]
+
 @app.post("/api/ai-chat")
-async def ai_chat(request: AIChatRequest, current_user: dict = Depends(get_current_user)):
+async def ai_chat(request: AIChatRequest, current_user: dict = Depends(get_current_principal)):
     """AI chat assistant for farming questions"""
     try:
-        # Get context if land_id is provided
-        context = ""
-        if request.land_id:
-            land = await lands_collection.find_one({"id": request.land_id, "farmer_id": current_user["id"]})
-            if land:
-                weather_data = await get_weather_data(land["location"]["lat"], land["location"]["lng"])
-                context = f"""
-                Context about your farm:
-                - Land: {land['name']} ({land['size']} acres)
-                - Soil Type: {land['soil_type']}
-                - Current Weather: {weather_data['temperature']}°C, {weather_data['humidity']}% humidity
-                - Weather Description: {weather_data['description']}
-                """
-        
-        prompt = f"""
-        You are an expert agricultural AI assistant. Answer the following farming question with practical, actionable advice.
-        
-        {context}
-        
-        Question: {request.message}
-        
-        Provide a helpful, detailed response with specific recommendations when possible.
-        """
-        
-        # Initialize ChatGPT client
-        client = get_chatgpt_client()
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert agricultural AI assistant. Provide practical, actionable farming advice."},
-                {"role": "user", "content": prompt}
-            ],
+        response_text = await llm_gateway.complete(
+            messages=await build_ai_chat_messages(request, current_user),
             temperature=0.7,
             max_tokens=1000
         )
         
-        return {"response": response.choices[0].message.content}
+        return {"response": response_text}
         
     except Exception as e:
-        print(f"AI chat error: {e}")
-        return {"response": "I'm sorry, I'm having trouble processing your request right now. Please try again later."}
+        logger.error("AI chat error: %s", e)
+        return {"response": AI_CHAT_ERROR_MESSAGE}
+
+@app.post("/api/ai-chat/stream")
+async def ai_chat_stream(request: AIChatRequest, http_request: Request, current_user: dict = Depends(get_current_principal)):
+    """AI chat assistant, streamed as Server-Sent Events (token ... done)"""
+    async def events():
+        try:
+            messages = await build_ai_chat_messages(request, current_user)
+            # aclosing: returning early closes the upstream completion right away
+            async with aclosing(llm_gateway.stream(messages=messages, temperature=0.7, max_tokens=1000)) as tokens:
+                async for token in tokens:
+                    if await http_request.is_disconnected():
+                        logger.info("🔌 AI chat client disconnected, cancelling completion")
+                        return
+                    yield sse_event("token", {"content": token})
+            yield sse_event("done", {})
+        except Exception as e:
+            logger.error("AI chat stream error: %s", e)
+            yield sse_event("error", {"message": AI_CHAT_ERROR_MESSAGE})
+    
+    return sse_response(events())
 
 # ============================================================================
 # CULTIVATION CYCLE MANAGEMENT ENDPOINTS
 # ============================================================================
 
 @app.post("/api/cultivation-cycles")
-async def create_cultivation_cycle(request: dict, current_user: dict = Depends(get_current_user)):
+async def create_cultivation_cycle(request: dict, current_user: dict = Depends(get_current_principal)):
     """Create a new cultivation cycle"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can create cultivation cycles")
@@ -2145,11 +2389,18 @@ async def create_cultivation_cycle(request: dict, current_user: dict = Depends(g
         weather_data = await get_weather_data(land["location"]["lat"], land["location"]["lng"])
         
         # Get next cycle version for this land/crop combination
-        existing_cycles = await cultivation_cycles_collection.find(
-            {"land_id": land_id, "crop_name": crop_name, "farmer_id": current_user["id"]}
-        ).to_list(100)
+        async def latest_version() -> int:
+            # Only runs the first time; the counter continues from existing cycles
+            latest = await cultivation_cycles_collection.find_one(
+                {"land_id": land_id, "crop_name": crop_name, "farmer_id": current_user["id"]},
+                {"_id": 0, "cycle_version": 1},
+                sort=[("cycle_version", -1)]
+            )
+            return latest.get("cycle_version", 0) if latest else 0
         
-        next_version = max([cycle.get("cycle_version", 0) for cycle in existing_cycles], default=0) + 1
+        next_version = await next_value(
+            counters_collection, cycle_version_sequence(land_id, crop_name), start=latest_version
+        )
         
         # Create cultivation cycle
         cycle = CultivationCycle(
@@ -2164,59 +2415,69 @@ async def create_cultivation_cycle(request: dict, current_user: dict = Depends(g
             weather_conditions=weather_data
         )
         
-        # Save cycle to database
         cycle_data = cycle.model_dump()
-        await cultivation_cycles_collection.insert_one(cycle_data)
         
-        # Generate tasks for this cycle
+        # Build every task before writing anything, so a failed schedule
+        # generation leaves nothing behind
         if parent_cycle_id and use_again_option != "fresh":
             # Get parent cycle tasks
             parent_tasks = await cycle_tasks_collection.find(
-                {"cycle_id": parent_cycle_id}
-            ).to_list(100)
+                {"cycle_id": parent_cycle_id, "farmer_id": current_user["id"]},
+                {"_id": 0, "day": 1, "phase": 1, "task": 1, "description": 1, "priority": 1,
+                 "completed": 1, "skipped": 1, "completed_at": 1}
+            ).sort("day", 1).to_list(None)
             
             # Process tasks based on use_again_option
-            new_tasks = []
-            for task in parent_tasks:
-                new_task = CycleTask(
-                    cycle_id=cycle.id,
-                    day=task["day"],
-                    phase=task["phase"],
-                    task=task["task"],
-                    description=task["description"],
-                    priority=task["priority"],
-                    completed=use_again_option == "continue" and task.get("completed", False),
-                    skipped=use_again_option == "continue" and task.get("skipped", False),
-                    completed_at=use_again_option == "continue" and task.get("completed_at")
-                )
-                new_tasks.append(new_task.model_dump())
+            carry_over = use_again_option == "continue"
+            task_fields = [
+                {
+                    "day": task["day"],
+                    "phase": task["phase"],
+                    "task": task["task"],
+                    "description": task["description"],
+                    "priority": task["priority"],
+                    "completed": carry_over and task.get("completed", False),
+                    "skipped": carry_over and task.get("skipped", False),
+                    "completed_at": task.get("completed_at") if carry_over else None
+                }
+                for task in parent_tasks
+            ]
         else:
             # Generate new tasks
-            schedule = await generate_crop_schedule(crop_name, start_datetime, soil_type, weather_data)
-            new_tasks = []
-            for task in schedule:
-                cycle_task = CycleTask(
-                    cycle_id=cycle.id,
-                    day=task.day,
-                    phase=task.phase,
-                    task=task.task,
-                    description=task.description,
-                    priority=task.priority
+            schedule = await generate_crop_schedule(crop_name, start_datetime, soil_type, weather_data, bool(request.get("regenerate", False)))
+            task_fields = [
+                {"day": task.day, "phase": task.phase, "task": task.task, "description": task.description, "priority": task.priority}
+                for task in schedule
+            ]
+        
+        # Validate the whole batch in one pass
+        new_tasks = cycle_tasks_adapter.dump_python(cycle_tasks_adapter.validate_python(
+            [{**fields, "cycle_id": cycle.id, "farmer_id": current_user["id"]} for fields in task_fields]
+        ))
+        
+        async def write_cycle(session):
+            await cultivation_cycles_collection.insert_one(dict(cycle_data), session=session)
+            if new_tasks:
+                # Copies, since insert_many adds _id and with_transaction may retry
+                await cycle_tasks_collection.insert_many(
+                    [dict(task) for task in new_tasks], ordered=False, session=session
                 )
-                new_tasks.append(cycle_task.model_dump())
+            # Update crop schedule to link to this cycle
+            await crop_schedules_collection.update_one(
+                {"land_id": land_id, "crop_name": crop_name, "farmer_id": current_user["id"]},
+                {"$set": {"current_cycle_id": cycle.id, "active": True}},
+                upsert=True,
+                session=session
+            )
         
-        # Save tasks to database
-        if new_tasks:
-            await cycle_tasks_collection.insert_many(new_tasks)
+        async def remove_cycle():
+            await cycle_tasks_collection.delete_many({"cycle_id": cycle.id})
+            await cultivation_cycles_collection.delete_one({"id": cycle.id})
         
-        # Update crop schedule to link to this cycle
-        await crop_schedules_collection.update_one(
-            {"land_id": land_id, "crop_name": crop_name, "farmer_id": current_user["id"]},
-            {"$set": {"current_cycle_id": cycle.id, "active": True}},
-            upsert=True
-        )
+        # Cycle, tasks and schedule link are written together or not at all
+        await run_in_transaction(client, write_cycle, undo=remove_cycle)
         
-        print(f"✅ Created cultivation cycle: {cycle.id} (version {next_version})")
+        logger.info("✅ Created cultivation cycle: %s (version %s)", cycle.id, next_version)
         
         return {
             "message": "Cultivation cycle created successfully",
@@ -2226,46 +2487,72 @@ async def create_cultivation_cycle(request: dict, current_user: dict = Depends(g
         }
         
     except Exception as e:
-        print(f"❌ Error creating cultivation cycle: {e}")
+        logger.error("❌ Error creating cultivation cycle: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create cultivation cycle: {str(e)}")
 
+def cycles_with_progress_pipeline(match: dict, limit: int = 100) -> List[dict]:
+    """Aggregation returning matching cycles (newest first) with task_count,
+    completed_count and progress_percentage joined from cycle_tasks"""
+    return [
+        {"$match": match},
+        {"$sort": {"created_at": -1, "id": -1}},
+        {"$limit": limit},
+        {"$lookup": {
+            "from": cycle_tasks_collection.name,
+            "localField": "id",
+            "foreignField": "cycle_id",
+            "pipeline": [
+                {"$group": {
+                    "_id": None,
+                    "task_count": {"$sum": 1},
+                    "completed_count": {"$sum": {"$cond": [{"$eq": ["$completed", True]}, 1, 0]}}
+                }}
+            ],
+            "as": "task_stats"
+        }},
+        {"$addFields": {
+            "task_count": {"$ifNull": [{"$first": "$task_stats.task_count"}, 0]},
+            "completed_count": {"$ifNull": [{"$first": "$task_stats.completed_count"}, 0]}
+        }},
+        {"$addFields": {
+            "progress_percentage": {"$cond": [
+                {"$gt": ["$task_count", 0]},
+                {"$multiply": [{"$divide": ["$completed_count", "$task_count"]}, 100]},
+                0
+            ]}
+        }},
+        {"$project": {"_id": 0, "task_stats": 0}}
+    ]
+
 @app.get("/api/cultivation-cycles/{land_id}")
-async def get_cultivation_cycles(land_id: str, current_user: dict = Depends(get_current_user)):
+async def get_cultivation_cycles(land_id: str, current_user: dict = Depends(get_current_principal), page: dict = Depends(page_params)):
     """Get all cultivation cycles for a land"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view cultivation cycles")
     
+    limit = page["limit"]
+    match = keyset_filter({"land_id": land_id, "farmer_id": current_user["id"]}, page["cursor"])
+    
     try:
         # Verify land ownership
         land = await lands_collection.find_one({"id": land_id, "farmer_id": current_user["id"]})
         if not land:
             raise HTTPException(status_code=404, detail="Land not found")
         
-        # Get all cycles for this land
-        cycles = await cultivation_cycles_collection.find(
-            {"land_id": land_id, "farmer_id": current_user["id"]},
-            {"_id": 0}
-        ).sort([("created_at", -1)]).to_list(100)
-        
-        # Get task counts for each cycle
-        for cycle in cycles:
-            task_count = await cycle_tasks_collection.count_documents({"cycle_id": cycle["id"]})
-            completed_count = await cycle_tasks_collection.count_documents({
-                "cycle_id": cycle["id"],
-                "completed": True
-            })
-            cycle["task_count"] = task_count
-            cycle["completed_count"] = completed_count
-            cycle["progress_percentage"] = (completed_count / task_count * 100) if task_count > 0 else 0
+        # Get one page of cycles for this land with their task counts in one query
+        cursor = await cultivation_cycles_collection.aggregate(
+            cycles_with_progress_pipeline(match, limit=limit + 1)
+        )
+        cycles = await cursor.to_list(limit + 1)
         
-        return cycles
+        return page_envelope(cycles, limit)
         
     except Exception as e:
-        print(f"❌ Error fetching cultivation cycles: {e}")
+        logger.error("❌ Error fetching cultivation cycles: %s", e)
         raise HTTPException(status_code=500, detail="Failed to fetch cultivation cycles")
 
 @app.get("/api/cultivation-cycles/{cycle_id}/tasks")
-async def get_cycle_tasks(cycle_id: str, current_user: dict = Depends(get_current_user)):
+async def get_cycle_tasks(cycle_id: str, current_user: dict = Depends(get_current_principal)):
     """Get all tasks for a specific cultivation cycle"""
     if current_user["user_type"] != "farmer":
         raise HTTPException(status_code=403, detail="Only farmers can view cycle tasks")
@@ -2275,13 +2562,13 @@ async def get_cycle_tasks(cycle_id: str, current_user: dict = Depends(get_curren
         cycle = await cultivation_cycles_collection.find_one({
             "id": cycle_id,
             "farmer_id": current_user["id"]
-        })
+        }, {"_id": 0})
         if not cycle:
             raise HTTPException(status_code=404, detail="Cultivation cycle not found")
         
         # Get tasks for this cycle
         tasks = await cycle_tasks_collection.find(
-            {"cycle_id": cycle_id},
+            {"cycle_id": cycle_id, "farmer_id": current_user["id"]},
             {"_id": 0}
         ).sort("day").to_list(100)
         
@@ -2291,7 +2578,7 @@ async def get_cycle_tasks(cycle_id: str, current_user: dict = Depends(get_curren
         }
         
     except Exception as e:
-        print(f"❌ Error fetching cycle tasks: {e}")
+        logger.error("❌ Error fetching cycle tasks: %s", e)
         raise HTTPException(status_code=500, detail="Failed to fetch cycle tasks")
 
 @app.put("/api/cultivation-cycles/{cycle_id}/tasks/{task_id}")
@@ -2299,7 +2586,7 @@ async def update_cycle_task(
     cycle_id: str, 
     task_id: str, 
     request: dict, 
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Update a task in a cultivation cycle"""
     if current_user["user_type"] != "farmer":
@@ -2311,50 +2598,71 @@ async def update_cycle_task(
         if action not in ["done", "skip"]:
             raise HTTPException(status_code=400, detail="Invalid action")
         
-        # Verify cycle ownership
-        cycle = await cultivation_cycles_collection.find_one({
-            "id": cycle_id,
-            "farmer_id": current_user["id"]
-        })
-        if not cycle:
-            raise HTTPException(status_code=404, detail="Cultivation cycle not found")
-        
-        # Update task
-        update_data = {}
-        if action == "done":
-            update_data = {
-                "completed": True,
-                "skipped": False,
-                "completed_at": datetime.utcnow().isoformat()
-            }
-        elif action == "skip":
-            update_data = {
-                "completed": False,
-                "skipped": True,
-                "completed_at": None
-            }
-        
+        # Update task (the owner is checked by the same query)
         result = await cycle_tasks_collection.update_one(
-            {"id": task_id, "cycle_id": cycle_id},
-            {"$set": update_data}
+            {"id": task_id, "cycle_id": cycle_id, "farmer_id": current_user["id"]},
+            {"$set": cycle_task_fields(action, action_time(None))}
         )
         
-        if result.modified_count == 0:
+        if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Task not found")
         
-        print(f"✅ Updated cycle task: {task_id} - {action}")
+        logger.info("✅ Updated cycle task: %s - %s", task_id, action)
         
         return {"message": f"Task marked as {action}"}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Error updating cycle task: {e}")
+        logger.error("❌ Error updating cycle task: %s", e)
         raise HTTPException(status_code=500, detail="Failed to update task")
 
+@app.post("/api/task-actions")
+async def bulk_task_actions(request: BulkTaskActionRequest, current_user: dict = Depends(get_current_principal)):
+    """Apply many Done/Skip actions on schedule and cycle tasks at once.
+
+    Meant for replaying an offline queue: each item is reported separately
+    ("applied", "superseded" by a newer action, "not_found" or "invalid"),
+    and replaying the same items again is harmless.
+    """
+    if current_user["user_type"] != "farmer":
+        raise HTTPException(status_code=403, detail="Only farmers can update tasks")
+    if len(request.actions) > MAX_BULK_TASK_ACTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_TASK_ACTIONS} actions per request")
+    
+    statuses, schedule_items, cycle_items = {}, [], []
+    for index, item in enumerate(request.actions):
+        entry = {"index": index, "task_id": item.task_id, "action": item.action, "acted_at": action_time(item.acted_at)}
+        if item.action not in TASK_ACTIONS or bool(item.schedule_id) == bool(item.cycle_id):
+            statuses[index] = "invalid"
+        elif item.schedule_id:
+            schedule_items.append({**entry, "schedule_id": item.schedule_id})
+        else:
+            cycle_items.append({**entry, "cycle_id": item.cycle_id})
+    
+    try:
+        # One read and one bulk_write per collection
+        if schedule_items:
+            statuses.update(await bulk_schedule_task_actions(crop_schedules_collection, current_user["id"], schedule_items))
+        if cycle_items:
+            statuses.update(await bulk_cycle_task_actions(cycle_tasks_collection, current_user["id"], cycle_items))
+    except Exception as e:
+        logger.error("❌ Error applying bulk task actions: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to update tasks")
+    
+    results = [
+        {"index": index, "client_id": item.client_id, "status": statuses[index]}
+        for index, item in enumerate(request.actions)
+    ]
+    applied = sum(1 for result in results if result["status"] == "applied")
+    logger.info("✅ Bulk task actions: %s/%s applied", applied, len(results))
+    return {"results": results, "applied": applied}
+
 @app.put("/api/cultivation-cycles/{cycle_id}/status")
 async def update_cycle_status(
     cycle_id: str, 
     request: dict, 
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Update cultivation cycle status"""
     if current_user["user_type"] != "farmer":
@@ -2391,19 +2699,19 @@ async def update_cycle_status(
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Cycle not found")
         
-        print(f"✅ Updated cycle status: {cycle_id} - {status}")
+        logger.info("✅ Updated cycle status: %s - %s", cycle_id, status)
         
         return {"message": f"Cycle status updated to {status}"}
         
     except Exception as e:
-        print(f"❌ Error updating cycle status: {e}")
+        logger.error("❌ Error updating cycle status: %s", e)
         raise HTTPException(status_code=500, detail="Failed to update cycle status")
 
 @app.post("/api/cultivation-cycles/{cycle_id}/clone")
 async def clone_cultivation_cycle(
     cycle_id: str, 
     request: dict, 
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Clone a cultivation cycle (Use Again functionality)"""
     if current_user["user_type"] != "farmer":
@@ -2439,13 +2747,13 @@ async def clone_cultivation_cycle(
         return await create_cultivation_cycle(new_cycle_request, current_user)
         
     except Exception as e:
-        print(f"❌ Error cloning cultivation cycle: {e}")
+        logger.error("❌ Error cloning cultivation cycle: %s", e)
         raise HTTPException(status_code=500, detail="Failed to clone cultivation cycle")
 
 @app.post("/api/disease-management-plan")
 async def create_disease_management_plan(
     request: dict,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Create a disease management plan from AI recommendations"""
     if current_user["user_type"] != "farmer":
@@ -2503,7 +2811,7 @@ async def create_disease_management_plan(
             crop_schedule_id=plan_data["id"]
         )
         
-        print(f"✅ Created disease management plan: {plan_data['id']} for {crop_name}")
+        logger.info("✅ Created disease management plan: %s for %s", plan_data['id'], crop_name)
         
         return {
             "message": "Disease management plan created successfully",
@@ -2513,13 +2821,13 @@ async def create_disease_management_plan(
         }
         
     except Exception as e:
-        print(f"❌ Error creating disease management plan: {e}")
+        logger.error("❌ Error creating disease management plan: %s", e)
         raise HTTPException(status_code=500, detail="Failed to create disease management plan")
 
 @app.post("/api/integrate-disease-tasks")
 async def integrate_disease_tasks(
     request: dict,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """Integrate disease management tasks into existing crop schedule"""
     if current_user["user_type"] != "farmer":
@@ -2535,23 +2843,12 @@ async def integrate_disease_tasks(
         if not all([schedule_id, disease_tasks, diagnosis]):
             raise HTTPException(status_code=400, detail="Missing required fields")
         
-        # Find the existing schedule
-        existing_schedule = await crop_schedules_collection.find_one({
-            "id": schedule_id,
-            "farmer_id": current_user["id"]
-        })
-        
-        if not existing_schedule:
-            raise HTTPException(status_code=404, detail="Schedule not found")
-        
-        # Get existing tasks
-        existing_tasks = existing_schedule.get("schedule", [])
-        
         # Add disease tasks as immediate high-priority tasks (day 0 = immediate)
         disease_tasks_with_days = []
         for i, task in enumerate(disease_tasks):
             disease_task = {
                 **task,
+                "id": task.get("id") or str(uuid.uuid4()),
                 "day": 0,  # Day 0 = immediate action required
                 "phase": "Disease Management",
                 "priority": "High",  # Disease tasks are high priority
@@ -2563,28 +2860,28 @@ async def integrate_disease_tasks(
             }
             disease_tasks_with_days.append(disease_task)
         
-        # Insert disease tasks at the beginning (immediate priority)
-        updated_schedule = disease_tasks_with_days + existing_tasks
-        
-        # Update the schedule
-        result = await crop_schedules_collection.update_one(
-            {"id": schedule_id},
+        # Insert disease tasks at the beginning (immediate priority) in place,
+        # so task actions made meanwhile are not overwritten
+        existing_schedule = await crop_schedules_collection.find_one_and_update(
+            {"id": schedule_id, "farmer_id": current_user["id"]},
             {
-                "$set": {
-                    "schedule": updated_schedule,
-                    "disease_alerts": existing_schedule.get("disease_alerts", []) + [{
+                "$push": {
+                    "schedule": {"$each": disease_tasks_with_days, "$position": 0},
+                    "disease_alerts": {
                         "diagnosis": diagnosis,
                         "confidence": confidence,
                         "tasks_added": len(disease_tasks_with_days),
                         "added_at": datetime.utcnow()
-                    }],
-                    "updated_at": datetime.utcnow()
-                }
-            }
+                    }
+                },
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            projection={"_id": 0, "crop_name": 1, "land_id": 1, "schedule.id": 1},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count == 0:
-            raise HTTPException(status_code=404, detail="Failed to update schedule")
+        if not existing_schedule:
+            raise HTTPException(status_code=404, detail="Schedule not found")
         
         # Create alert for disease task integration
         await create_alert(
@@ -2597,29 +2894,29 @@ async def integrate_disease_tasks(
             crop_schedule_id=schedule_id
         )
         
-        print(f"✅ Integrated {len(disease_tasks_with_days)} disease tasks into schedule: {schedule_id}")
+        logger.info("✅ Integrated %s disease tasks into schedule: %s", len(disease_tasks_with_days), schedule_id)
         
         return {
             "message": "Disease tasks integrated successfully",
             "schedule_id": schedule_id,
             "crop_name": existing_schedule["crop_name"],
             "tasks_added": len(disease_tasks_with_days),
-            "total_tasks": len(updated_schedule)
+            "total_tasks": len(existing_schedule["schedule"])
         }
         
     except Exception as e:
-        print(f"❌ Error integrating disease tasks: {e}")
+        logger.error("❌ Error integrating disease tasks: %s", e)
         raise HTTPException(status_code=500, detail="Failed to integrate disease tasks")
 
 # Growth Monitoring API Endpoints
 
 @app.get("/api/growth-data/{schedule_id}")
-async def get_growth_data(schedule_id: str, current_user: dict = Depends(get_current_user)):
+async def get_growth_data(schedule_id: str, current_user: dict = Depends(get_current_principal)):
     """Get growth monitoring data for a specific crop schedule"""
     try:
         # Check if growth data exists
         # Handle both UUID and ObjectId formats
-        growth_query = {}
+        growth_query = {"farmer_id": current_user["id"]}
         try:
             growth_query["schedule_id"] = ObjectId(schedule_id)
         except:
@@ -2630,7 +2927,7 @@ async def get_growth_data(schedule_id: str, current_user: dict = Depends(get_cur
         if not growth_data:
             # Create initial growth data based on schedule
             # Handle both UUID and ObjectId formats
-            schedule_query = {}
+            schedule_query = {"farmer_id": current_user["id"]}
             try:
                 schedule_query["_id"] = ObjectId(schedule_id)
             except:
@@ -2667,7 +2964,7 @@ async def get_growth_data(schedule_id: str, current_user: dict = Depends(get_cur
                 if land and land.get("location"):
                     weather_data = await get_weather_data(land["location"]["lat"], land["location"]["lng"])
             except Exception as e:
-                print(f"Error fetching weather data: {e}")
+                logger.error("Error fetching weather data: %s", e)
             
             # Generate AI recommendations
             recommendations = await generate_growth_recommendations(
@@ -2708,19 +3005,22 @@ async def get_growth_data(schedule_id: str, current_user: dict = Depends(get_cur
         
         # Remove MongoDB ObjectId
         growth_data["_id"] = str(growth_data["_id"])
+        # The photo history only needs thumbnails
+        list_view(growth_data.get("photos", []))
         return growth_data
         
     except Exception as e:
-        print(f"Error in get_growth_data: {e}")
+        logger.error("Error in get_growth_data: %s", e)
         raise HTTPException(status_code=500, detail="Failed to fetch growth data")
 
 @app.post("/api/analyze-growth-photo")
-async def analyze_growth_photo(request: GrowthPhotoAnalysis, current_user: dict = Depends(get_current_user)):
+async def analyze_growth_photo(request: GrowthPhotoAnalysis, current_user: dict = Depends(get_current_principal)):
     """Analyze a growth photo using AI"""
     try:
         # Get the active schedule for this land
         schedule = await crop_schedules_collection.find_one({
             "land_id": request.land_id,
+            "farmer_id": current_user["id"],
             "active": True
         })
         
@@ -2748,24 +3048,26 @@ async def analyze_growth_photo(request: GrowthPhotoAnalysis, current_user: dict
         # Add photo to growth data
         photo_data = {
             "id": str(uuid.uuid4()),
-            "image_base64": request.image_base64,
+            "image": await store_image_base64(request.image_base64, blobs_collection),
             "analysis_result": analysis_result,
             "captured_at": datetime.utcnow().isoformat()
         }
         
         await growth_data_collection.update_one(
-            {"schedule_id": schedule["id"]},
+            {"schedule_id": schedule["id"], "farmer_id": current_user["id"]},
             {"$push": {"photos": photo_data}, "$set": {"updated_at": datetime.utcnow()}}
         )
         
         return analysis_result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in analyze_growth_photo: {e}")
+        logger.error("Error in analyze_growth_photo: %s", e)
         raise HTTPException(status_code=500, detail="Failed to analyze photo")
 
 @app.post("/api/update-growth-measurements")
-async def update_growth_measurements(schedule_id: str, request: dict, current_user: dict = Depends(get_current_user)):
+async def update_growth_measurements(schedule_id: str, request: dict, current_user: dict = Depends(get_current_principal)):
     """Update growth measurements manually"""
     try:
         measurement = {
@@ -2778,18 +3080,18 @@ async def update_growth_measurements(schedule_id: str, request: dict, current_us
         }
         
         await growth_data_collection.update_one(
-            {"schedule_id": schedule_id},
+            {"schedule_id": schedule_id, "farmer_id": current_user["id"]},
             {"$push": {"measurements": measurement}, "$set": {"updated_at": datetime.utcnow()}}
         )
         
         return {"message": "Measurements updated successfully"}
         
     except Exception as e:
-        print(f"Error in update_growth_measurements: {e}")
+        logger.error("Error in update_growth_measurements: %s", e)
         raise HTTPException(status_code=500, detail="Failed to update measurements")
 
 @app.post("/api/analyze-yield")
-async def analyze_yield(request: YieldAnalysisRequest, current_user: dict = Depends(get_current_user)):
+async def analyze_yield(request: YieldAnalysisRequest, current_user: dict = Depends(get_current_principal)):
     """Analyze yield potential and provide AI recommendations based on user feedback"""
     try:
         # Get current schedule
@@ -2823,8 +3125,6 @@ async def analyze_yield(request: YieldAnalysisRequest, current_user: dict = Depe
         weather_data = await get_weather_data(land["location"]["lat"], land["location"]["lng"])
         
         # Generate AI yield analysis with ChatGPT
-        client = get_chatgpt_client()
-        
         yield_prompt = f"""
         You are an expert agricultural AI assistant. Analyze the yield potential and provide comprehensive recommendations.
 
@@ -2884,20 +3184,17 @@ async def analyze_yield(request: YieldAnalysisRequest, current_user: dict = Depe
         """
         
         try:
-            response = await client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            ai_response = await llm_gateway.complete(
                 messages=[{"role": "user", "content": yield_prompt}],
                 temperature=0.7,
                 max_tokens=2000
             )
-            
-            ai_response = response.choices[0].message.content
             analysis_data = json.loads(ai_response)
             
             return analysis_data
             
         except Exception as e:
-            print(f"ChatGPT API error: {e}")
+            logger.error("ChatGPT API error: %s", e)
             # Fallback analysis
             return {
                 "yield_gap": {
@@ -2944,30 +3241,22 @@ async def analyze_yield(request: YieldAnalysisRequest, current_user: dict = Depe
                 ]
             }
             
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Yield analysis error: {e}")
+        logger.error("Yield analysis error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to analyze yield: {str(e)}")
 
 @app.post("/api/ai-farm-analysis")
-async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict = Depends(get_current_user)):
+async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict = Depends(get_current_principal)):
     """
     Comprehensive AI analysis of current farm state with dynamic questions and predictions
     """
     try:
         # Log incoming request data
-        print("=" * 80)
-        print("📥 INCOMING AI FARM ANALYSIS REQUEST:")
-        print("=" * 80)
-        print(f"Land ID: {request.land_id}")
-        print(f"Schedule ID: {request.schedule_id}")
-        print(f"Current Observations: {request.current_observations}")
-        print(f"Pesticide Usage: {request.pesticide_usage}")
-        print(f"Additional Notes: {request.additional_notes}")
-        print(f"Crop Data: {json.dumps(request.crop_data, indent=2) if request.crop_data else 'None'}")
-        print(f"Schedule Data: {json.dumps(request.schedule_data, indent=2) if request.schedule_data else 'None'}")
-        print(f"Weather Data: {json.dumps(request.weather_data, indent=2) if request.weather_data else 'None'}")
-        print(f"Growth Measurements: {json.dumps(request.growth_measurements, indent=2) if request.growth_measurements else 'None'}")
-        print("=" * 80)
+        logger.info("📥 AI farm analysis request: land_id=%s schedule_id=%s", request.land_id, request.schedule_id)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📥 AI farm analysis payload: %s", json.dumps(request.model_dump(), indent=2, default=str))
         
         # Get current schedule and land data
         # Handle both UUID and ObjectId formats
@@ -3031,8 +3320,6 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
         }
         
         # Generate AI analysis with ChatGPT
-        client = get_chatgpt_client()
-        
         analysis_prompt = f"""
         Analyze this farm data and provide insights in JSON format:
 
@@ -3103,33 +3390,22 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
         """
         
         # Log the complete prompt for debugging
-        print("=" * 80)
-        print("🤖 CHATGPT PROMPT BEING SENT:")
-        print("=" * 80)
-        print(analysis_prompt)
-        print("=" * 80)
-        print("📊 DATA BEING SENT TO CHATGPT:")
-        print(f"Current State: {json.dumps(current_state, indent=2)}")
-        print(f"Schedule Data: {json.dumps(request.schedule_data, indent=2) if request.schedule_data else 'None'}")
-        print(f"Weather Data: {json.dumps(request.weather_data, indent=2) if request.weather_data else 'None'}")
-        print(f"Growth Measurements: {json.dumps(request.growth_measurements, indent=2) if request.growth_measurements else 'None'}")
-        print("=" * 80)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🤖 Prompt being sent:\n%s", analysis_prompt)
+            logger.debug("📊 Current state: %s", json.dumps(current_state, indent=2, default=str))
         
         try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            ai_response = await llm_gateway.complete(
                 messages=[{"role": "user", "content": analysis_prompt}],
                 temperature=0.7,
                 max_tokens=2000
             )
-            
-            ai_response = response.choices[0].message.content
-            print(f"🤖 AI Response: {ai_response}")
+            logger.debug("🤖 AI Response: %s", ai_response)
             
             try:
                 analysis_data = json.loads(ai_response)
             except json.JSONDecodeError:
-                print("❌ AI returned non-JSON response, using fallback")
+                logger.warning("⚠️ AI returned non-JSON response, using fallback")
                 analysis_data = {}
             
             # Ensure yield estimation has percentage
@@ -3169,12 +3445,12 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
                     "expected_range": f"Yield calculated from health score ({health_score}%) and risk assessment ({risk_level})"
                 }
             
-            print(f"📊 Final yield estimation: {yield_estimation}")
+            logger.debug("📊 Final yield estimation: %s", yield_estimation)
             
             # Ensure we have multiple action items
             action_items = analysis_data.get("action_items", [])
             if len(action_items) < 2:
-                print(f"⚠️ AI returned only {len(action_items)} action items, adding fallback recommendations")
+                logger.warning("⚠️ AI returned only %s action items, adding fallback recommendations", len(action_items))
                 # Add fallback recommendations if AI didn't provide enough
                 fallback_items = [
                     {
@@ -3196,7 +3472,7 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
                     if fallback["title"].lower() not in existing_titles:
                         action_items.append(fallback)
             
-            print(f"📋 Final action items count: {len(action_items)}")
+            logger.debug("📋 Final action items count: %s", len(action_items))
             
             return {
                 "current_state": current_state,
@@ -3211,7 +3487,7 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
             }
             
         except Exception as e:
-            print(f"ChatGPT API error: {e}")
+            logger.error("ChatGPT API error: %s", e)
             # Retry with a simpler prompt if the first one fails
             try:
                 retry_prompt = f"""
@@ -3281,20 +3557,17 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
                 }}
                 """
                 
-                retry_response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
+                retry_response_text = await llm_gateway.complete(
                     messages=[{"role": "user", "content": retry_prompt}],
                     temperature=0.5,
                     max_tokens=1500
                 )
-                
-                retry_response_text = retry_response.choices[0].message.content
-                print(f"🔄 Retry AI Response: {retry_response_text}")
+                logger.debug("🔄 Retry AI Response: %s", retry_response_text)
                 
                 try:
                     retry_data = json.loads(retry_response_text)
                 except json.JSONDecodeError:
-                    print("❌ Retry also returned non-JSON response, using fallback")
+                    logger.warning("⚠️ Retry also returned non-JSON response, using fallback")
                     retry_data = {}
                 
                 # Ensure yield estimation has percentage for retry too
@@ -3334,12 +3607,12 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
                         "expected_range": f"Yield calculated from health score ({health_score}%) and risk assessment ({risk_level})"
                     }
                 
-                print(f"🔄 Final retry yield estimation: {retry_yield_estimation}")
+                logger.debug("🔄 Final retry yield estimation: %s", retry_yield_estimation)
                 
                 # Ensure we have multiple action items for retry too
                 retry_action_items = retry_data.get("action_items", [])
                 if len(retry_action_items) < 2:
-                    print(f"⚠️ Retry AI returned only {len(retry_action_items)} action items, adding fallback recommendations")
+                    logger.warning("⚠️ Retry AI returned only %s action items, adding fallback recommendations", len(retry_action_items))
                     # Add fallback recommendations if AI didn't provide enough
                     fallback_items = [
                         {
@@ -3361,7 +3634,7 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
                         if fallback["title"].lower() not in existing_titles:
                             retry_action_items.append(fallback)
                 
-                print(f"📋 Retry final action items count: {len(retry_action_items)}")
+                logger.debug("📋 Retry final action items count: %s", len(retry_action_items))
                 
                 return {
                     "current_state": current_state,
@@ -3375,13 +3648,106 @@ async def ai_farm_analysis(request: AIFarmAnalysisRequest, current_user: dict =
                 }
                 
             except Exception as retry_error:
-                print(f"Retry also failed: {retry_error}")
+                logger.error("Retry also failed: %s", retry_error)
                 raise HTTPException(status_code=500, detail="AI analysis failed. Please try again.")
             
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"AI farm analysis error: {e}")
+        logger.error("AI farm analysis error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to analyze farm state: {str(e)}")
 
+# Background jobs: the long AI analyses above can also be queued, so the result
+# is kept even if the client's connection drops while the model is working
+JOB_WAIT_MAX_SECONDS = 30
+
+async def run_ai_farm_analysis_job(payload: Dict[str, Any], owner: Dict[str, Any]):
+    return await ai_farm_analysis(AIFarmAnalysisRequest(**payload), owner)
+
+async def run_analyze_yield_job(payload: Dict[str, Any], owner: Dict[str, Any]):
+    return await analyze_yield(YieldAnalysisRequest(**payload), owner)
+
+async def run_plant_plan_job(payload: Dict[str, Any], owner: Dict[str, Any]):
+    return await create_plant_plan(PlantPlanRequest(**payload), owner)
+
+job_queue.register("ai_farm_analysis", run_ai_farm_analysis_job, concurrency=4)
+job_queue.register("analyze_yield", run_analyze_yield_job, concurrency=4)
+job_queue.register("plant_plan", run_plant_plan_job, concurrency=2)
+
+async def submit_job(job_type: str, request: BaseModel, current_user: dict, idempotency_key: Optional[str]) -> dict:
+    job = await job_queue.submit(job_type, request.model_dump(), current_user, idempotency_key)
+    return public_job(job)
+
+@app.post("/api/jobs/ai-farm-analysis", status_code=202)
+async def submit_ai_farm_analysis(
+    request: AIFarmAnalysisRequest,
+    current_user: dict = Depends(get_current_principal),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Queue /api/ai-farm-analysis; poll /api/jobs/{id} for the result"""
+    return await submit_job("ai_farm_analysis", request, current_user, idempotency_key)
+
+@app.post("/api/jobs/analyze-yield", status_code=202)
+async def submit_analyze_yield(
+    request: YieldAnalysisRequest,
+    current_user: dict = Depends(get_current_principal),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Queue /api/analyze-yield; poll /api/jobs/{id} for the result"""
+    return await submit_job("analyze_yield", request, current_user, idempotency_key)
+
+@app.post("/api/jobs/plant-plan", status_code=202)
+async def submit_plant_plan(
+    request: PlantPlanRequest,
+    current_user: dict = Depends(get_current_principal),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Queue /api/plant-plan; poll /api/jobs/{id} for the result"""
+    if current_user["user_type"] != "farmer":
+        raise HTTPException(status_code=403, detail="Only farmers can create plant plans")
+    return await submit_job("plant_plan", request, current_user, idempotency_key)
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0, current_user: dict = Depends(get_current_principal)):
+    """Job status and result. With ?wait=N, hold the request up to N seconds until the job finishes."""
+    job = await job_queue.get(job_id, current_user["id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    deadline = asyncio.get_running_loop().time() + max(0, min(wait, JOB_WAIT_MAX_SECONDS))
+    while job["status"] not in FINISHED:
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            break
+        job = await job_queue.wait(job_id, current_user["id"], remaining)
+        if not job:
+            # Expired or deleted while we waited
+            raise HTTPException(status_code=404, detail="Job not found")
+    return public_job(job)
+
+@app.get("/api/jobs/{job_id}/events")
+async def get_job_events(job_id: str, current_user: dict = Depends(get_current_principal)):
+    """Server-Sent Events: a `status` event on every state change, ending once the job finishes"""
+    job = await job_queue.get(job_id, current_user["id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        current, last_sent = job, None
+        while True:
+            state = (current["status"], current["attempts"])
+            if state != last_sent:
+                yield sse_event("status", public_job(current))
+                last_sent = state
+            if current["status"] in FINISHED:
+                return
+            current = await job_queue.wait(job_id, current_user["id"], JOB_WAIT_MAX_SECONDS)
+            if not current:
+                yield sse_event("error", {"message": "Job not found"})
+                return
+    
+    return sse_response(events())
+
 class AIQuestionResponseRequest(BaseModel):
     schedule_id: str
     responses: List[AIQuestionResponse]
@@ -3389,7 +3755,7 @@ class AIQuestionResponseRequest(BaseModel):
 @app.post("/api/ai-question-response")
 async def ai_question_response(
     request: AIQuestionResponseRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_principal)
 ):
     """
     Process AI question responses and provide updated analysis
@@ -3416,8 +3782,6 @@ async def ai_question_response(
         ])
         
         # Generate updated analysis with responses
-        client = get_chatgpt_client()
-        
         update_prompt = f"""
         Based on the farmer's responses to our questions, provide updated analysis and recommendations.
 
@@ -3464,14 +3828,11 @@ async def ai_question_response(
         """
         
         try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            ai_response = await llm_gateway.complete(
                 messages=[{"role": "user", "content": update_prompt}],
                 temperature=0.7,
                 max_tokens=1500
             )
-            
-            ai_response = response.choices[0].message.content
             update_data = json.loads(ai_response)
             
             return {
@@ -3483,7 +3844,7 @@ async def ai_question_response(
             }
             
         except Exception as e:
-            print(f"ChatGPT API error in question response: {e}")
+            logger.error("ChatGPT API error in question response: %s", e)
             return {
                 "updated_recommendations": [
                     {
@@ -3507,7 +3868,7 @@ async def ai_question_response(
             }
             
     except Exception as e:
-        print(f"AI question response error: {e}")
+        logger.error("AI question response error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to process responses: {str(e)}")
 
 # Helper functions for growth monitoring
@@ -3604,9 +3965,7 @@ async def generate_growth_recommendations(days_elapsed: int, health_score: int,
         """
         
         # Get ChatGPT response
-        client = get_chatgpt_client()
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        ai_response = await llm_gateway.complete(
             messages=[
                 {"role": "system", "content": "You are an expert agricultural AI assistant. Provide specific, actionable farming recommendations based on crop data. Always return valid JSON format."},
                 {"role": "user", "content": prompt}
@@ -3616,7 +3975,7 @@ async def generate_growth_recommendations(days_elapsed: int, health_score: int,
         )
         
         # Parse AI response
-        ai_response = response.choices[0].message.content.strip()
+        ai_response = ai_response.strip()
         
         # Extract JSON from response
         try:
@@ -3630,13 +3989,13 @@ async def generate_growth_recommendations(days_elapsed: int, health_score: int,
             else:
                 raise ValueError("No JSON found in response")
         except (json.JSONDecodeError, ValueError) as e:
-            print(f"Error parsing AI response: {e}")
-            print(f"AI Response: {ai_response}")
+            logger.error("Error parsing AI response: %s", e)
+            logger.debug("AI Response: %s", ai_response)
             # Fallback to basic recommendations
             return generate_fallback_recommendations(days_elapsed, health_score, crop_name)
             
     except Exception as e:
-        print(f"Error generating AI recommendations: {e}")
+        logger.error("Error generating AI recommendations: %s", e)
         return generate_fallback_recommendations(days_elapsed, health_score, crop_name)
 
 def generate_fallback_recommendations(days_elapsed: int, health_score: int, crop_name: str) -> List[Dict[str, str]]:
@@ -3748,4 +4107,4 @@ def generate_growth_trends(days_elapsed: int, progress: float) -> Dict[str, str]
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=PORT, log_config=None)
\ No newline at end of file
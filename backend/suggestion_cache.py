@@ -0,0 +1,167 @@
+"""Two-tier cache for AI crop suggestions.
+
+Suggestions are keyed on a normalized agronomic context: coordinates snapped
+to a grid, soil type, season, and temperature/humidity rounded down to
+buckets. Nearby farms with the same conditions share one LLM answer.
+
+Entries live in an in-process LRU (per worker) in front of a MongoDB
+collection that a TTL index on `expires_at` cleans up. An entry is served
+as-is until `fresh_until`; after that it is still served, and one background
+task per key refreshes it. Once `expires_at` passes, the entry is gone and
+the next request waits for a new answer.
+
+Tune with:
+    SUGGESTION_GRID_DEGREES            coordinate grid (default 0.1, ~11 km)
+    SUGGESTION_TEMPERATURE_BUCKET      °C per temperature bucket (default 2)
+    SUGGESTION_HUMIDITY_BUCKET         % per humidity bucket (default 10)
+    SUGGESTION_CACHE_FRESH_SECONDS     serve without refreshing (default 6 h)
+    SUGGESTION_CACHE_TTL_SECONDS       hard expiry (default 7 days)
+    SUGGESTION_CACHE_MAX_ENTRIES       in-process LRU size (default 2000)
+"""
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ttl_cache import TTLCache
+from weather_service import snap_to_grid
+from metrics import record_cache
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SUGGESTION_GRID_DEGREES = float(os.environ.get("SUGGESTION_GRID_DEGREES", 0.1))
+SUGGESTION_TEMPERATURE_BUCKET = float(os.environ.get("SUGGESTION_TEMPERATURE_BUCKET", 2))
+SUGGESTION_HUMIDITY_BUCKET = float(os.environ.get("SUGGESTION_HUMIDITY_BUCKET", 10))
+SUGGESTION_CACHE_FRESH_SECONDS = float(os.environ.get("SUGGESTION_CACHE_FRESH_SECONDS", 6 * 3600))
+SUGGESTION_CACHE_TTL_SECONDS = float(os.environ.get("SUGGESTION_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+SUGGESTION_CACHE_MAX_ENTRIES = int(os.environ.get("SUGGESTION_CACHE_MAX_ENTRIES", 2000))
+
+# Loader returns the suggestions to cache, or None if they should not be cached (fallbacks)
+Loader = Callable[[], Awaitable[Optional[List[dict]]]]
+
+
+def _bucket(value: float, size: float) -> float:
+    return round((value // size) * size, 2) if size > 0 else value
+
+
+def suggestion_context(lat: float, lng: float, soil_type: str, season: str, temperature: float, humidity: float) -> Dict[str, Any]:
+    """Normalized context a cached answer applies to"""
+    snapped_lat, snapped_lng = snap_to_grid(lat, lng, SUGGESTION_GRID_DEGREES)
+    return {
+        "lat": snapped_lat,
+        "lng": snapped_lng,
+        "soil_type": soil_type.strip().lower(),
+        "season": season.strip().lower(),
+        "temperature": _bucket(temperature, SUGGESTION_TEMPERATURE_BUCKET),
+        "humidity": _bucket(humidity, SUGGESTION_HUMIDITY_BUCKET),
+    }
+
+
+def context_key(context: Dict[str, Any]) -> str:
+    return "|".join(str(context[field]) for field in ("lat", "lng", "soil_type", "season", "temperature", "humidity"))
+
+
+class SuggestionCache:
+    def __init__(
+        self,
+        fresh_seconds: float = SUGGESTION_CACHE_FRESH_SECONDS,
+        ttl_seconds: float = SUGGESTION_CACHE_TTL_SECONDS,
+        max_entries: int = SUGGESTION_CACHE_MAX_ENTRIES,
+    ):
+        self.fresh_seconds = fresh_seconds
+        self.ttl_seconds = ttl_seconds
+        self._local = TTLCache(max_entries=max_entries, ttl=ttl_seconds)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    async def get_or_load(self, collection, context: Dict[str, Any], loader: Loader) -> Optional[List[dict]]:
+        """Cached suggestions for a context, loading (once per key) on a miss"""
+        key = context_key(context)
+        entry = await self._lookup(collection, key)
+        if entry is not None:
+            if entry["fresh_until"] <= datetime.utcnow():
+                record_cache("crop_suggestions", "stale")
+                self._refresh_in_background(collection, key, context, loader)
+            else:
+                record_cache("crop_suggestions", "hit")
+            return entry["suggestions"]
+
+        record_cache("crop_suggestions", "miss")
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load_and_store(collection, key, context, loader))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(inflight)
+
+    async def _lookup(self, collection, key: str) -> Optional[dict]:
+        entry = self._local.get(key)
+        if entry is not None:
+            return entry
+        try:
+            doc = await collection.find_one({"_id": key})
+        except Exception as e:
+            logger.error("❌ Suggestion cache read failed: %s", e)
+            return None
+        # The TTL monitor only runs once a minute, so check expiry here too
+        if doc is None or doc["expires_at"] <= datetime.utcnow():
+            return None
+        self._remember(key, doc)
+        return doc
+
+    def _remember(self, key: str, doc: dict):
+        remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+        if remaining > 0:
+            self._local.set(key, {
+                "suggestions": doc["suggestions"],
+                "fresh_until": doc["fresh_until"],
+                "expires_at": doc["expires_at"],
+            }, ttl=remaining)
+
+    async def _load_and_store(self, collection, key: str, context: Dict[str, Any], loader: Loader) -> Optional[List[dict]]:
+        suggestions = await loader()
+        if suggestions is None:
+            return None
+        now = datetime.utcnow()
+        doc = {
+            "_id": key,
+            "context": context,
+            "suggestions": suggestions,
+            "created_at": now,
+            "fresh_until": now + timedelta(seconds=self.fresh_seconds),
+            "expires_at": now + timedelta(seconds=self.ttl_seconds),
+        }
+        self._remember(key, doc)
+        try:
+            await collection.replace_one({"_id": key}, doc, upsert=True)
+        except Exception as e:
+            logger.error("❌ Suggestion cache write failed: %s", e)
+        return suggestions
+
+    def _refresh_in_background(self, collection, key: str, context: Dict[str, Any], loader: Loader):
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(collection, key, context, loader))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, collection, key: str, context: Dict[str, Any], loader: Loader):
+        try:
+            # Another worker may already have refreshed the shared entry
+            doc = await collection.find_one({"_id": key})
+            if doc is not None and doc["fresh_until"] > datetime.utcnow():
+                self._remember(key, doc)
+                return
+            await self._load_and_store(collection, key, context, loader)
+            logger.info("🔄 Refreshed crop suggestions for %s", key)
+        except Exception as e:
+            logger.error("❌ Background suggestion refresh failed for %s: %s", key, e)
+
+    def clear(self):
+        self._local.clear()
+
+
+# Shared suggestion cache
+suggestion_cache = SuggestionCache()
@@ -0,0 +1,57 @@
+"""Multi-document transactions, with a fallback for standalone MongoDB.
+
+Transactions need a replica set or mongos; a standalone mongod (the usual
+local setup) rejects them with IllegalOperation. run_in_transaction then
+remembers that, runs the writes without a session and, if they fail, calls
+`undo` to remove whatever was written, so callers get all-or-nothing either
+way. Set MONGO_TRANSACTIONS=off to skip the attempt.
+"""
+import os
+from typing import Any, Awaitable, Callable, Optional
+
+from pymongo.errors import OperationFailure
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+MONGO_TRANSACTIONS = os.environ.get("MONGO_TRANSACTIONS", "auto").lower()
+ILLEGAL_OPERATION = 20
+
+# None until the first transaction tells us whether the deployment supports them
+_transactions_supported: Optional[bool] = False if MONGO_TRANSACTIONS == "off" else None
+
+
+async def run_in_transaction(
+    client,
+    write: Callable[[Any], Awaitable[Any]],
+    undo: Optional[Callable[[], Awaitable[None]]] = None
+) -> Any:
+    """Run write(session) in a transaction and return its result.
+
+    write must pass `session` to every operation and may run more than once
+    (with_transaction retries transient errors). Without transaction support
+    it gets session=None, and undo() runs if it raises.
+    """
+    global _transactions_supported
+    if _transactions_supported is not False:
+        try:
+            async with client.start_session() as session:
+                result = await session.with_transaction(write)
+            _transactions_supported = True
+            return result
+        except OperationFailure as e:
+            if _transactions_supported or e.code != ILLEGAL_OPERATION:
+                raise
+            _transactions_supported = False
+            logger.warning("⚠️ MongoDB does not support transactions (%s); writing without them", e)
+
+    try:
+        return await write(None)
+    except Exception:
+        if undo is not None:
+            try:
+                await undo()
+            except Exception as cleanup_error:
+                logger.error("❌ Failed to clean up after a failed write: %s", cleanup_error)
+        raise
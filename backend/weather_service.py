@@ -0,0 +1,189 @@
+import os
+import time
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import aiohttp
+
+from ttl_cache import TTLCache
+from metrics import record_cache, record_dependency
+
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Weather API Configuration - Using Open-Meteo (Completely Free)
+# Point this at fake_weather_server.py (e.g. http://127.0.0.1:8012/v1) to run offline
+WEATHER_BASE_URL = os.environ.get("WEATHER_BASE_URL", "https://api.open-meteo.com/v1")
+# Coordinates are snapped to this grid (in degrees) before lookup; 0.05° is roughly 5 km
+WEATHER_GRID_DEGREES = float(os.environ.get("WEATHER_GRID_DEGREES", 0.05))
+WEATHER_CACHE_TTL_SECONDS = float(os.environ.get("WEATHER_CACHE_TTL_SECONDS", 600))
+WEATHER_CACHE_MAX_ENTRIES = int(os.environ.get("WEATHER_CACHE_MAX_ENTRIES", 5000))
+WEATHER_REQUEST_TIMEOUT_SECONDS = float(os.environ.get("WEATHER_REQUEST_TIMEOUT_SECONDS", 10))
+WEATHER_MAX_CONNECTIONS = int(os.environ.get("WEATHER_MAX_CONNECTIONS", 20))
+
+
+def get_weather_info_from_code(code: int) -> dict:
+    """Convert Open-Meteo weather codes to descriptions and icons"""
+    weather_codes = {
+        0: {"description": "Clear sky", "icon": "01d"},
+        1: {"description": "Mainly clear", "icon": "02d"},
+        2: {"description": "Partly cloudy", "icon": "03d"},
+        3: {"description": "Overcast", "icon": "04d"},
+        45: {"description": "Foggy", "icon": "50d"},
+        48: {"description": "Depositing rime fog", "icon": "50d"},
+        51: {"description": "Light drizzle", "icon": "09d"},
+        53: {"description": "Moderate drizzle", "icon": "09d"},
+        55: {"description": "Dense drizzle", "icon": "09d"},
+        56: {"description": "Light freezing drizzle", "icon": "13d"},
+        57: {"description": "Dense freezing drizzle", "icon": "13d"},
+        61: {"description": "Slight rain", "icon": "10d"},
+        63: {"description": "Moderate rain", "icon": "10d"},
+        65: {"description": "Heavy rain", "icon": "10d"},
+        66: {"description": "Light freezing rain", "icon": "13d"},
+        67: {"description": "Heavy freezing rain", "icon": "13d"},
+        71: {"description": "Slight snow", "icon": "13d"},
+        73: {"description": "Moderate snow", "icon": "13d"},
+        75: {"description": "Heavy snow", "icon": "13d"},
+        77: {"description": "Snow grains", "icon": "13d"},
+        80: {"description": "Slight rain showers", "icon": "09d"},
+        81: {"description": "Moderate rain showers", "icon": "09d"},
+        82: {"description": "Violent rain showers", "icon": "09d"},
+        85: {"description": "Slight snow showers", "icon": "13d"},
+        86: {"description": "Heavy snow showers", "icon": "13d"},
+        95: {"description": "Thunderstorm", "icon": "11d"},
+        96: {"description": "Thunderstorm with slight hail", "icon": "11d"},
+        99: {"description": "Thunderstorm with heavy hail", "icon": "11d"}
+    }
+
+    return weather_codes.get(code, {"description": "Unknown", "icon": "01d"})
+
+
+def get_fallback_weather_data() -> dict:
+    """Return fallback weather data when API fails"""
+    return {
+        "temperature": 25.0,
+        "humidity": 65,
+        "pressure": 1013,
+        "wind_speed": 5.0,
+        "wind_direction": 180,
+        "description": "Partly cloudy",
+        "icon": "02d",
+        "timestamp": datetime.utcnow()
+    }
+
+
+def snap_to_grid(lat: float, lng: float, grid: float = WEATHER_GRID_DEGREES) -> Tuple[float, float]:
+    """Snap a coordinate to the centre of its weather grid cell"""
+    if grid <= 0:
+        return (round(lat, 4), round(lng, 4))
+    snapped_lat = (int(lat // grid) + 0.5) * grid
+    snapped_lng = (int(lng // grid) + 0.5) * grid
+    return (round(snapped_lat, 4), round(snapped_lng, 4))
+
+
+class WeatherService:
+    """Current-conditions lookups with grid-snapped caching.
+
+    Nearby coordinates share one grid cell and one cache entry, concurrent
+    misses for the same cell share one upstream request, and all requests go
+    through a single long-lived aiohttp connection pool.
+    """
+
+    def __init__(
+        self,
+        grid: float = WEATHER_GRID_DEGREES,
+        ttl: float = WEATHER_CACHE_TTL_SECONDS,
+        max_entries: int = WEATHER_CACHE_MAX_ENTRIES,
+        base_url: str = WEATHER_BASE_URL,
+    ):
+        self.grid = grid
+        self.base_url = base_url
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        self._inflight: Dict[Tuple[float, float], asyncio.Future] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=WEATHER_MAX_CONNECTIONS, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=WEATHER_REQUEST_TIMEOUT_SECONDS),
+            )
+        return self._session
+
+    async def get_current(self, lat: float, lng: float) -> dict:
+        """Current weather for the grid cell containing (lat, lng)"""
+        cell = snap_to_grid(lat, lng, self.grid)
+
+        cached = self._cache.get(cell)
+        if cached is not None:
+            record_cache("weather", "hit")
+            return dict(cached)
+
+        inflight = self._inflight.get(cell)
+        record_cache("weather", "miss" if inflight is None else "coalesced")
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._fetch_and_store(cell))
+            self._inflight[cell] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(cell, None))
+
+        # shield so one cancelled caller doesn't cancel the shared fetch
+        return dict(await asyncio.shield(inflight))
+
+    async def _fetch_and_store(self, cell: Tuple[float, float]) -> dict:
+        weather_data = await self._fetch(*cell)
+        if weather_data is not None:
+            self._cache.set(cell, weather_data)
+            return weather_data
+        # Don't cache fallbacks so the next request retries upstream
+        return get_fallback_weather_data()
+
+    async def _fetch(self, lat: float, lng: float) -> Optional[dict]:
+        """Fetch real-time weather data from Open-Meteo API (Completely Free)"""
+        started, outcome = time.perf_counter(), "error"
+        try:
+            url = f"{self.base_url}/forecast"
+            params = {
+                "latitude": lat,
+                "longitude": lng,
+                "current": "temperature_2m,relative_humidity_2m,pressure_msl,wind_speed_10m,wind_direction_10m,weather_code",
+                "timezone": "auto"
+            }
+
+            async with self._get_session().get(url, params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    current = data["current"]
+
+                    # Convert weather code to description and icon
+                    weather_info = get_weather_info_from_code(current["weather_code"])
+
+                    outcome = "ok"
+                    return {
+                        "temperature": current["temperature_2m"],
+                        "humidity": current["relative_humidity_2m"],
+                        "pressure": int(current["pressure_msl"]),
+                        "wind_speed": current["wind_speed_10m"],
+                        "wind_direction": int(current["wind_direction_10m"]),
+                        "description": weather_info["description"],
+                        "icon": weather_info["icon"],
+                        "timestamp": datetime.utcnow()
+                    }
+                else:
+                    logger.error("Open-Meteo API error: %s", response.status)
+                    return None
+        except Exception as e:
+            logger.error("Weather API error: %s", e)
+            return None
+        finally:
+            record_dependency("weather", time.perf_counter() - started, outcome)
+
+    async def close(self):
+        """Close the pooled HTTP session (called on app shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# Shared weather service used by every endpoint
+weather_service = WeatherService()
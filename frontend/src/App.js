@@ -7,6 +7,7 @@ import LandDetailsDashboard from './components/LandDetailsDashboard';
 import AIEnhancedCropPlanning from './components/AIEnhancedCropPlanning';
 import EnhancedMarketplace from './components/EnhancedMarketplace';
 import AIChatAssistant from './components/AIChatAssistant';
+import { fetchAllPages, morePages } from './pagination';
 
 const API_BASE_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001';
 
@@ -132,59 +133,29 @@ function App() {
   const fetchFarmerData = async () => {
     const token = localStorage.getItem('token');
     try {
-      // Fetch lands
-      const landsResponse = await fetch(`${API_BASE_URL}/api/lands`, {
+      // Lands, products, reports, plans and schedules come back in one request
+      const response = await fetch(`${API_BASE_URL}/api/dashboard`, {
         headers: { Authorization: `Bearer ${token}` }
       });
-      let landsData = [];
-      if (landsResponse.ok) {
-        landsData = await landsResponse.json();
-        setLands(landsData);
-      }
-
-      // Fetch products
-      const productsResponse = await fetch(`${API_BASE_URL}/api/my-products`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      if (productsResponse.ok) {
-        const productsData = await productsResponse.json();
-        setProducts(productsData);
-      }
-
-      // Fetch disease reports
-      const reportsResponse = await fetch(`${API_BASE_URL}/api/disease-reports`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      if (reportsResponse.ok) {
-        const reportsData = await reportsResponse.json();
-        setDiseaseReports(reportsData);
-      }
-
-      // Fetch plant plans
-      const plansResponse = await fetch(`${API_BASE_URL}/api/plant-plans`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      if (plansResponse.ok) {
-        const plansData = await plansResponse.json();
-        setPlantPlans(plansData);
-      }
-
-      // Fetch crop schedules for all lands
-      if (landsData.length > 0) {
-        console.log('🔄 Fetching crop schedules for', landsData.length, 'lands');
-        const schedulesPromises = landsData.map(land => 
-          fetch(`${API_BASE_URL}/api/crop-schedules/${land.id}`, {
-            headers: { Authorization: `Bearer ${token}` }
-          }).then(res => res.ok ? res.json() : [])
-        );
-        
-        const schedulesResults = await Promise.all(schedulesPromises);
-        const allSchedules = schedulesResults.flat();
-        console.log('📋 Total crop schedules loaded:', allSchedules.length);
-        setCropSchedules(allSchedules);
-      } else {
-        console.log('⚠️ No lands found, skipping crop schedule fetch');
-        setCropSchedules([]);
+      if (response.ok) {
+        const dashboardData = await response.json();
+        // Products and disease reports are first pages; the rest follow next_cursor
+        const options = { headers: { Authorization: `Bearer ${token}` } };
+        const allItems = (page, path) =>
+          morePages(page, `${API_BASE_URL}${path}`, options).catch(error => {
+            console.error(`Failed to fetch more of ${path}:`, error);
+            return page.items;
+          });
+        const [products, diseaseReports] = await Promise.all([
+          allItems(dashboardData.products, '/api/my-products'),
+          allItems(dashboardData.disease_reports, '/api/disease-reports')
+        ]);
+        setLands(dashboardData.lands);
+        setProducts(products);
+        setDiseaseReports(diseaseReports);
+        setPlantPlans(dashboardData.plant_plans);
+        console.log('📋 Total crop schedules loaded:', dashboardData.crop_schedules.length);
+        setCropSchedules(dashboardData.crop_schedules);
       }
     } catch (error) {
       console.error('Farmer data fetch error:', error);
@@ -193,13 +164,10 @@ function App() {
 
   const fetchCustomerData = async () => {
     try {
-      const response = await fetch(
+      const products = await fetchAllPages(
         `${API_BASE_URL}/api/products?lat=${userLocation.lat}&lng=${userLocation.lng}&radius=50`
       );
-      if (response.ok) {
-        const productsData = await response.json();
-        setAvailableProducts(productsData);
-      }
+      setAvailableProducts(products);
     } catch (error) {
       console.error('Customer data fetch error:', error);
     }
@@ -210,30 +178,30 @@ function App() {
     console.log('🔄 Refreshing crop schedules for land:', landId);
     const token = localStorage.getItem('token');
     try {
-      // Fetch both crop schedules and cultivation cycles
-      const [schedulesResponse, cyclesResponse] = await Promise.all([
-        fetch(`${API_BASE_URL}/api/crop-schedules/${landId}`, {
-          headers: { Authorization: `Bearer ${token}` }
-        }),
-        fetch(`${API_BASE_URL}/api/cultivation-cycles/${landId}`, {
+      // Fetch every page of both crop schedules and cultivation cycles; a failed
+      // list still lets the other one through
+      const fetchList = (path) =>
+        fetchAllPages(`${API_BASE_URL}${path}`, {
           headers: { Authorization: `Bearer ${token}` }
-        })
+        }).catch(error => {
+          console.error(`❌ Failed to fetch ${path}:`, error);
+          return null;
+        });
+      const [cropSchedules, cultivationCycles] = await Promise.all([
+        fetchList(`/api/crop-schedules/${landId}`),
+        fetchList(`/api/cultivation-cycles/${landId}`)
       ]);
       
       let allSchedules = [];
       
       // Process crop schedules
-      if (schedulesResponse.ok) {
-        const cropSchedules = await schedulesResponse.json();
+      if (cropSchedules) {
         console.log('📋 Crop schedules received for land', landId, ':', cropSchedules.length, 'schedules');
         allSchedules.push(...cropSchedules);
-      } else {
-        console.error('❌ Failed to fetch crop schedules, status:', schedulesResponse.status);
       }
       
       // Process cultivation cycles
-      if (cyclesResponse.ok) {
-        const cultivationCycles = await cyclesResponse.json();
+      if (cultivationCycles) {
         console.log('🌾 Cultivation cycles received for land', landId, ':', cultivationCycles.length, 'cycles');
         
         // Convert cultivation cycles to schedule format for compatibility
@@ -280,8 +248,6 @@ function App() {
         });
         
         allSchedules.push(...convertedCycles);
-      } else {
-        console.error('❌ Failed to fetch cultivation cycles, status:', cyclesResponse.status);
       }
       
       // Log all schedules
@@ -752,8 +718,11 @@ function App() {
         <div className="items-grid">
           {availableProducts.map(product => (
             <div key={product.id} className="item-card">
-              {product.image_base64 && (
-                <img src={`data:image/jpeg;base64,${product.image_base64}`} alt={product.name} />
+              {(product.image || product.image_base64) && (
+                <img
+                  src={product.image ? `${API_BASE_URL}${(product.image.thumbnail || product.image).url}` : `data:image/jpeg;base64,${product.image_base64}`}
+                  alt={product.name}
+                />
               )}
               <h4>{product.name}</h4>
               <p>{product.description}</p>
@@ -56,7 +56,7 @@ const AIChatAssistant = ({ selectedLand, isOpen, onToggle, onClose }) => {
 
     try {
       const token = localStorage.getItem('token');
-      const response = await fetch(`${API_BASE_URL}/api/ai-chat`, {
+      const response = await fetch(`${API_BASE_URL}/api/ai-chat/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -68,18 +68,50 @@ const AIChatAssistant = ({ selectedLand, isOpen, onToggle, onClose }) => {
         })
       });
 
-      if (response.ok) {
-        const data = await response.json();
-        const aiMessage = {
-          id: Date.now() + 1,
-          text: data.response,
-          sender: 'ai',
-          timestamp: new Date()
-        };
-        setMessages(prev => [...prev, aiMessage]);
-      } else {
+      if (!response.ok || !response.body) {
         throw new Error('Failed to get response');
       }
+
+      // Show the answer as it is generated: the server sends Server-Sent Events
+      // ("token" with a piece of text, then "done" or "error")
+      const aiMessageId = Date.now() + 1;
+      setMessages(prev => [...prev, {
+        id: aiMessageId,
+        text: '',
+        sender: 'ai',
+        timestamp: new Date(),
+        streaming: true
+      }]);
+      const updateAiMessage = (update) => {
+        setMessages(prev => prev.map(message =>
+          message.id === aiMessageId ? { ...message, ...update(message) } : message
+        ));
+      };
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let finished = false;
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const event of events) {
+          const name = event.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(event.match(/^data: (.*)$/m)?.[1] || '{}');
+          if (name === 'token') {
+            updateAiMessage(message => ({ text: message.text + data.content }));
+          } else if (name === 'error') {
+            updateAiMessage(() => ({ text: data.message, isError: true }));
+            finished = true;
+          } else if (name === 'done') {
+            finished = true;
+          }
+        }
+      }
+      updateAiMessage(() => ({ streaming: false }));
     } catch (error) {
       console.error('Error sending message:', error);
       const errorMessage = {
@@ -232,7 +264,7 @@ const AIChatAssistant = ({ selectedLand, isOpen, onToggle, onClose }) => {
                     </motion.div>
                   ))}
                   
-                  {isLoading && (
+                  {isLoading && !messages.some(message => message.streaming) && (
                     <motion.div
                       initial={{ opacity: 0 }}
                       animate={{ opacity: 1 }}
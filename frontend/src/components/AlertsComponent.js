@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
+import { fetchAllPages } from '../pagination';
 import { 
   Bell, 
   AlertTriangle, 
@@ -24,16 +25,12 @@ const AlertsComponent = () => {
   const fetchAlerts = async () => {
     setIsLoading(true);
     try {
-      const response = await fetch(`${API_BASE_URL}/api/alerts`, {
+      const alerts = await fetchAllPages(`${API_BASE_URL}/api/alerts`, {
         headers: {
           'Authorization': `Bearer ${localStorage.getItem('token')}`
         }
       });
-
-      if (response.ok) {
-        const data = await response.json();
-        setAlerts(data);
-      }
+      setAlerts(alerts);
     } catch (error) {
       console.error('Error fetching alerts:', error);
     } finally {
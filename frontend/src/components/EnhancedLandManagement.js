@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useRef } from 'react';
+import React, { useState, useEffect, useRef, useMemo } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import OpenStreetMapIntegration from './OpenStreetMapIntegration';
 import { 
@@ -20,10 +20,30 @@ import {
   AlertTriangle
 } from 'lucide-react';
 
-const EnhancedLandManagement = ({ user, onLandAdded, onLandSelected }) => {
-  const [lands, setLands] = useState([]);
-  const [landCropCounts, setLandCropCounts] = useState({}); // Store crop counts for each land
-  const [landProgress, setLandProgress] = useState({}); // Store progress for each land
+const EnhancedLandManagement = ({ user, lands: dashboardLands = [], cropSchedules = [], onLandAdded, onLandSelected }) => {
+  // Lands and schedules come from /api/dashboard; local edits show until the next refresh
+  const [lands, setLands] = useState(dashboardLands);
+  useEffect(() => {
+    setLands(dashboardLands);
+  }, [dashboardLands]);
+
+  // Active crop count and task progress of the newest active schedule, per land
+  const { landCropCounts, landProgress } = useMemo(() => {
+    const counts = {};
+    const progress = {};
+    const newestFirst = cropSchedules
+      .filter(schedule => schedule.active === true)
+      .sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+    for (const schedule of newestFirst) {
+      counts[schedule.land_id] = (counts[schedule.land_id] || 0) + 1;
+      if (progress[schedule.land_id] === undefined) {
+        const tasks = schedule.schedule || [];
+        const completedTasks = tasks.filter(task => task.completed).length;
+        progress[schedule.land_id] = tasks.length > 0 ? Math.round((completedTasks / tasks.length) * 100) : 0;
+      }
+    }
+    return { landCropCounts: counts, landProgress: progress };
+  }, [cropSchedules]);
   const [showAddLand, setShowAddLand] = useState(false);
   const [currentLocation, setCurrentLocation] = useState(null);
   const [selectedLand, setSelectedLand] = useState(null);
@@ -199,79 +219,6 @@ const EnhancedLandManagement = ({ user, onLandAdded, onLandSelected }) => {
     return "https://images.unsplash.com/photo-1500382017468-9049fed747ef?w=400&h=200&fit=crop&crop=center";
   };
 
-  // Fetch lands from backend
-  const fetchLands = async () => {
-    const token = localStorage.getItem('token');
-    try {
-      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001'}/api/lands`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      if (response.ok) {
-        const landsData = await response.json();
-        setLands(landsData);
-        
-        // Fetch crop counts for each land
-        await fetchCropCounts(landsData, token);
-      }
-    } catch (error) {
-      console.error('Error fetching lands:', error);
-    }
-  };
-
-  const fetchCropCounts = async (landsData, token) => {
-    try {
-      const cropCounts = {};
-      const landProgress = {};
-      
-      // Fetch crop schedules for each land
-      for (const land of landsData) {
-        try {
-          const response = await fetch(`${process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001'}/api/crop-schedules/${land.id}`, {
-            headers: { Authorization: `Bearer ${token}` }
-          });
-          
-          if (response.ok) {
-            const schedules = await response.json();
-            // Count active schedules (schedules that are currently being used)
-            const activeSchedules = schedules.filter(schedule => schedule.active === true);
-            cropCounts[land.id] = activeSchedules.length;
-            
-            // Calculate progress for active schedules
-            if (activeSchedules.length > 0) {
-              const activeSchedule = activeSchedules[0]; // Get the first active schedule
-              if (activeSchedule.schedule && activeSchedule.schedule.length > 0) {
-                const totalTasks = activeSchedule.schedule.length;
-                const completedTasks = activeSchedule.schedule.filter(task => task.completed).length;
-                const progressPercentage = Math.round((completedTasks / totalTasks) * 100);
-                landProgress[land.id] = progressPercentage;
-              } else {
-                landProgress[land.id] = 0;
-              }
-            } else {
-              landProgress[land.id] = 0;
-            }
-          } else {
-            cropCounts[land.id] = 0;
-            landProgress[land.id] = 0;
-          }
-        } catch (error) {
-          console.error(`Error fetching crop schedules for land ${land.id}:`, error);
-          cropCounts[land.id] = 0;
-          landProgress[land.id] = 0;
-        }
-      }
-      
-      setLandCropCounts(cropCounts);
-      setLandProgress(landProgress);
-    } catch (error) {
-      console.error('Error fetching crop counts:', error);
-    }
-  };
-
-  useEffect(() => {
-    fetchLands();
-  }, []);
-
   // Listen for the triggerAddLand event from the white button
   useEffect(() => {
     const handleTriggerAddLand = () => {
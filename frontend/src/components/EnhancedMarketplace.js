@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
+import { fetchAllPages } from '../pagination';
 import { 
   ShoppingCart, 
   Filter, 
@@ -42,12 +43,9 @@ const EnhancedMarketplace = ({ user, onBack }) => {
   // Fetch products
   const fetchProducts = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/products`);
-      if (response.ok) {
-        const data = await response.json();
-        setProducts(data);
-        setFilteredProducts(data);
-      }
+      const items = await fetchAllPages(`${API_BASE_URL}/api/products`);
+      setProducts(items);
+      setFilteredProducts(items);
     } catch (error) {
       console.error('Error fetching products:', error);
     } finally {
@@ -313,9 +311,9 @@ const EnhancedMarketplace = ({ user, onBack }) => {
                 >
                   {/* Product Image */}
                   <div className="h-48 bg-gray-100 relative">
-                    {product.image_base64 ? (
+                    {product.image || product.image_base64 ? (
                       <img
-                        src={`data:image/jpeg;base64,${product.image_base64}`}
+                        src={product.image ? `${API_BASE_URL}${(product.image.thumbnail || product.image).url}` : `data:image/jpeg;base64,${product.image_base64}`}
                         alt={product.name}
                         className="w-full h-full object-cover"
                       />
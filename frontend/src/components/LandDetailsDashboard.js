@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
+import { fetchAllPages } from '../pagination';
 import { 
   MapPin, 
   Leaf, 
@@ -362,8 +363,9 @@ const LandDetailsDashboard = ({ selectedLand, cropSchedules, onScheduleSaved, on
         }
       }
       
+      // Tasks are addressed by id; schedules saved before tasks had ids fall back to the index
       const requestBody = {
-        task_index: taskIndex,
+        ...(task.id ? { task_id: task.id } : { task_index: taskIndex }),
         action: action // 'done' or 'skip'
       };
       
@@ -503,14 +505,10 @@ const LandDetailsDashboard = ({ selectedLand, cropSchedules, onScheduleSaved, on
   const fetchCropPlanningHistory = async () => {
     try {
       const token = localStorage.getItem('token');
-      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001'}/api/crop-planning-history/${selectedLand.id}`, {
+      const history = await fetchAllPages(`${process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001'}/api/crop-planning-history/${selectedLand.id}`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
-      
-      if (response.ok) {
-        const history = await response.json();
-        setCropPlanningHistory(history);
-      }
+      setCropPlanningHistory(history);
     } catch (error) {
       console.error('Error fetching crop planning history:', error);
     }
@@ -519,16 +517,11 @@ const LandDetailsDashboard = ({ selectedLand, cropSchedules, onScheduleSaved, on
   const fetchDiseaseHistory = async () => {
     try {
       const token = localStorage.getItem('token');
-      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001'}/api/disease-reports`, {
+      // The server filters by land, so every page belongs to this land
+      const landReports = await fetchAllPages(`${process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001'}/api/disease-reports?land_id=${encodeURIComponent(selectedLand.id)}`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
-      
-      if (response.ok) {
-        const reports = await response.json();
-        // Filter reports for this land
-        const landReports = reports.filter(report => report.land_id === selectedLand.id);
-        setDiseaseHistory(landReports);
-      }
+      setDiseaseHistory(landReports);
     } catch (error) {
       console.error('Error fetching disease history:', error);
     }
@@ -0,0 +1,27 @@
+// List endpoints return one page at a time:
+//   { items, next_cursor, has_more, limit }
+// fetchAllPages follows next_cursor until the last page, so callers get every
+// item instead of silently stopping at the first page.
+export const fetchAllPages = async (url, options = {}, cursor = null) => {
+  const items = [];
+  do {
+    const pageUrl = cursor
+      ? `${url}${url.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}`
+      : url;
+    const response = await fetch(pageUrl, options);
+    if (!response.ok) {
+      throw new Error(`GET ${url} failed with status ${response.status}`);
+    }
+    const page = await response.json();
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return items;
+};
+
+// Completes a page that was embedded in another response (e.g. /api/dashboard)
+// by fetching the pages after it from the list endpoint it came from.
+export const morePages = async (page, url, options = {}) =>
+  page.next_cursor
+    ? [...page.items, ...(await fetchAllPages(url, options, page.next_cursor))]
+    : page.items;
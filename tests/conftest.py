@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules (`from geo import ...`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+
+@pytest.fixture
+def memory_client():
+    """mongomock-backed stand-in for AsyncMongoClient (see benchmarks/memory_db.py)"""
+    pytest.importorskip("mongomock")
+    from benchmarks.memory_db import MemoryClient
+    return MemoryClient()
+
+
+@pytest.fixture
+def memory_db(memory_client):
+    return memory_client["agriverse_test"]
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+FARMER = {"id": "f", "user_type": "farmer"}
+
+
+@pytest.fixture(autouse=True)
+def db(memory_db, monkeypatch):
+    for name in ("lands", "crop_schedules"):
+        monkeypatch.setattr(server, f"{name}_collection", memory_db[name])
+    return memory_db
+
+
+@pytest.mark.parametrize("handler, request_body", [
+    (server.ai_farm_analysis, server.AIFarmAnalysisRequest(land_id="land-1", schedule_id="missing")),
+    (server.analyze_yield, server.YieldAnalysisRequest(
+        schedule_id="missing", current_yield_estimate=10, target_yield=12,
+        concerns="", weather_conditions="", soil_conditions="",
+    )),
+])
+def test_missing_schedule_is_a_404_not_a_500(handler, request_body):
+    # A 4xx fails a queued job on its first attempt instead of being retried
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(handler(request_body, FARMER))
+    assert excinfo.value.status_code == 404
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("aiohttp")
+from benchmarks.run import compare
+
+BASELINE = {"meta": {}, "results": {"products": {"p95_ms": 10.0, "rps": 100.0, "errors": 0}}}
+
+
+def stats(p95_ms=10.0, rps=100.0, errors=0):
+    return {"p95_ms": p95_ms, "rps": rps, "errors": errors}
+
+
+@pytest.mark.parametrize("result, regressed", [
+    (stats(), False),
+    (stats(p95_ms=13.0), True),
+    (stats(rps=70.0), True),
+    (stats(p95_ms=5.0, rps=300.0, errors=3), True),
+])
+def test_slower_or_failing_scenarios_regress(result, regressed):
+    assert compare({"products": result}, BASELINE, tolerance=0.2) == (["products"] if regressed else [])
+
+
+def test_errors_in_a_new_scenario_regress():
+    results = {"new": stats(errors=1), "other": stats()}
+
+    assert compare(results, BASELINE, tolerance=0.2) == ["new"]
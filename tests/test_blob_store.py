@@ -0,0 +1,46 @@
+import asyncio
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+import blob_store
+from image_derivatives import render_derivatives
+from server import parse_range_header
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=999-999", (999, 999)),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "items=0-99",
+    "bytes=0-10,20-30",
+    "bytes=1000-",
+    "bytes=50-10",
+    "bytes=a-b",
+])
+def test_parse_range_header_rejects_unsatisfiable_or_malformed(header):
+    assert parse_range_header(header, 1000) is None
+
+
+@pytest.mark.parametrize("upload", [
+    "not base64!",
+    base64.b64encode(b"plain text, not an image").decode(),
+])
+def test_invalid_image_upload_is_a_400(monkeypatch, upload):
+    async def process_inline(data):
+        return render_derivatives(data)
+    monkeypatch.setattr(blob_store, "process_image", process_inline)
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(blob_store.store_image_base64(upload, blobs_collection=None))
+    assert excinfo.value.status_code == 400
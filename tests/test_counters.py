@@ -0,0 +1,43 @@
+import asyncio
+
+from counters import cycle_version_sequence, next_value
+
+
+def test_new_sequence_starts_at_one(memory_db):
+    assert asyncio.run(next_value(memory_db.counters, "invoices")) == 1
+    assert asyncio.run(next_value(memory_db.counters, "invoices")) == 2
+
+
+def test_start_seeds_only_the_first_value(memory_db):
+    calls = []
+
+    async def start():
+        calls.append(1)
+        return 7
+
+    async def run():
+        return [await next_value(memory_db.counters, "seq", start=start) for _ in range(3)]
+
+    assert asyncio.run(run()) == [8, 9, 10]
+    assert calls == [1]
+
+
+def test_concurrent_callers_get_distinct_values(memory_db):
+    async def start():
+        await asyncio.sleep(0)
+        return 2
+
+    async def run():
+        return await asyncio.gather(*(next_value(memory_db.counters, "seq", start=start) for _ in range(5)))
+
+    assert sorted(asyncio.run(run())) == [3, 4, 5, 6, 7]
+
+
+def test_sequences_are_independent(memory_db):
+    wheat = cycle_version_sequence("land-1", "wheat")
+    rice = cycle_version_sequence("land-1", "rice")
+
+    async def run():
+        return [await next_value(memory_db.counters, name) for name in (wheat, wheat, rice)]
+
+    assert asyncio.run(run()) == [1, 2, 1]
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import server
+import transactions
+
+FARMER = {"id": "f", "user_type": "farmer"}
+REQUEST = {
+    "land_id": "land-1", "crop_name": "wheat", "start_date": "2024-11-01",
+    "soil_type": "loamy", "season": "rabi", "parent_cycle_id": "parent",
+}
+
+
+@pytest.fixture
+def db(memory_client, monkeypatch):
+    db = memory_client["agriverse_test"]
+    for name in ("lands", "cultivation_cycles", "cycle_tasks", "crop_schedules", "counters"):
+        monkeypatch.setattr(server, f"{name}_collection", db[name])
+    monkeypatch.setattr(server, "client", memory_client)
+    monkeypatch.setattr(transactions, "_transactions_supported", None)
+
+    async def no_weather(lat, lng):
+        return None
+    monkeypatch.setattr(server, "get_weather_data", no_weather)
+
+    async def seed():
+        await db.lands.insert_one({"id": "land-1", "farmer_id": "f", "location": {"lat": 17.4, "lng": 78.5}})
+        await db.cultivation_cycles.insert_one({"id": "parent", "farmer_id": "f", "land_id": "land-1", "crop_name": "wheat", "cycle_version": 4})
+        await db.cycle_tasks.insert_many([
+            {"id": f"p{day}", "cycle_id": "parent", "farmer_id": "f", "day": day, "phase": "Growth", "task": f"Task {day}",
+             "description": "", "priority": "Medium", "completed": day < 3, "skipped": False,
+             "completed_at": "2024-06-01T00:00:00" if day < 3 else None}
+            for day in range(150)
+        ])
+    asyncio.run(seed())
+    return db
+
+
+@pytest.mark.parametrize("option, completed", [("continue", 3), ("repeat", 0)])
+def test_clone_copies_every_task(db, option, completed):
+    response = asyncio.run(server.create_cultivation_cycle({**REQUEST, "use_again_option": option}, current_user=FARMER))
+
+    assert response["cycle_version"] == 5
+    assert response["tasks_count"] == 150
+    tasks = asyncio.run(db.cycle_tasks.find({"cycle_id": response["cycle_id"]}).to_list(None))
+    assert len(tasks) == 150
+    assert sum(task["completed"] for task in tasks) == completed
+    schedule = asyncio.run(db.crop_schedules.find_one({"land_id": "land-1", "crop_name": "wheat"}))
+    assert schedule["current_cycle_id"] == response["cycle_id"]
+
+
+def test_failed_task_insert_leaves_no_cycle_behind(db, monkeypatch):
+    tasks = db.cycle_tasks
+
+    class FailingTasks:
+        name = tasks.name
+
+        def __getattr__(self, name):
+            return getattr(tasks, name)
+
+        async def insert_many(self, documents, **kwargs):
+            await tasks.insert_many(documents[:10], **kwargs)
+            raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(server, "cycle_tasks_collection", FailingTasks())
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(server.create_cultivation_cycle({**REQUEST, "use_again_option": "repeat"}, current_user=FARMER))
+
+    assert excinfo.value.status_code == 500
+    assert asyncio.run(db.cultivation_cycles.count_documents({})) == 1
+    assert asyncio.run(tasks.count_documents({})) == 150
+    assert asyncio.run(db.crop_schedules.count_documents({})) == 0
@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import server
+
+FARMER = {"id": "f", "user_type": "farmer"}
+
+
+@pytest.fixture
+def db(memory_db, monkeypatch):
+    for name in ("lands", "products", "disease_reports", "plant_plans", "crop_schedules"):
+        monkeypatch.setattr(server, f"{name}_collection", memory_db[name])
+
+    async def seed():
+        await memory_db.lands.insert_one({
+            "id": "land-1", "farmer_id": "f", "name": "North", "size": 2.5, "location": {"lat": 17.4, "lng": 78.5},
+            "geo": {"type": "Point", "coordinates": [78.5, 17.4]}, "address": None, "soil_type": "loamy",
+            "description": "long notes",
+        })
+        await memory_db.plant_plans.insert_one({
+            "id": "plan-1", "farmer_id": "f", "land_id": "land-1", "season": "rabi", "crops": ["wheat"],
+            "plan_details": "...", "ai_recommendations": "a very long plan", "created_at": datetime(2024, 5, 1),
+        })
+        await memory_db.disease_reports.insert_many([
+            {"id": f"r{i}", "farmer_id": "f", "land_id": "land-1", "image": {"url": "u", "thumbnail": "t"},
+             "created_at": datetime(2024, 5, 1 + i % 28, i // 28)}
+            for i in range(server.DEFAULT_PAGE_SIZE + 1)
+        ])
+        await memory_db.crop_schedules.insert_one({
+            "id": "s1", "farmer_id": "f", "land_id": "land-1", "crop_name": "wheat", "active": True,
+            "current_stage": "Growth", "days_elapsed": 30, "health_score": 82, "next_action": "Irrigate",
+            "disease_alerts": [{"disease": "rust"}], "created_at": datetime(2024, 5, 1),
+            "schedule": [{
+                "id": "t1", "day": 0, "phase": "Disease Management", "task": "Spray", "description": "",
+                "priority": "High", "completed": False, "skipped": False, "completed_at": None,
+                "temporary": True, "disease_related": True, "diagnosis": "rust", "added_at": "2024-05-01",
+            }],
+        })
+    asyncio.run(seed())
+    return memory_db
+
+
+def test_dashboard_returns_what_the_land_cards_render(db):
+    dashboard = asyncio.run(server.get_dashboard(current_user=FARMER))
+
+    land = dashboard["lands"][0]
+    assert set(land) == {"id", "name", "size", "location", "address", "soil_type"}
+    assert "ai_recommendations" not in dashboard["plant_plans"][0]
+
+    schedule = dashboard["crop_schedules"][0]
+    assert schedule["health_score"] == 82
+    assert schedule["next_action"] == "Irrigate"
+    assert "disease_alerts" not in schedule
+    task = schedule["schedule"][0]
+    assert task["temporary"] is True and task["disease_related"] is True
+    assert "diagnosis" not in task
+
+
+def test_dashboard_lists_are_the_first_keyset_page(db):
+    dashboard = asyncio.run(server.get_dashboard(current_user=FARMER))
+
+    assert dashboard["products"]["items"] == []
+    assert dashboard["products"]["next_cursor"] is None
+
+    reports = dashboard["disease_reports"]
+    assert len(reports["items"]) == server.DEFAULT_PAGE_SIZE
+    created = [(report["created_at"], report["id"]) for report in reports["items"]]
+    assert created == sorted(created, reverse=True)
+    assert reports["items"][0]["image"] == {"thumbnail": "t"}
+
+    rest = asyncio.run(server.get_disease_reports(
+        current_user=FARMER, page={"cursor": reports["next_cursor"], "limit": server.DEFAULT_PAGE_SIZE}
+    ))
+    assert len(rest["items"]) == 1 and rest["next_cursor"] is None
@@ -0,0 +1,37 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import server
+
+FARMER = {"id": "f", "user_type": "farmer"}
+
+
+@pytest.fixture
+def db(memory_db, monkeypatch):
+    monkeypatch.setattr(server, "disease_reports_collection", memory_db.disease_reports)
+
+    async def seed():
+        await memory_db.disease_reports.insert_many([
+            {"id": f"r{i}", "farmer_id": "f", "land_id": f"land-{i % 2}", "disease_name": "rust",
+             "created_at": datetime(2024, 5, 1 + i)}
+            for i in range(5)
+        ] + [{"id": "other", "farmer_id": "g", "land_id": "land-0", "created_at": datetime(2024, 6, 1)}])
+    asyncio.run(seed())
+    return memory_db
+
+
+def test_land_filter_pages_through_only_that_land(db):
+    async def all_pages():
+        ids, cursor = [], None
+        while True:
+            page = await server.get_disease_reports(
+                land_id="land-0", current_user=FARMER, page={"cursor": cursor, "limit": 2}
+            )
+            ids += [report["id"] for report in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return ids
+
+    assert asyncio.run(all_pages()) == ["r4", "r2", "r0"]
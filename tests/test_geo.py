@@ -0,0 +1,53 @@
+import pytest
+from fastapi import HTTPException
+
+from geo import decode_distance_cursor, encode_distance_cursor, geo_near_stage, geo_point
+
+
+def test_geo_point_is_lng_lat():
+    assert geo_point({"lat": 17.4, "lng": 78.5}) == {"type": "Point", "coordinates": [78.5, 17.4]}
+
+
+@pytest.mark.parametrize("location", [None, {}, {"lat": "17", "lng": 78}, {"lat": 91, "lng": 0}, {"lat": 0, "lng": 181}])
+def test_geo_point_rejects_invalid_locations(location):
+    assert geo_point(location) is None
+
+
+def test_distance_cursor_keeps_ids_tied_at_last_distance():
+    items = [
+        {"id": "a", "distance_m": 10.0},
+        {"id": "b", "distance_m": 25.5},
+        {"id": "c", "distance_m": 25.5},
+    ]
+
+    assert decode_distance_cursor(encode_distance_cursor(items)) == {"distance": 25.5, "ids": ["b", "c"]}
+
+
+def test_distance_cursor_carries_ties_across_pages():
+    first = encode_distance_cursor([{"id": "a", "distance_m": 5.0}, {"id": "b", "distance_m": 25.5}])
+    second = encode_distance_cursor([{"id": "c", "distance_m": 25.5}, {"id": "d", "distance_m": 25.5}], first)
+
+    assert decode_distance_cursor(second) == {"distance": 25.5, "ids": ["b", "c", "d"]}
+
+
+def test_distance_cursor_drops_previous_ids_once_distance_moves_on():
+    first = encode_distance_cursor([{"id": "a", "distance_m": 5.0}])
+    second = encode_distance_cursor([{"id": "b", "distance_m": 7.0}], first)
+
+    assert decode_distance_cursor(second) == {"distance": 7.0, "ids": ["b"]}
+
+
+def test_geo_near_stage_resumes_at_cursor():
+    cursor = encode_distance_cursor([{"id": "b", "distance_m": 25.5}, {"id": "c", "distance_m": 25.5}])
+
+    stage = geo_near_stage(17.4, 78.5, 1000, {"available": True}, cursor)["$geoNear"]
+
+    assert stage["near"] == {"type": "Point", "coordinates": [78.5, 17.4]}
+    assert stage["minDistance"] == 25.5
+    assert stage["query"] == {"available": True, "id": {"$nin": ["b", "c"]}}
+
+
+def test_invalid_distance_cursor_is_a_400():
+    with pytest.raises(HTTPException) as excinfo:
+        decode_distance_cursor("garbage")
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import decode_cursor, encode_cursor, keyset_filter, page_envelope
+
+
+def test_cursor_round_trips_datetime_key():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123000)
+    cursor = encode_cursor({"created_at": created_at, "id": "b"})
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "b")
+
+
+def test_cursor_round_trips_string_key():
+    cursor = encode_cursor({"created_at": "2024-05-01", "id": "b"})
+
+    assert decode_cursor(cursor) == ("2024-05-01", "b")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30"])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor)
+    assert excinfo.value.status_code == 400
+
+
+def test_keyset_filter_without_cursor_is_the_query():
+    query = {"farmer_id": "f"}
+
+    assert keyset_filter(query, None) is query
+
+
+def test_keyset_filter_resumes_after_cursor_with_id_tie_break():
+    created_at = datetime(2024, 5, 1)
+    cursor = encode_cursor({"created_at": created_at, "id": "b"})
+
+    assert keyset_filter({"farmer_id": "f"}, cursor) == {"$and": [
+        {"farmer_id": "f"},
+        {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": "b"}},
+        ]},
+    ]}
+
+
+def test_page_envelope_has_cursor_only_when_more():
+    docs = [{"created_at": datetime(2024, 5, 1), "id": str(i)} for i in range(3)]
+
+    page = page_envelope(docs, limit=2)
+    assert page["items"] == docs[:2]
+    assert page["has_more"] is True
+    assert decode_cursor(page["next_cursor"]) == (datetime(2024, 5, 1), "1")
+
+    last_page = page_envelope(docs[:2], limit=2)
+    assert last_page["has_more"] is False
+    assert last_page["next_cursor"] is None
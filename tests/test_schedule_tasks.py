@@ -0,0 +1,91 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import server
+from schedule_tasks import _latest_per_task, bulk_cycle_task_actions, bulk_schedule_task_actions
+
+T0 = datetime(2024, 5, 1, 8, 0)
+
+
+def item(index, task_id, minutes, action="done", parent="cycle_id", parent_id="c1"):
+    return {"index": index, parent: parent_id, "task_id": task_id, "action": action, "acted_at": T0 + timedelta(minutes=minutes)}
+
+
+def test_latest_per_task_supersedes_older_actions():
+    items = [item(0, "t1", 1), item(1, "t1", 5, "skip"), item(2, "t2", 3), item(3, "t1", 2)]
+
+    latest, results = _latest_per_task(items, "cycle_id")
+
+    assert sorted(i["index"] for i in latest) == [1, 2]
+    assert results == {0: "superseded", 3: "superseded"}
+
+
+def test_latest_per_task_keys_by_parent():
+    items = [item(0, "t1", 1, parent_id="c1"), item(1, "t1", 2, parent_id="c2")]
+
+    latest, results = _latest_per_task(items, "cycle_id")
+
+    assert len(latest) == 2
+    assert results == {}
+
+
+def test_bulk_cycle_task_actions(memory_db):
+    tasks = memory_db.cycle_tasks
+    asyncio.run(tasks.insert_many([
+        {"id": "t1", "cycle_id": "c1", "farmer_id": "f", "completed": False, "skipped": False},
+        {"id": "t2", "cycle_id": "c1", "farmer_id": "f", "completed": False, "skipped": False, "action_at": T0 + timedelta(hours=1)},
+        {"id": "t3", "cycle_id": "c1", "farmer_id": "other", "completed": False, "skipped": False},
+    ]))
+
+    results = asyncio.run(bulk_cycle_task_actions(tasks, "f", [
+        item(0, "t1", 1),
+        item(1, "t2", 1),  # older than the task's last action
+        item(2, "t3", 1),  # someone else's task
+        item(3, "missing", 1),
+    ]))
+
+    assert results == {0: "applied", 1: "superseded", 2: "not_found", 3: "not_found"}
+    t1 = asyncio.run(tasks.find_one({"id": "t1"}))
+    assert t1["completed"] is True and t1["action_at"] == T0 + timedelta(minutes=1)
+    assert asyncio.run(tasks.find_one({"id": "t2"}))["completed"] is False
+
+
+def test_bulk_cycle_task_actions_replay_is_harmless(memory_db):
+    tasks = memory_db.cycle_tasks
+    asyncio.run(tasks.insert_one({"id": "t1", "cycle_id": "c1", "farmer_id": "f", "completed": False, "skipped": False}))
+    batch = [item(0, "t1", 1, "skip")]
+
+    asyncio.run(bulk_cycle_task_actions(tasks, "f", batch))
+    results = asyncio.run(bulk_cycle_task_actions(tasks, "f", batch))
+
+    assert results == {0: "applied"}
+    assert asyncio.run(tasks.find_one({"id": "t1"}))["skipped"] is True
+
+
+def test_bulk_schedule_task_actions_not_found(memory_db):
+    schedules = memory_db.crop_schedules
+    asyncio.run(schedules.insert_one({"id": "s1", "farmer_id": "f", "schedule": [{"id": "t1", "task": "Sow"}]}))
+
+    results = asyncio.run(bulk_schedule_task_actions(schedules, "f", [
+        item(0, "missing", 1, parent="schedule_id", parent_id="s1"),
+        item(1, "t1", 1, parent="schedule_id", parent_id="other-schedule"),
+    ]))
+
+    assert results == {0: "not_found", 1: "not_found"}
+
+
+def test_bulk_task_actions_reports_invalid_items(memory_db, monkeypatch):
+    monkeypatch.setattr(server, "cycle_tasks_collection", memory_db.cycle_tasks)
+    asyncio.run(memory_db.cycle_tasks.insert_one({"id": "t1", "cycle_id": "c1", "farmer_id": "f"}))
+    request = server.BulkTaskActionRequest(actions=[
+        {"cycle_id": "c1", "task_id": "t1", "action": "done", "client_id": "a"},
+        {"cycle_id": "c1", "task_id": "t1", "action": "water"},
+        {"schedule_id": "s1", "cycle_id": "c1", "task_id": "t1", "action": "done"},
+        {"task_id": "t1", "action": "done"},
+    ])
+
+    response = asyncio.run(server.bulk_task_actions(request, current_user={"id": "f", "user_type": "farmer"}))
+
+    assert [result["status"] for result in response["results"]] == ["applied", "invalid", "invalid", "invalid"]
+    assert response["results"][0]["client_id"] == "a"
+    assert response["applied"] == 1
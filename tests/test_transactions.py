@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure
+
+import transactions
+from transactions import run_in_transaction
+
+
+@pytest.fixture(autouse=True)
+def unknown_support(monkeypatch):
+    monkeypatch.setattr(transactions, "_transactions_supported", None)
+
+
+class FakeSession:
+    def __init__(self, error=None):
+        self.error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def with_transaction(self, callback):
+        if self.error:
+            raise self.error
+        return await callback(self)
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+
+    def start_session(self):
+        return FakeSession(self.error)
+
+
+def test_runs_write_in_a_session():
+    sessions = []
+
+    async def write(session):
+        sessions.append(session)
+        return "ok"
+
+    assert asyncio.run(run_in_transaction(FakeClient(), write)) == "ok"
+    assert isinstance(sessions[0], FakeSession)
+    assert transactions._transactions_supported is True
+
+
+def test_standalone_server_falls_back_to_plain_writes(memory_client):
+    sessions = []
+
+    async def write(session):
+        sessions.append(session)
+        return "ok"
+
+    assert asyncio.run(run_in_transaction(memory_client, write)) == "ok"
+    assert sessions == [None]
+    assert transactions._transactions_supported is False
+
+
+def test_failed_fallback_write_is_undone_and_reraised(memory_client):
+    db = memory_client["agriverse_test"]
+
+    async def write(session):
+        await db.cultivation_cycles.insert_one({"id": "c1"}, session=session)
+        raise RuntimeError("task insert failed")
+
+    async def undo():
+        await db.cultivation_cycles.delete_one({"id": "c1"})
+
+    with pytest.raises(RuntimeError, match="task insert failed"):
+        asyncio.run(run_in_transaction(memory_client, write, undo=undo))
+    assert asyncio.run(db.cultivation_cycles.count_documents({})) == 0
+
+
+def test_undo_failure_keeps_the_original_error():
+    async def write(session):
+        raise RuntimeError("write failed")
+
+    async def undo():
+        raise RuntimeError("undo failed")
+
+    transactions._transactions_supported = False
+    with pytest.raises(RuntimeError, match="write failed"):
+        asyncio.run(run_in_transaction(FakeClient(), write, undo=undo))
+
+
+def test_other_transaction_errors_are_raised():
+    async def write(session):
+        return "ok"
+
+    with pytest.raises(OperationFailure):
+        asyncio.run(run_in_transaction(FakeClient(OperationFailure("write conflict", code=112)), write))
+    assert transactions._transactions_supported is None
+
+
+def test_illegal_operation_is_raised_once_transactions_worked():
+    async def write(session):
+        return "ok"
+
+    transactions._transactions_supported = True
+    with pytest.raises(OperationFailure):
+        asyncio.run(run_in_transaction(FakeClient(OperationFailure("illegal", code=20)), write))
+
+
+def test_disabled_transactions_skip_the_session():
+    class NoSessions:
+        def start_session(self):
+            raise AssertionError("no session expected")
+
+    async def write(session):
+        return session
+
+    transactions._transactions_supported = False
+    assert asyncio.run(run_in_transaction(NoSessions(), write)) is None
@@ -0,0 +1,63 @@
+import pytest
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_returns_value_until_ttl(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("k", "v")
+
+    clock[0] += 9.9
+    assert cache.get("k") == "v"
+    clock[0] += 0.1
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    cache = TTLCache(ttl=10)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2)
+
+    clock[0] += 5
+    assert "short" not in cache
+    assert "long" in cache
+
+
+def test_evicts_least_recently_used(clock):
+    cache = TTLCache(max_entries=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_falsy_values_are_hits(clock):
+    cache = TTLCache()
+    cache.set("empty", None)
+
+    assert "empty" in cache
+    assert cache.get("empty", "default") is None
+
+
+def test_pop_and_clear(clock):
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+    cache.clear()
+    assert len(cache) == 0